@@ -8,15 +8,36 @@ extracting structured content, and analyzing papers with LLM.
 __version__ = "1.0.0"
 __author__ = "Interactive Paper Reading Team"
 
-from .grobid import GrobidProcessor
-from .tei import TEIProcessor, Section, FigureTable, Graphic
-from .analyzer import PaperAnalyzer, Reference, PaperAnalysis
-from .pipeline import PaperProcessingPipeline
-from .processor import AcademicPaperProcessor
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .grobid import GrobidProcessor
+    from .tei import TEIProcessor, TEIDocument, Section, FigureTable, Graphic
+    from .analyzer import PaperAnalyzer, Reference, PaperAnalysis
+    from .pipeline import PaperProcessingPipeline
+    from .processor import AcademicPaperProcessor
+
+# Public name -> defining submodule. Submodules are imported on first access,
+# so e.g. using only the analyzer does not pay for loading grobid_client.
+_EXPORTS = {
+    "GrobidProcessor": ".grobid",
+    "TEIProcessor": ".tei",
+    "TEIDocument": ".tei",
+    "Section": ".tei",
+    "FigureTable": ".tei",
+    "Graphic": ".tei",
+    "PaperAnalyzer": ".analyzer",
+    "Reference": ".analyzer",
+    "PaperAnalysis": ".analyzer",
+    "PaperProcessingPipeline": ".pipeline",
+    "AcademicPaperProcessor": ".processor",
+}
 
 __all__ = [
     "GrobidProcessor",
     "TEIProcessor", 
+    "TEIDocument",
     "Section",
     "FigureTable", 
     "Graphic",
@@ -26,3 +47,16 @@ __all__ = [
     "PaperProcessingPipeline",
     "AcademicPaperProcessor"
 ]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -7,23 +7,126 @@ This module analyzes processed academic papers to extract insights including:
 3. Content analysis of the paper sections
 """
 
+import functools
+import hashlib
+import itertools
 import json
 import logging
 import os
 import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import requests
-from xml.etree import ElementTree as ET
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .tei import TEIProcessor
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib JSON encoder
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to truncating the prompt by characters
+    tiktoken = None
+
 logger = logging.getLogger(__name__)
 
+# TEI namespace, and the tags/attributes matched while streaming references
+_TEI_NS = {'tei': 'http://www.tei-c.org/ns/1.0'}
+_BIBL_STRUCT_TAG = '{http://www.tei-c.org/ns/1.0}biblStruct'
+_LIST_BIBL_TAG = '{http://www.tei-c.org/ns/1.0}listBibl'
+_XML_ID_ATTR = '{http://www.w3.org/XML/1998/namespace}id'
+
+_REF_TAG = '{http://www.tei-c.org/ns/1.0}ref'
+
+# dataclass(slots=True) needs Python 3.10; earlier versions keep a __dict__.
+# Explicit __slots__ would conflict with Reference's field defaults.
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+_BIBL_STRUCTS_XP = etree.XPath('.//tei:listBibl/tei:biblStruct', namespaces=_TEI_NS)
+_BIBR_REFS_XP = etree.XPath('.//tei:ref[@type="bibr"]', namespaces=_TEI_NS)
+
+# Tags of GROBID's biblStruct layout, walked child by child per reference
+_ANALYTIC_TAG = '{http://www.tei-c.org/ns/1.0}analytic'
+_MONOGR_TAG = '{http://www.tei-c.org/ns/1.0}monogr'
+_TITLE_TAG = '{http://www.tei-c.org/ns/1.0}title'
+_AUTHOR_TAG = '{http://www.tei-c.org/ns/1.0}author'
+_PERS_NAME_TAG = '{http://www.tei-c.org/ns/1.0}persName'
+_FORENAME_TAG = '{http://www.tei-c.org/ns/1.0}forename'
+_SURNAME_TAG = '{http://www.tei-c.org/ns/1.0}surname'
+_IMPRINT_TAG = '{http://www.tei-c.org/ns/1.0}imprint'
+_DATE_TAG = '{http://www.tei-c.org/ns/1.0}date'
+
+# Patterns applied to every paper, compiled once
+_REFS_RE = re.compile(r'(?:(?P<author>[A-Z][a-z]+(?:\s+et\s+al\.?)?)\s*)?\[(?P<id>\d+)\]')
+_TITLE_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_tei_processor() -> TEIProcessor:
+    """Return the TEIProcessor shared by all analyzers in this process.
+    
+    The analyzer only streams TEI files through it, which keeps no state
+    between calls, so one instance (and its compiled XPaths) serves every
+    analyzer and thread.
+    """
+    return TEIProcessor()
+
+
+def _element_text(element) -> Optional[str]:
+    """Return the stripped text of an element, or None if it is missing or empty."""
+    if element is not None and element.text:
+        return element.text.strip()
+    return None
+
+
+def _author_names(author) -> List[str]:
+    """Return "Forename Surname" (or just the surname) per persName of an author."""
+    names = []
+    for pers_name in author:
+        if pers_name.tag != _PERS_NAME_TAG:
+            continue
+        forename = surname = None
+        for part in pers_name:
+            if part.tag == _FORENAME_TAG and forename is None:
+                forename = _element_text(part) or ""
+            elif part.tag == _SURNAME_TAG and surname is None:
+                surname = _element_text(part) or ""
+        
+        if forename and surname:
+            names.append(f"{forename} {surname}")
+        elif surname:
+            names.append(surname)
+    return names
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _load_json(text: str):
+    """Parse JSON text, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _dump_json(data) -> bytes:
+    """Serialize data as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class Reference:
     """Represents a bibliographic reference."""
     id: str
@@ -34,7 +137,7 @@ class Reference:
     full_text: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class PaperAnalysis:
     """Results of paper analysis."""
     paper_title: str
@@ -48,16 +151,38 @@ class PaperAnalysis:
 class PaperAnalyzer:
     """Analyzes academic papers using LLM for insights."""
     
+    # Paper content included in the prompt: tokens when tiktoken is installed,
+    # characters otherwise. The markdown read for the title and prompt covers
+    # either budget with slack for the header (~4-5 characters per token).
+    MAX_CONTENT_TOKENS = 6000
+    PROMPT_CONTENT_CHARS = 8000
+    CONTENT_READ_CHARS = 32768
+    
+    # Keep-alive connections kept per host; covers analyze_papers() workers
+    POOL_CONNECTIONS = 8
+    POOL_MAXSIZE = 32
+    
     def __init__(self, 
                  openai_endpoint: Optional[str] = None,
                  openai_model: Optional[str] = None,
-                 openai_token: Optional[str] = None):
+                 openai_token: Optional[str] = None,
+                 cache_dir: Optional[Path] = None,
+                 max_content_tokens: int = MAX_CONTENT_TOKENS,
+                 stream: bool = False):
         """Initialize the analyzer.
         
         Args:
             openai_endpoint: OpenAI API endpoint (defaults to env OPENAI_ENDPOINT)
             openai_model: Model name (defaults to env OPENAI_MODEL)
             openai_token: API token (defaults to env OPENAI_ACCESS_TOKEN)
+            cache_dir: Directory in which LLM responses are cached by model and
+                prompt, so re-analyzing an unchanged paper costs no API call;
+                None disables the cache
+            max_content_tokens: Tokens of paper content sent in the prompt when
+                tiktoken is installed
+            stream: Receive the completion as a server-sent-events stream, so
+                the request timeout bounds the gap between chunks rather than
+                the whole generation of a long analysis
         """
         self.endpoint = openai_endpoint or os.getenv('OPENAI_ENDPOINT', 'https://api.openai.com/v1')
         self.model = openai_model or os.getenv('OPENAI_MODEL', 'gpt-4')
@@ -66,91 +191,174 @@ class PaperAnalyzer:
         if not self.token:
             raise ValueError("OpenAI API token must be provided or set in OPENAI_ACCESS_TOKEN environment variable")
         
-        self.tei_processor = TEIProcessor()
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir is not None else None
+        self.max_content_tokens = max_content_tokens
+        self.stream = stream
+        self._encoding = None
+        self.tei_processor = _shared_tei_processor()
+        self.session = self._create_session()
+    
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session so LLM calls reuse one TLS connection.
+        
+        Rate limiting (429) and transient server errors are retried with
+        backoff, honouring Retry-After. Read timeouts are not retried: the
+        completion may still be generating (and billed) server-side.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=Retry(total=5, read=0, backoff_factor=0.5,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=frozenset({'POST'}),
+                              raise_on_status=False)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            'Authorization': f'Bearer {self.token}',
+            'Content-Type': 'application/json',
+        })
+        return session
+    
+    def close(self):
+        """Release the LLM connection pool."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
     
-    def extract_references_from_tei(self, tei_file: Path) -> List[Reference]:
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def extract_references_from_tei(self, tei_file, cited_in: Optional[str] = None) -> List[Reference]:
         """Extract bibliographic references from TEI XML.
         
+        A TEI file is streamed with ``iterparse`` and each ``biblStruct`` is
+        discarded once read, so the whole document is never held in memory.
+        
         Args:
-            tei_file: Path to TEI XML file
+            tei_file: Path to TEI XML file, or a tree already returned by
+                TEIProcessor.parse()
+            cited_in: Optional text (e.g. the paper content sent to the LLM);
+                only references whose in-text citation marker appears in it
+                are returned, in order of first citation. All references are
+                returned if none of the markers appear.
             
         Returns:
             List of Reference objects
         """
         references = []
+        # In-text citation marker, e.g. "[12]", -> ids of the references it cites
+        citations: Dict[str, Dict[str, None]] = {}
         
         try:
-            tree = ET.parse(tei_file)
-            root = tree.getroot()
-            
-            # TEI namespace
-            ns = {'tei': 'http://www.tei-c.org/ns/1.0'}
+            tags = (_BIBL_STRUCT_TAG, _REF_TAG) if cited_in is not None else (_BIBL_STRUCT_TAG,)
+            if isinstance(tei_file, (str, os.PathLike)):
+                # Citations and the bibliography are read in the same pass
+                elements = (element for _, element in self.tei_processor._iterparse(tei_file, *tags))
+            else:
+                elements = _BIBL_STRUCTS_XP(tei_file)
+                if cited_in is not None:
+                    elements = _BIBR_REFS_XP(tei_file) + elements
             
-            # Find all bibliographic structures
-            bibl_structs = root.findall('.//tei:listBibl/tei:biblStruct', ns)
+            for element in elements:
+                if element.tag == _REF_TAG:
+                    target = element.get('target')
+                    if element.get('type') == 'bibr' and target:
+                        marker = ''.join(element.itertext()).strip()
+                        citations.setdefault(marker, {})[target.lstrip('#')] = None
+                elif element.getparent().tag == _LIST_BIBL_TAG:
+                    references.append(self._reference_from_bibl(element, len(references)))
             
-            for i, bibl_struct in enumerate(bibl_structs):
-                ref_id = bibl_struct.get('{http://www.w3.org/XML/1998/namespace}id', f'ref_{i}')
-                
-                # Extract title
-                title_elem = bibl_struct.find('.//tei:title[@level="a"]', ns)
-                title = title_elem.text.strip() if title_elem is not None and title_elem.text else "Unknown Title"
-                
-                # Extract authors
-                authors = []
-                author_elems = bibl_struct.findall('.//tei:author/tei:persName', ns)
-                for author_elem in author_elems:
-                    # Extract forename and surname
-                    forename_elem = author_elem.find('tei:forename', ns)
-                    surname_elem = author_elem.find('tei:surname', ns)
-                    
-                    forename = forename_elem.text.strip() if forename_elem is not None and forename_elem.text else ""
-                    surname = surname_elem.text.strip() if surname_elem is not None and surname_elem.text else ""
-                    
-                    if forename and surname:
-                        authors.append(f"{forename} {surname}")
-                    elif surname:
-                        authors.append(surname)
-                
-                # Extract publication year
-                year = None
-                date_elem = bibl_struct.find('.//tei:imprint/tei:date[@type="published"]', ns)
-                if date_elem is not None:
-                    when_attr = date_elem.get('when')
-                    if when_attr:
-                        year = when_attr[:4]  # Extract year part
-                
-                # Extract venue (journal/conference)
-                venue = None
-                journal_elem = bibl_struct.find('.//tei:title[@level="j"]', ns)
-                if journal_elem is not None and journal_elem.text:
-                    venue = journal_elem.text.strip()
-                else:
-                    # Try conference/proceedings
-                    conf_elem = bibl_struct.find('.//tei:title[@level="m"]', ns)
-                    if conf_elem is not None and conf_elem.text:
-                        venue = conf_elem.text.strip()
-                
-                # Create full text representation
-                author_str = ", ".join(authors) if authors else "Unknown Authors"
-                year_str = f" ({year})" if year else ""
-                venue_str = f" In {venue}." if venue else ""
-                full_text = f"{author_str}{year_str}. {title}.{venue_str}"
-                
-                references.append(Reference(
-                    id=ref_id,
-                    title=title,
-                    authors=authors,
-                    year=year,
-                    venue=venue,
-                    full_text=full_text
-                ))
-        
+            if cited_in is not None:
+                cited = self._cited_references(references, citations, cited_in)
+                logger.debug(f"{len(cited)} of {len(references)} TEI references are cited in the content")
+                if cited:
+                    return cited
+        
+        except FileNotFoundError as e:
+            logger.debug(f"No TEI references: {e}")
         except Exception as e:
             logger.warning(f"Could not extract references from TEI: {e}")
         
         return references
     
+    @staticmethod
+    def _cited_references(references: List[Reference],
+                          citations: Dict[str, Dict[str, None]],
+                          content: str) -> List[Reference]:
+        """Return the references whose citation markers occur in content, by first occurrence."""
+        first_cited = {}
+        for marker, targets in citations.items():
+            # Bare numbers (superscript citations) would match any number in the text
+            if not marker or marker.isdigit():
+                continue
+            position = content.find(marker)
+            if position < 0:
+                continue
+            for target in targets:
+                if position < first_cited.get(target, len(content)):
+                    first_cited[target] = position
+        
+        by_id = {ref.id: ref for ref in references}
+        return [by_id[ref_id] for ref_id in sorted(first_cited, key=first_cited.get) if ref_id in by_id]
+    
+    @staticmethod
+    def _reference_from_bibl(bibl_struct, index: int) -> Reference:
+        """Build a Reference from one ``biblStruct`` element.
+        
+        Fields are read in a single walk along GROBID's fixed
+        ``analytic``/``monogr`` layout instead of one search per field.
+        """
+        ref_id = bibl_struct.get(_XML_ID_ATTR, f'ref_{index}')
+        
+        # One walk over the analytic (article) and monogr (venue/book)
+        # children, keeping the first title per section and level
+        titles = {}
+        authors = []
+        date_elem = None
+        for section in bibl_struct:
+            if section.tag != _ANALYTIC_TAG and section.tag != _MONOGR_TAG:
+                continue
+            for child in section:
+                if child.tag == _TITLE_TAG:
+                    titles.setdefault((section.tag, child.get('level')), child)
+                elif child.tag == _AUTHOR_TAG:
+                    authors.extend(_author_names(child))
+                elif child.tag == _IMPRINT_TAG and section.tag == _MONOGR_TAG and date_elem is None:
+                    date_elem = next((date for date in child
+                                      if date.tag == _DATE_TAG and date.get('type') == 'published'), None)
+        
+        title = _element_text(titles.get((_ANALYTIC_TAG, 'a'))) or "Unknown Title"
+        
+        # Extract publication year
+        year = None
+        if date_elem is not None:
+            when_attr = date_elem.get('when')
+            if when_attr:
+                year = when_attr[:4]  # Extract year part
+        
+        # Extract venue (journal/conference), falling back to the proceedings title
+        venue = (_element_text(titles.get((_MONOGR_TAG, 'j')))
+                 or _element_text(titles.get((_MONOGR_TAG, 'm'))))
+        
+        # Create full text representation
+        author_str = ", ".join(authors) if authors else "Unknown Authors"
+        year_str = f" ({year})" if year else ""
+        venue_str = f" In {venue}." if venue else ""
+        full_text = f"{author_str}{year_str}. {title}.{venue_str}"
+        
+        return Reference(
+            id=ref_id,
+            title=title,
+            authors=authors,
+            year=year,
+            venue=venue,
+            full_text=full_text
+        )
+    
     def extract_references_from_markdown(self, content: str) -> List[Reference]:
         """Extract references from markdown content using pattern matching.
         
@@ -162,25 +370,18 @@ class PaperAnalyzer:
         """
         references = []
         
-        # Pattern to find reference citations like [1], [18], etc.
-        citation_pattern = r'\[(\d+)\]'
-        citations = set(re.findall(citation_pattern, content))
-        
-        # Look for author-year patterns like "Carion et al. [1]"
-        author_year_pattern = r'([A-Z][a-z]+(?:\s+et\s+al\.?)?)\s*\[(\d+)\]'
-        author_matches = re.findall(author_year_pattern, content)
+        # One pass over citations like [1], noting the first author-year
+        # mention of each, e.g. "Carion et al. [1]"
+        citation_authors: Dict[str, Optional[str]] = {}
+        for match in _REFS_RE.finditer(content):
+            citation, author = match.group('id'), match.group('author')
+            if citation_authors.get(citation) is None:
+                citation_authors[citation] = author
         
         # Create reference objects from found patterns
-        for i, citation in enumerate(sorted(citations, key=int)):
-            # Find corresponding author if available
-            authors = []
-            for author, cite_id in author_matches:
-                if cite_id == citation:
-                    authors.append(author)
-                    break
-            
-            if not authors:
-                authors = ["Unknown Author"]
+        for citation in sorted(citation_authors, key=int):
+            author = citation_authors[citation]
+            authors = [author] if author else ["Unknown Author"]
             
             references.append(Reference(
                 id=f"ref_{citation}",
@@ -194,17 +395,41 @@ class PaperAnalyzer:
     def call_llm(self, prompt: str) -> str:
         """Call the LLM API with the given prompt.
         
+        With a ``cache_dir``, a response already received for the same model
+        and prompt is returned from disk instead.
+        
         Args:
             prompt: The prompt to send to the LLM
             
         Returns:
             The LLM response
         """
-        headers = {
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json',
-        }
+        if self.cache_dir is None:
+            return self._request_completion(prompt)
+        
+        # The model is part of the key so responses never leak across models
+        key = hashlib.sha256(f"{self.model}\0{prompt}".encode('utf-8')).hexdigest()
+        cache_file = self.cache_dir / f"{key}.txt"
+        try:
+            response = cache_file.read_text(encoding='utf-8')
+            logger.debug("Using cached LLM response")
+            return response
+        except OSError:
+            pass
         
+        response = self._request_completion(prompt)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent analyses never read a partial entry
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_file.write_text(response, encoding='utf-8')
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not cache LLM response: {e}")
+        return response
+    
+    def _request_completion(self, prompt: str) -> str:
+        """Send the prompt to the chat completions endpoint and return the reply."""
         data = {
             'model': self.model,
             'messages': [
@@ -216,20 +441,26 @@ class PaperAnalyzer:
             'temperature': 0.7,
             'max_tokens': 4000,
         }
+        if self.stream:
+            data['stream'] = True
         
         try:
-            logger.info("Making LLM API call...")
-            response = requests.post(
+            logger.debug("Making LLM API call...")
+            response = self.session.post(
                 f'{self.endpoint}/chat/completions',
-                headers=headers,
                 json=data,
-                timeout=120
+                timeout=120,
+                stream=self.stream
             )
-            response.raise_for_status()
-            
-            result = response.json()
-            logger.info("LLM API call successful")
-            return result['choices'][0]['message']['content']
+            with response:
+                response.raise_for_status()
+                
+                if self.stream:
+                    content = self._read_stream(response)
+                else:
+                    content = response.json()['choices'][0]['message']['content']
+            logger.debug("LLM API call successful")
+            return content
         
         except requests.RequestException as e:
             logger.error(f"LLM API call failed: {e}")
@@ -238,6 +469,44 @@ class PaperAnalyzer:
             logger.error(f"Unexpected API response format: {e}")
             raise RuntimeError(f"Unexpected API response format: {e}")
     
+    def _truncate_content(self, content: str) -> str:
+        """Cut paper content to the prompt budget.
+        
+        With tiktoken the cut is at ``max_content_tokens`` tokens of the
+        model's encoding, so the budget is used fully without overflowing the
+        context; otherwise it falls back to ``PROMPT_CONTENT_CHARS`` characters.
+        """
+        if tiktoken is None:
+            return content[:self.PROMPT_CONTENT_CHARS]
+        
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:  # Model unknown to tiktoken, e.g. a local deployment
+                self._encoding = tiktoken.get_encoding('cl100k_base')
+        
+        tokens = self._encoding.encode(content, disallowed_special=())
+        if len(tokens) <= self.max_content_tokens:
+            return content
+        return self._encoding.decode(tokens[:self.max_content_tokens])
+    
+    @staticmethod
+    def _read_stream(response) -> str:
+        """Join the content deltas of a server-sent-events completion stream."""
+        parts = []
+        for line in response.iter_lines():
+            # Skip keep-alive blank lines and SSE comments
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == b'[DONE]':
+                break
+            for choice in _load_json(payload)['choices']:
+                delta = choice.get('delta', {}).get('content')
+                if delta:
+                    parts.append(delta)
+        return ''.join(parts)
+    
     def create_analysis_prompt(self, 
                               paper_content: str, 
                               references: List[Reference],
@@ -253,11 +522,11 @@ class PaperAnalyzer:
             Formatted prompt for LLM analysis
         """
         # Format references for the prompt
-        references_text = ""
         if references:
-            references_text = "\\n\\nAVAILABLE REFERENCES:\\n"
-            for ref in references[:50]:  # Limit to first 50 references to avoid token limits
-                references_text += f"- [{ref.id}] {ref.full_text}\\n"
+            # Limit to first 50 references to avoid token limits
+            references_text = "\\n\\nAVAILABLE REFERENCES:\\n" + "".join(
+                f"- [{ref.id}] {ref.full_text}\\n" for ref in itertools.islice(references, 50)
+            )
         else:
             references_text = "\\n\\nNote: No structured references were available. Please infer relevant papers from the content."
         
@@ -267,7 +536,7 @@ You are an expert academic researcher analyzing a research paper. Please provide
 PAPER TITLE: {paper_title}
 
 PAPER CONTENT:
-{paper_content[:8000]}  # Limit content to avoid token limits
+{self._truncate_content(paper_content)}  # Limit content to avoid token limits
 
 {references_text}
 
@@ -328,14 +597,19 @@ Please ensure the response is valid JSON format.
             pass
         else:
             # Try to find JSON object in the response
-            json_match = re.search(r'\{.*\}', response_clean, re.DOTALL)
-            if json_match:
-                response_clean = json_match.group(0)
-            else:
+            start = response_clean.find('{')
+            end = response_clean.rfind('}')
+            if start < 0 or end < start:
                 raise ValueError(f"No JSON object found in response: {response_clean[:200]}...")
+            try:
+                # Decode the object in place; prose after it is ignored
+                return _JSON_DECODER.raw_decode(response_clean, start)[0]
+            except json.JSONDecodeError:
+                # Report the error for the outermost braces, as before
+                response_clean = response_clean[start:end + 1]
         
         try:
-            return json.loads(response_clean)
+            return _load_json(response_clean)
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
             logger.error(f"Response content: {response_clean[:500]}...")
@@ -343,63 +617,74 @@ Please ensure the response is valid JSON format.
 
     def analyze_paper(self, 
                      markdown_file: Path, 
-                     tei_file: Optional[Path] = None) -> PaperAnalysis:
+                     tei_file: Optional[Path] = None,
+                     tei_tree=None) -> PaperAnalysis:
         """Analyze a paper from markdown content and optional TEI file.
         
         Args:
             markdown_file: Path to the markdown file with paper content
             tei_file: Optional path to TEI XML file for structured references
+            tei_tree: Optional tree already parsed from ``tei_file``; used
+                instead of reading the file again
             
         Returns:
             PaperAnalysis object with results
         """
-        logger.info(f"Analyzing paper: {markdown_file.name}")
-        
-        # Read markdown content
-        if not markdown_file.exists():
-            raise FileNotFoundError(f"Markdown file not found: {markdown_file}")
+        logger.debug(f"Analyzing paper: {markdown_file.name}")
         
-        with open(markdown_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Read markdown content; the title and prompt only need the start of the paper
+        try:
+            with open(markdown_file, 'r', encoding='utf-8') as f:
+                content = f.read(self.CONTENT_READ_CHARS)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Markdown file not found: {markdown_file}") from None
+        complete = len(content) < self.CONTENT_READ_CHARS
         
         # Extract paper title from markdown
-        title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+        title_match = _TITLE_RE.search(content)
         paper_title = title_match.group(1) if title_match else markdown_file.stem
-        logger.info(f"Paper title: {paper_title}")
+        logger.info(f"Analyzing paper: {paper_title}")
         
         # Extract references
         references = []
         
+        prompt_content = self._truncate_content(content)
+        
         # Try TEI first if available
-        if tei_file and tei_file.exists():
-            logger.info(f"Extracting references from TEI: {tei_file.name}")
+        # A missing TEI file is found by the parse itself rather than an extra stat
+        if tei_tree is not None or tei_file:
+            logger.debug(f"Extracting references from TEI: {tei_file.name if tei_file else 'parsed tree'}")
             try:
-                references = self.extract_references_from_tei(tei_file)
-                logger.info(f"Found {len(references)} references from TEI")
+                # Only references cited in the content sent to the LLM are listed
+                references = self.extract_references_from_tei(tei_tree if tei_tree is not None else tei_file,
+                                                              cited_in=prompt_content)
+                logger.debug(f"Found {len(references)} references from TEI")
             except Exception as e:
                 logger.warning(f"Failed to extract references from TEI: {e}")
         
         # Fallback to markdown extraction if no TEI references found
         if not references:
-            logger.info("Extracting references from markdown content")
+            logger.debug("Extracting references from markdown content")
             try:
-                references = self.extract_references_from_markdown(content)
-                logger.info(f"Found {len(references)} reference patterns from markdown")
+                # Citations are spread over the whole paper, so read the rest now
+                full_content = content if complete else markdown_file.read_text(encoding='utf-8')
+                references = self.extract_references_from_markdown(full_content)
+                logger.debug(f"Found {len(references)} reference patterns from markdown")
             except Exception as e:
                 logger.warning(f"Failed to extract references from markdown: {e}")
         
         # Create analysis prompt
-        prompt = self.create_analysis_prompt(content, references, paper_title)
+        prompt = self.create_analysis_prompt(prompt_content, references, paper_title)
         
         # Call LLM for analysis
-        logger.info("Analyzing paper with LLM...")
+        logger.debug("Analyzing paper with LLM...")
         try:
             response = self.call_llm(prompt)
             
             # Parse JSON response with enhanced error handling
             analysis_data = self._parse_llm_response(response)
             
-            logger.info("Successfully parsed LLM response")
+            logger.debug("Successfully parsed LLM response")
             return PaperAnalysis(
                 paper_title=analysis_data.get('paper_title', paper_title),
                 relevant_papers=analysis_data.get('relevant_papers', []),
@@ -425,6 +710,39 @@ Please ensure the response is valid JSON format.
             logger.error(f"Analysis failed: {e}")
             raise RuntimeError(f"Analysis failed: {e}")
     
+    def analyze_papers(self,
+                       items: Iterable[Tuple[Path, Optional[Path]]],
+                       max_workers: int = 4) -> List[Optional[PaperAnalysis]]:
+        """Analyze several papers with up to ``max_workers`` LLM calls in flight.
+        
+        Each paper is still one prompt, so results match ``analyze_paper``;
+        running the requests concurrently hides the per-call latency that
+        otherwise serializes a corpus run.
+        
+        Args:
+            items: (markdown_file, tei_file) pairs; tei_file may be None
+            max_workers: Maximum number of concurrent LLM requests
+            
+        Returns:
+            One PaperAnalysis per item in input order, or None where the
+            analysis failed (the error is logged)
+        """
+        items = list(items)
+        results: List[Optional[PaperAnalysis]] = [None] * len(items)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self.analyze_paper, markdown_file, tei_file): i
+                for i, (markdown_file, tei_file) in enumerate(items)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to analyze {items[i][0]}: {e}")
+        
+        return results
+    
     def save_analysis(self, analysis: PaperAnalysis, output_file: Path):
         """Save analysis results to a file.
         
@@ -442,8 +760,7 @@ Please ensure the response is valid JSON format.
             'methodology_insights': analysis.methodology_insights
         }
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        Path(output_file).write_bytes(_dump_json(output_data))
         
         logger.info(f"Analysis saved to: {output_file}")
     
@@ -453,28 +770,30 @@ Please ensure the response is valid JSON format.
         Args:
             analysis: PaperAnalysis object
         """
-        print("\n" + "="*80)
-        print(f"📄 PAPER ANALYSIS: {analysis.paper_title}")
-        print("="*80)
-        
-        print("\n🔗 TOP 3 RELEVANT PAPERS:")
+        # Build the whole report first so it is written to stdout in one call
+        lines = [
+            "\n" + "="*80,
+            f"📄 PAPER ANALYSIS: {analysis.paper_title}",
+            "="*80,
+        ]
+        
+        lines.append("\n🔗 TOP 3 RELEVANT PAPERS:")
         for i, paper in enumerate(analysis.relevant_papers, 1):
-            print(f"\n{i}. {paper.get('reference', 'N/A')}")
-            print(f"   Relevance: {paper.get('relevance_score', 'N/A')}")
-            print(f"   Reasoning: {paper.get('similarity_reasoning', 'N/A')}")
+            lines.append(f"\n{i}. {paper.get('reference', 'N/A')}")
+            lines.append(f"   Relevance: {paper.get('relevance_score', 'N/A')}")
+            lines.append(f"   Reasoning: {paper.get('similarity_reasoning', 'N/A')}")
         
-        print("\n🏛️ HERITAGE ANALYSIS:")
-        print(analysis.heritage_analysis)
+        lines.append("\n🏛️ HERITAGE ANALYSIS:")
+        lines.append(analysis.heritage_analysis)
         
-        print("\n💡 KEY CONTRIBUTIONS:")
-        for i, contribution in enumerate(analysis.key_contributions, 1):
-            print(f"{i}. {contribution}")
+        lines.append("\n💡 KEY CONTRIBUTIONS:")
+        lines.extend(f"{i}. {contribution}" for i, contribution in enumerate(analysis.key_contributions, 1))
         
-        print("\n🔍 RESEARCH GAPS ADDRESSED:")
-        for i, gap in enumerate(analysis.research_gaps, 1):
-            print(f"{i}. {gap}")
+        lines.append("\n🔍 RESEARCH GAPS ADDRESSED:")
+        lines.extend(f"{i}. {gap}" for i, gap in enumerate(analysis.research_gaps, 1))
         
-        print("\n🔬 METHODOLOGY INSIGHTS:")
-        print(analysis.methodology_insights)
+        lines.append("\n🔬 METHODOLOGY INSIGHTS:")
+        lines.append(analysis.methodology_insights)
         
-        print("\n" + "="*80)
+        lines.append("\n" + "="*80)
+        print("\n".join(lines))
@@ -5,50 +5,281 @@ This module provides functionality to process PDF files using GROBID
 to extract structured text in TEI format with PDF coordinates.
 """
 
+import functools
+import hashlib
 import json
 import logging
+import os
+import random
+import shutil
+import threading
+import time
 import requests
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from grobid_client.grobid_client import GrobidClient
 
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+except ImportError:  # Optional: fall back to requests' in-memory multipart body
+    MultipartEncoder = None
+
 logger = logging.getLogger(__name__)
 
+# Suffix of the sidecar file recording the PDF digest a TEI file was built from
+TEI_HASH_SUFFIX = ".hash"
+
+
+@functools.lru_cache(maxsize=8)
+def _shared_grobid_client(grobid_server, coordinates, sleep_time, timeout, queue_size):
+    """
+    Return one GrobidClient per in-memory configuration
+    
+    Constructing a client probes the server over a fresh connection, so
+    processors with the same settings share a client instead. Failed
+    constructions raise and are not cached.
+    """
+    return GrobidClient(
+        grobid_server=grobid_server,
+        queue_size=queue_size,
+        coordinates=list(coordinates),
+        sleep_time=sleep_time,
+        timeout=timeout
+    )
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    Return the SHA-256 hex digest of a file's content
+    
+    The file is read in chunks so large PDFs are never held in memory
+    (hashlib.file_digest is only available from Python 3.11).
+    
+    Raises:
+        OSError: If the file cannot be read
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(functools.partial(f.read, chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Open a binary file that replaces ``path`` only once it is fully written
+    
+    Data goes to a hidden temp file in the same directory, which is moved into
+    place with os.replace() on success and removed on failure, so readers
+    never see a truncated file.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def tei_is_current(pdf_path, tei_file):
+    """
+    Return whether a TEI file was generated from the PDF's current content
+    
+    Compares the PDF's SHA-256 with the digest recorded by write_tei_hash()
+    in the TEI file's ``TEI_HASH_SUFFIX`` sidecar. Missing or unreadable
+    files count as out of date. The sidecar is only trusted because TEI
+    files are written with atomic_write(), so a failed conversion leaves
+    the previous TEI intact rather than truncated.
+    """
+    tei_file = Path(tei_file)
+    try:
+        if not tei_file.is_file():
+            return False
+        recorded = tei_file.with_name(tei_file.name + TEI_HASH_SUFFIX).read_text(encoding='utf-8')
+        return recorded.strip() == file_sha256(pdf_path)
+    except OSError:
+        return False
+
+
+def write_tei_hash(pdf_path, tei_file):
+    """Record the digest of the PDF a TEI file was generated from, for tei_is_current()"""
+    tei_file = Path(tei_file)
+    hash_file = tei_file.with_name(tei_file.name + TEI_HASH_SUFFIX)
+    try:
+        digest = file_sha256(pdf_path)
+        with atomic_write(hash_file) as f:
+            f.write(digest.encode('utf-8'))
+    except OSError as e:
+        logger.warning(f"Could not write TEI hash {hash_file}: {e}")
+
+
+def find_tei_output(output_dir, pdf_stem=None):
+    """
+    Locate a TEI file written by GROBID in a directory
+    
+    The file name used by ``GrobidProcessor`` is checked first; the directory
+    is only scanned (with ``os.scandir``) when that file is missing.
+    
+    Args:
+        output_dir: Directory containing GROBID output
+        pdf_stem: Stem of the source PDF, if known
+        
+    Returns:
+        Path to the TEI file, or None if the directory contains none
+    """
+    output_dir = Path(output_dir)
+    if pdf_stem is not None:
+        expected = output_dir / f"{pdf_stem}.grobid.tei.xml"
+        if expected.is_file():
+            return expected
+    
+    try:
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tei.xml") and entry.is_file():
+                    return Path(entry.path)
+    except FileNotFoundError:
+        pass
+    return None
+
 
 class GrobidProcessor:
     """GROBID processor for converting PDF files to TEI XML."""
     
-    def __init__(self, config_path=None, server_url="http://localhost:8070"):
+    # Seconds a successful /api/isalive probe is trusted before re-checking
+    ALIVE_CACHE_TTL = 30.0
+    
+    # Default bytes read per chunk when streaming TEI responses to disk
+    STREAM_CHUNK_SIZE = 1 << 16
+    
+    # Bytes of an error response body included in exception messages
+    ERROR_BODY_LIMIT = 512
+    
+    # PDFs queued per directory worker ahead of submission
+    SUBMIT_BACKLOG = 2
+    
+    # Output-directory file mapping processing options -> PDF SHA-256 -> TEI file name
+    MANIFEST_NAME = ".tei_manifest.json"
+    
+    # Seconds to wait for the TCP connection; the configured timeout then
+    # bounds each read, which can take minutes on large PDFs
+    CONNECT_TIMEOUT = 5.0
+    
+    # (connect, read) timeout of the isalive probe
+    ALIVE_TIMEOUT = (1.0, 2.0)
+    
+    # Consecutive server failures that open the circuit, and the seconds
+    # requests then fail fast before the server is probed again
+    CIRCUIT_FAIL_MAX = 3
+    CIRCUIT_RESET_TIMEOUT = 30.0
+    
+    # Responses that mean the server (or its proxy) is down rather than the PDF being bad
+    CIRCUIT_FAILURE_STATUSES = frozenset({502, 503, 504})
+    
+    # Transient overload responses retried per PDF: total attempts, and the
+    # maximum seconds of backoff between them (the base is ``sleep_time``)
+    RETRY_STATUSES = frozenset({503, 504})
+    RETRY_ATTEMPTS = 4
+    RETRY_BACKOFF_MAX = 8.0
+    
+    def __init__(self, config_path=None, server_url="http://localhost:8070", pool_size=32,
+                 stream_chunk_size=STREAM_CHUNK_SIZE, batch_size=64, sleep_time=2):
         """
         Initialize GROBID processor
         
         Args:
             config_path: Path to GROBID config file
             server_url: GROBID server URL
+            pool_size: Number of keep-alive connections kept open to the server;
+                should be at least the number of concurrent requests
+            stream_chunk_size: Bytes read per chunk when writing TEI responses
+                to disk; bounds memory per in-flight request
+            batch_size: Maximum number of PDFs queued or in flight at once in
+                directory mode (also the GrobidClient's ``queue_size``); small
+                batches keep memory and the wait for the first results low
+            sleep_time: Base seconds to wait before retrying a PDF the server
+                reported as busy, when it sends no ``Retry-After``; raise both
+                for throughput-oriented runs
         """
+        self.config = {
+            "grobid_server": server_url,
+            "batch_size": batch_size,
+            "sleep_time": sleep_time,
+            "timeout": 120,   # Increased timeout to 2 minutes
+            "coordinates": ["persName", "figure", "ref", "biblStruct", "formula", "s"]
+        }
+        
         if config_path is None:
-            # Create default config
-            self.config = {
-                "grobid_server": server_url,
-                "batch_size": 1000,
-                "sleep_time": 10,  # Increased wait time
-                "timeout": 120,   # Increased timeout to 2 minutes
-                "coordinates": ["persName", "figure", "ref", "biblStruct", "formula", "s"]
-            }
-            config_path = self._create_temp_config()
-        
-        self.client = GrobidClient(config_path=config_path)
+            # Configure the client in memory instead of writing a temp config file
+            self.client = _shared_grobid_client(
+                self.config["grobid_server"],
+                tuple(self.config["coordinates"]),
+                self.config["sleep_time"],
+                self.config["timeout"],
+                self.config["batch_size"]
+            )
+        else:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                self.config.update(json.load(f))
+            self.client = GrobidClient(config_path=config_path)
+        
         self.config_path = config_path
+        self.pool_size = max(1, pool_size)
+        self.stream_chunk_size = max(1, stream_chunk_size)
+        self.session = self._create_session()
+        self._alive_checked_at = None
+        
+        # Form fields per option combination; options rarely change within a batch
+        self._coordinates_param = ','.join(self.config['coordinates'])
+        self._request_data_cache = {}
+        
+        # Circuit breaker state, shared by the directory-mode worker threads
+        self._circuit_lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._circuit_opened_at = None
+    
+    def _create_session(self):
+        """Create a keep-alive HTTP session shared by all GROBID requests"""
+        session = requests.Session()
+        self._mount_adapter(session)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+    
+    def _mount_adapter(self, session):
+        """Mount a retrying adapter holding ``pool_size`` connections per host"""
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.5)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
     
-    def _create_temp_config(self):
-        """Create temporary config file"""
-        config_path = "/tmp/grobid_config.json"
-        with open(config_path, 'w') as f:
-            json.dump(self.config, f, indent=2)
-        return config_path
+    def close(self):
+        """Close the underlying HTTP session and its pooled connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def process_pdf(self, pdf_path, output_path=None, add_coordinates=True, 
                    consolidate_header=False, consolidate_citations=False,
-                   generate_ids=False, segment_sentences=False, n_workers=10):
+                   generate_ids=False, segment_sentences=False, n_workers=10,
+                   deduplicate=False):
         """
         Process a single PDF or directory of PDFs with GROBID
         
@@ -61,19 +292,24 @@ class GrobidProcessor:
             generate_ids: Generate random xml:id for textual elements
             segment_sentences: Segment sentences with <s> elements
             n_workers: Number of concurrent workers
+            deduplicate: In directory mode, reuse the TEI of a PDF with identical
+                content and options instead of sending it to GROBID again. PDF
+                digests are kept in a hidden ``MANIFEST_NAME`` file in the
+                output directory.
             
         Returns:
-            Path to output file or directory
+            Path to output file, or list of output files when processing a directory
         """
         
-        # Validate inputs
+        # Validate inputs; the file type is looked up once and reused below
         pdf_path = Path(pdf_path)
-        if not pdf_path.exists():
+        is_file = pdf_path.is_file()
+        if not is_file and not pdf_path.is_dir():
             raise FileNotFoundError(f"PDF path does not exist: {pdf_path}")
         
         # Set output path
         if output_path is None:
-            if pdf_path.is_file():
+            if is_file:
                 output_path = pdf_path.parent / f"{pdf_path.stem}.grobid.tei.xml"
             else:
                 output_path = pdf_path / "grobid_output"
@@ -81,87 +317,344 @@ class GrobidProcessor:
             output_path = Path(output_path)
         
         # Create output directory if needed
-        if pdf_path.is_dir() or not output_path.suffix:
+        if not is_file or not output_path.suffix:
             output_path.mkdir(exist_ok=True, parents=True)
         else:
             output_path.parent.mkdir(exist_ok=True, parents=True)
         
         logger.info(f"Processing PDF(s): {pdf_path}")
-        logger.info(f"Output: {output_path}")
-        logger.info(f"GROBID server: {self.config['grobid_server']}")
+        logger.debug(f"Output: {output_path}")
+        logger.debug(f"GROBID server: {self.config['grobid_server']}")
         
         try:
             # Use direct HTTP request instead of grobid_client since it's not working properly
-            if pdf_path.is_file():
+            if is_file:
                 return self._process_single_pdf_direct(pdf_path, output_path, add_coordinates,
                                                      consolidate_header, consolidate_citations,
                                                      generate_ids, segment_sentences)
             else:
-                # Handle directory processing
-                raise NotImplementedError("Directory processing not yet implemented with direct HTTP method")
+                return self._process_directory_direct(pdf_path, output_path, n_workers, add_coordinates,
+                                                     consolidate_header, consolidate_citations,
+                                                     generate_ids, segment_sentences,
+                                                     deduplicate=deduplicate)
             
         except Exception as e:
             logger.error(f"Error processing PDF: {e}")
             raise
     
+    def _process_directory_direct(self, pdf_dir, output_dir, n_workers=10, *options, deduplicate=False):
+        """Process all PDFs in a directory concurrently using direct HTTP requests
+        
+        Requests share the keep-alive session, so up to ``n_workers`` PDFs are
+        in flight at once. The directory is read lazily and at most
+        ``n_workers * SUBMIT_BACKLOG`` PDFs, and never more than the configured
+        ``batch_size``, are queued or in flight, so memory does not grow with
+        the directory size. Failures are logged per
+        file and do not abort the remaining PDFs.
+        
+        With ``deduplicate``, each PDF is hashed first and looked up in the
+        ``MANIFEST_NAME`` manifest of the output directory; a PDF whose content
+        was already converted with the same options gets a copy of that TEI.
+        Writing a TEI file drops every other digest listed for that file, so
+        the manifest never points at a TEI rewritten from different content.
+        
+        Returns:
+            List of output TEI files, in input file order
+        """
+        n_workers = max(1, n_workers)
+        if n_workers > self.pool_size:
+            # The session may be shared, so its pool is not resized here
+            logger.warning(f"{n_workers} workers exceed the {self.pool_size} pooled GROBID "
+                           f"connections; surplus connections will be reopened per request. "
+                           f"Create the processor with a larger pool_size.")
+        max_pending = max(1, min(n_workers * self.SUBMIT_BACKLOG, int(self.config["batch_size"])))
+        
+        process = self._process_single_pdf_direct
+        manifest = None
+        if deduplicate:
+            manifest = self._load_manifest(output_dir)
+            options_key = urlencode(sorted(self._request_data(*options).items()))
+            entries = manifest.setdefault(options_key, {})
+            entries_lock = threading.Lock()
+            process = functools.partial(self._process_deduplicated, entries, entries_lock)
+        
+        output_files = {}
+        pending = {}
+        found = 0
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for pdf_file in self._iter_directory_pdfs(pdf_dir):
+                if len(pending) >= max_pending:
+                    # Wait for a worker to free a slot before reading further
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect_results(done, pending, output_files)
+                pending[executor.submit(process, pdf_file, output_dir, *options)] = pdf_file
+                found += 1
+            self._collect_results(as_completed(list(pending)), pending, output_files)
+        
+        if manifest is not None:
+            self._save_manifest(output_dir, manifest)
+        
+        logger.info(f"Processed {len(output_files)}/{found} PDF files in {pdf_dir}")
+        return [output_files[pdf_file] for pdf_file in sorted(output_files)]
+    
+    def _process_deduplicated(self, entries, entries_lock, pdf_path, output_dir, *options):
+        """Convert a PDF unless a TEI for identical content is listed in ``entries``"""
+        digest = file_sha256(pdf_path)
+        
+        with entries_lock:
+            known = entries.get(digest)
+        if known is not None:
+            source = output_dir / known
+            if source.is_file():
+                output_file = output_dir / f"{pdf_path.stem}.grobid.tei.xml"
+                if source != output_file:
+                    with open(source, 'rb') as src, atomic_write(output_file) as dst:
+                        shutil.copyfileobj(src, dst)
+                    with entries_lock:
+                        self._forget_tei(entries, output_file.name)
+                logger.debug(f"Reusing TEI {known} for duplicate {pdf_path.name}")
+                return output_file
+        
+        output_file = self._process_single_pdf_direct(pdf_path, output_dir, *options)
+        with entries_lock:
+            self._forget_tei(entries, Path(output_file).name)
+            entries[digest] = Path(output_file).name
+        return output_file
+    
+    @staticmethod
+    def _forget_tei(entries, tei_name):
+        """Drop the manifest entries of a TEI file that is being rewritten"""
+        for digest in [digest for digest, name in entries.items() if name == tei_name]:
+            del entries[digest]
+    
+    def _load_manifest(self, output_dir):
+        """Return the dedup manifest of an output directory, or an empty one"""
+        try:
+            with open(Path(output_dir) / self.MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+    
+    def _save_manifest(self, output_dir, manifest):
+        """Atomically replace the dedup manifest of an output directory"""
+        path = Path(output_dir) / self.MANIFEST_NAME
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save TEI manifest {path}: {e}")
+    
+    @staticmethod
+    def _iter_directory_pdfs(pdf_dir):
+        """Yield the PDF files of a directory as it is read; DirEntry caches the file type"""
+        with os.scandir(pdf_dir) as entries:
+            for entry in entries:
+                if entry.name.casefold().endswith(".pdf") and entry.is_file():
+                    yield Path(entry.path)
+    
+    @staticmethod
+    def _collect_results(futures, pending, output_files):
+        """Move finished futures out of ``pending``, logging any failures"""
+        for future in futures:
+            pdf_file = pending.pop(future)
+            try:
+                output_files[pdf_file] = future.result()
+            except Exception as e:
+                logger.error(f"Error processing {pdf_file}: {e}")
+    
     def _process_single_pdf_direct(self, pdf_path, output_path, add_coordinates=True,
                                   consolidate_header=False, consolidate_citations=False,
                                   generate_ids=False, segment_sentences=False):
         """Process a single PDF using direct HTTP requests to GROBID"""
         
-        # Prepare coordinates parameter
-        coordinates = ','.join(self.config['coordinates']) if add_coordinates else ''
-        
-        # Prepare request data
-        data = {}
-        if coordinates:
-            data['teiCoordinates'] = coordinates
-        if consolidate_header:
-            data['consolidateHeader'] = '1'
-        if consolidate_citations:
-            data['consolidateCitations'] = '1'
-        if generate_ids:
-            data['generateIDs'] = '1'
-        if segment_sentences:
-            data['segmentSentences'] = '1'
+        data = self._request_data(add_coordinates, consolidate_header, consolidate_citations,
+                                  generate_ids, segment_sentences)
         
         # Make request to GROBID server
         url = f"{self.config['grobid_server']}/api/processFulltextDocument"
         
+        response = self._post_pdf_with_retry(url, pdf_path, data)
+        
+        with response:
+            if response.status_code != 200:
+                # Only read and decode the start of what may be a large HTML error page
+                body = next(response.iter_content(chunk_size=self.ERROR_BODY_LIMIT), b'')
+                body = body[:self.ERROR_BODY_LIMIT].decode('utf-8', errors='replace')
+                raise RuntimeError(f"GROBID server error: {response.status_code} - {body}")
+            
+            # Determine output file path
+            if output_path.is_dir():
+                # Save to directory with generated filename
+                output_file = output_path / f"{pdf_path.stem}.grobid.tei.xml"
+            else:
+                # Use specified output path
+                output_file = output_path
+            
+            # Stream the TEI to disk instead of holding the whole body in memory;
+            # an interrupted download never replaces an existing TEI
+            with atomic_write(output_file) as f:
+                for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+                    f.write(chunk)
+        
+        # Per-file detail; callers report the overall result
+        logger.debug(f"TEI file saved to: {output_file}")
+        
+        return output_file
+    
+    def _request_data(self, add_coordinates=True, consolidate_header=False, consolidate_citations=False,
+                      generate_ids=False, segment_sentences=False):
+        """Return the (shared, read-only) form fields for a set of processing options"""
+        key = (add_coordinates, consolidate_header, consolidate_citations,
+               generate_ids, segment_sentences)
+        data = self._request_data_cache.get(key)
+        if data is None:
+            data = {}
+            if add_coordinates and self._coordinates_param:
+                data['teiCoordinates'] = self._coordinates_param
+            if consolidate_header:
+                data['consolidateHeader'] = '1'
+            if consolidate_citations:
+                data['consolidateCitations'] = '1'
+            if generate_ids:
+                data['generateIDs'] = '1'
+            if segment_sentences:
+                data['segmentSentences'] = '1'
+            self._request_data_cache[key] = data
+        return data
+    
+    def _post_pdf(self, url, pdf_path, data):
+        """Upload a PDF to GROBID, returning the streamed response"""
+        timeout = (self.CONNECT_TIMEOUT, self.config['timeout'])
         with open(pdf_path, 'rb') as f:
-            files = {'input': f}
-            response = requests.post(url, files=files, data=data, timeout=self.config['timeout'])
+            upload = (pdf_path.name, f, 'application/pdf')
+            if MultipartEncoder is not None:
+                # Stream the multipart body from disk instead of buffering the whole PDF
+                encoder = MultipartEncoder(fields={**data, 'input': upload})
+                return self.session.post(url, data=encoder,
+                                         headers={'Content-Type': encoder.content_type},
+                                         timeout=timeout, stream=True)
+            
+            # requests builds the multipart body in memory
+            return self.session.post(url, files={'input': upload}, data=data,
+                                     timeout=timeout, stream=True)
+    
+    def _post_pdf_with_retry(self, url, pdf_path, data):
+        """Upload a PDF, retrying while GROBID reports it is temporarily overloaded
         
-        if response.status_code != 200:
-            raise RuntimeError(f"GROBID server error: {response.status_code} - {response.text}")
+        A 503/504 is retried up to ``RETRY_ATTEMPTS`` times in total with
+        jittered exponential backoff from the configured ``sleep_time``, or
+        after the server's ``Retry-After``.
+        Only the final outcome counts towards the circuit breaker, so a burst
+        of transient overloads across workers does not open it. Retries stop
+        early if the circuit has been opened meanwhile; the last response is
+        then returned for the caller to report.
+        """
+        self._check_circuit()
+        for attempt in range(1, self.RETRY_ATTEMPTS + 1):
+            try:
+                response = self._post_pdf(url, pdf_path, data)
+            except requests.RequestException:
+                self._record_outcome(failed=True)
+                raise
+            
+            if (response.status_code not in self.RETRY_STATUSES
+                    or attempt == self.RETRY_ATTEMPTS or self._circuit_opened_at is not None):
+                self._record_outcome(failed=response.status_code in self.CIRCUIT_FAILURE_STATUSES)
+                return response
+            
+            delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+            response.close()
+            logger.debug(f"GROBID returned {response.status_code} for {pdf_path.name}, "
+                         f"retry {attempt}/{self.RETRY_ATTEMPTS - 1} in {delay:.1f}s")
+            time.sleep(delay)
+    
+    def _retry_delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry ``attempt``
         
-        # Determine output file path
-        if output_path.is_dir():
-            # Save to directory with generated filename
-            output_file = output_path / f"{pdf_path.stem}.grobid.tei.xml"
-        else:
-            # Use specified output path
-            output_file = output_path
+        Capped at ``RETRY_BACKOFF_MAX``, or at ``sleep_time`` when that is larger.
+        """
+        backoff = float(self.config["sleep_time"])
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            # Missing, or an HTTP date; fall back to exponential backoff with jitter
+            delay = backoff * 2 ** (attempt - 1) + random.uniform(0, backoff)
+        return min(max(delay, 0.0), max(self.RETRY_BACKOFF_MAX, backoff))
+    
+    def _check_circuit(self):
+        """Fail fast while the circuit is open
         
-        # Save response content
-        with open(output_file, 'wb') as f:
-            f.write(response.content)
+        After ``CIRCUIT_FAIL_MAX`` consecutive server failures no request is
+        sent for ``CIRCUIT_RESET_TIMEOUT`` seconds. The first caller after
+        that probes ``/api/isalive``; if the server answers, one trial request
+        is let through and another failure reopens the circuit.
+        """
+        with self._circuit_lock:
+            if self._circuit_opened_at is None:
+                return
+            if time.monotonic() - self._circuit_opened_at < self.CIRCUIT_RESET_TIMEOUT:
+                raise RuntimeError("GROBID circuit open: server failed repeatedly, request not sent")
+            # Half-open: keep failing fast for other callers while this one probes
+            self._circuit_opened_at = time.monotonic()
         
-        logger.info(f"TEI file saved to: {output_file}")
-        logger.info("Processing completed successfully!")
+        if not self.check_server_status(force=True):
+            raise RuntimeError("GROBID circuit open: server is still unreachable")
         
-        return output_file
+        with self._circuit_lock:
+            self._circuit_opened_at = None
+            self._consecutive_failures = self.CIRCUIT_FAIL_MAX - 1
+        logger.info("GROBID server is reachable again, closing circuit")
+    
+    def _record_outcome(self, failed):
+        """Update the circuit breaker after a request to the server"""
+        with self._circuit_lock:
+            if not failed:
+                self._consecutive_failures = 0
+                return
+            
+            # The server misbehaved; the next status check must probe it again
+            self._alive_checked_at = None
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.CIRCUIT_FAIL_MAX and self._circuit_opened_at is None:
+                self._circuit_opened_at = time.monotonic()
+                logger.error(f"GROBID failed {self._consecutive_failures} times in a row, "
+                             f"failing fast for {self.CIRCUIT_RESET_TIMEOUT:.0f}s")
     
-    def check_server_status(self):
-        """Check if GROBID server is running"""
+    def check_server_status(self, force=False):
+        """Check if GROBID server is running
+        
+        A successful probe is cached for ``ALIVE_CACHE_TTL`` seconds so batch
+        runs do not pay an extra round-trip per PDF. Failures are not cached,
+        and a failed conversion request drops the cached success.
+        The probe is a HEAD request on the keep-alive session, so no body is
+        transferred and the connection stays pooled for the next upload.
+        
+        Args:
+            force: Probe the server even if a recent probe succeeded
+        """
+        now = time.monotonic()
+        if (not force and self._alive_checked_at is not None
+                and now - self._alive_checked_at < self.ALIVE_CACHE_TTL):
+            return True
+        
+        url = f"{self.config['grobid_server']}/api/isalive"
         try:
-            response = requests.get(f"{self.config['grobid_server']}/api/isalive")
+            response = self.session.head(url, timeout=self.ALIVE_TIMEOUT)
+            if response.status_code == 405:
+                # Server (or a proxy in front of it) only allows GET
+                response = self.session.get(url, timeout=self.ALIVE_TIMEOUT)
             if response.status_code == 200:
                 logger.info(f"GROBID server is running at {self.config['grobid_server']}")
+                self._alive_checked_at = now
                 return True
             else:
                 logger.error(f"GROBID server responded with status {response.status_code}")
+                self._alive_checked_at = None
                 return False
         except Exception as e:
             logger.error(f"Cannot connect to GROBID server: {e}")
+            self._alive_checked_at = None
             return False
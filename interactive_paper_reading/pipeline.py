@@ -6,11 +6,14 @@ processing of academic papers through GROBID, TEI extraction, and LLM analysis.
 """
 
 import logging
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed, wait)
+from contextlib import ExitStack
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
-from .grobid import GrobidProcessor
-from .tei import TEIProcessor
+from .grobid import GrobidProcessor, find_tei_output, tei_is_current, write_tei_hash
+from .tei import IMAGE_SUFFIXES, TEIDocument, TEIProcessor, pool_context
 from .analyzer import PaperAnalyzer
 
 logger = logging.getLogger(__name__)
@@ -24,7 +27,14 @@ class PaperProcessingPipeline:
                  analyze_with_llm: bool = False,
                  llm_endpoint: Optional[str] = None,
                  llm_model: Optional[str] = None,
-                 llm_token: Optional[str] = None):
+                 llm_token: Optional[str] = None,
+                 crop_workers: int = 1,
+                 grobid_connections: int = 32,
+                 force: bool = False,
+                 cache_extractions: bool = False,
+                 image_format: str = 'png',
+                 llm_cache_dir: Optional[Path] = None,
+                 dpi: int = TEIProcessor.DEFAULT_DPI):
         """Initialize the processing pipeline.
         
         Args:
@@ -33,9 +43,74 @@ class PaperProcessingPipeline:
             llm_endpoint: LLM API endpoint
             llm_model: LLM model name
             llm_token: LLM API token
+            crop_workers: Number of processes used to crop figures/graphics
+                from each paper (1 crops sequentially)
+            grobid_connections: Size of the keep-alive connection pool to
+                GROBID; should cover process_batch()'s ``max_workers``
+            force: Re-run GROBID even when a TEI file built from the same PDF
+                content already exists in the output directory
+            cache_extractions: Cache TEI sections/figures/graphics on disk so
+                re-runs over unchanged TEI files skip parsing
+            image_format: Format of cropped figures, 'png' (lossless) or
+                'jpeg' (much cheaper to encode, for previews)
+            llm_cache_dir: Directory caching LLM responses by model and prompt;
+                None always calls the LLM
+            dpi: Resolution of cropped figures and graphics
         """
-        self.grobid_processor = GrobidProcessor(server_url=grobid_url)
-        self.tei_processor = TEIProcessor()
+        self.grobid_processor = GrobidProcessor(server_url=grobid_url, pool_size=grobid_connections)
+        self.force = force
+        self._init_extraction(analyze_with_llm, llm_endpoint, llm_model, llm_token, crop_workers,
+                              cache_extractions, image_format, llm_cache_dir, dpi)
+    
+    def close(self) -> None:
+        """Release the GROBID and LLM connection pools."""
+        if self.grobid_processor is not None:
+            self.grobid_processor.close()
+        if self.analyze_with_llm:
+            self.paper_analyzer.close()
+    
+    def __enter__(self) -> 'PaperProcessingPipeline':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    @classmethod
+    def _for_extraction(cls, **settings) -> 'PaperProcessingPipeline':
+        """Build a pipeline that only runs steps 2-5, without a GROBID client.
+        
+        Used by process_batch() extraction workers, which receive TEI files
+        that were already produced by the parent process.
+        """
+        pipeline = cls.__new__(cls)
+        pipeline.grobid_processor = None
+        pipeline._init_extraction(**settings)
+        return pipeline
+    
+    def _init_extraction(self,
+                         analyze_with_llm: bool = False,
+                         llm_endpoint: Optional[str] = None,
+                         llm_model: Optional[str] = None,
+                         llm_token: Optional[str] = None,
+                         crop_workers: int = 1,
+                         cache_extractions: bool = False,
+                         image_format: str = 'png',
+                         llm_cache_dir: Optional[Path] = None,
+                         dpi: int = TEIProcessor.DEFAULT_DPI) -> None:
+        """Set up TEI extraction, cropping and the optional LLM analyzer."""
+        if image_format not in IMAGE_SUFFIXES:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        self.image_format = image_format
+        self.dpi = dpi
+        self.tei_processor = TEIProcessor(cache_extractions=cache_extractions, dpi=dpi)
+        self.crop_workers = crop_workers
+        self.cache_extractions = cache_extractions
+        self._llm_settings = {
+            'llm_endpoint': llm_endpoint,
+            'llm_model': llm_model,
+            'llm_token': llm_token,
+            'llm_cache_dir': llm_cache_dir
+        }
         
         self.analyze_with_llm = analyze_with_llm
         if analyze_with_llm:
@@ -43,7 +118,8 @@ class PaperProcessingPipeline:
                 self.paper_analyzer = PaperAnalyzer(
                     openai_endpoint=llm_endpoint,
                     openai_model=llm_model,
-                    openai_token=llm_token
+                    openai_token=llm_token,
+                    cache_dir=llm_cache_dir
                 )
                 logger.info("LLM analyzer initialized successfully")
             except Exception as e:
@@ -66,9 +142,35 @@ class PaperProcessingPipeline:
         Returns:
             Dictionary with processing results and file paths
         """
-        logger.info(f"Processing paper: {pdf_path.name}")
+        results = self._new_results(pdf_path)
+        
+        try:
+            tei_file = self._convert_pdf_to_tei(pdf_path, output_dir, results)
+            if tei_file is not None:
+                self._extract_content(pdf_path, tei_file, output_dir, results,
+                                      extract_figures, extract_graphics)
+        except Exception as e:
+            error_msg = f"Unexpected error processing {pdf_path.name}: {e}"
+            logger.error(error_msg)
+            results['errors'].append(error_msg)
         
-        results = {
+        return results
+    
+    def _extraction_settings(self) -> dict:
+        """Settings for rebuilding the extraction side of this pipeline in a worker."""
+        return {
+            'analyze_with_llm': self.analyze_with_llm,
+            **self._llm_settings,
+            # Papers are already spread over processes; don't nest crop pools
+            'crop_workers': 1,
+            'cache_extractions': self.cache_extractions,
+            'image_format': self.image_format,
+            'dpi': self.dpi
+        }
+    
+    def _new_results(self, pdf_path: Path) -> dict:
+        """Create an empty results record for a paper."""
+        return {
             'pdf_path': pdf_path,
             'success': False,
             'tei_file': None,
@@ -78,176 +180,335 @@ class PaperProcessingPipeline:
             'analysis_file': None,
             'errors': []
         }
+    
+    def _convert_pdf_to_tei(self, pdf_path: Path, output_dir: Path, results: dict) -> Optional[Path]:
+        """Run step 1 (PDF to TEI XML with GROBID) for a paper.
+        
+        This step is network-bound and safe to run concurrently across papers.
+        
+        Returns:
+            Path to the generated TEI file, or None if GROBID processing failed
+        """
+        logger.info(f"Processing paper: {pdf_path.name}")
+        
+        # Create output directory
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Step 1: Convert PDF to TEI XML using GROBID
+        logger.info("Step 1: Converting PDF to TEI XML...")
+        
+        # Reuse the TEI from a previous run if the PDF content is unchanged
+        cached_tei = output_dir / f"{pdf_path.stem}.grobid.tei.xml"
+        if not self.force and tei_is_current(pdf_path, cached_tei):
+            logger.info(f"TEI cache hit, skipping GROBID: {cached_tei}")
+            results['tei_file'] = cached_tei
+            return cached_tei
         
         try:
-            # Create output directory
-            output_dir.mkdir(parents=True, exist_ok=True)
+            # GROBID client expects output directory, not specific file
+            tei_output = self.grobid_processor.process_pdf(pdf_path, output_dir)
             
-            # Step 1: Convert PDF to TEI XML using GROBID
-            logger.info("Step 1: Converting PDF to TEI XML...")
-            base_name = pdf_path.stem
+            # Find the generated TEI file
+            if tei_output.is_file():
+                tei_file = tei_output
+            else:
+                # Look for the TEI file in the output directory
+                tei_file = find_tei_output(output_dir, pdf_path.stem)
+                if tei_file is None:
+                    raise FileNotFoundError("No TEI file was generated")
             
+            results['tei_file'] = tei_file
+            logger.info(f"TEI XML saved to: {tei_file}")
+            if tei_file == cached_tei:
+                write_tei_hash(pdf_path, tei_file)
+            return tei_file
+        except Exception as e:
+            error_msg = f"GROBID processing failed: {e}"
+            logger.error(error_msg)
+            results['errors'].append(error_msg)
+            return None
+    
+    def _extract_content(self,
+                         pdf_path: Path,
+                         tei_file: Path,
+                         output_dir: Path,
+                         results: dict,
+                         extract_figures: bool = True,
+                         extract_graphics: bool = True) -> None:
+        """Run steps 2-5 (TEI extraction, cropping, LLM analysis) for a paper."""
+        base_name = pdf_path.stem
+        
+        # Parse the TEI once and share the tree across the extraction steps.
+        # With the extraction cache on, parsing waits until a step misses it.
+        if self.cache_extractions:
+            tei_tree = TEIDocument(tei_file, self.tei_processor)
+        else:
+            try:
+                tei_tree = self.tei_processor.parse(tei_file)
+            except Exception as e:
+                error_msg = f"TEI parsing failed: {e}"
+                logger.error(error_msg)
+                results['errors'].append(error_msg)
+                return
+        
+        # Step 2: Extract sections and save as markdown
+        logger.info("Step 2: Extracting sections...")
+        try:
+            sections = self.tei_processor.extract_sections(tei_tree)
+            markdown_file = output_dir / f"{base_name}-sections.md"
+            self.tei_processor.save_sections_as_markdown(sections, markdown_file)
+            results['markdown_file'] = markdown_file
+            logger.info(f"Markdown saved to: {markdown_file}")
+            logger.info(f"Extracted {len(sections)} sections")
+        except Exception as e:
+            error_msg = f"Section extraction failed: {e}"
+            logger.error(error_msg)
+            results['errors'].append(error_msg)
+        
+        # Steps 3-4: Extract and crop figures/tables and graphics
+        if extract_figures or extract_graphics:
+            self._extract_images(pdf_path, tei_tree, output_dir, results,
+                                 extract_figures, extract_graphics)
+        
+        # Step 5: Analyze with LLM if enabled
+        if self.analyze_with_llm and results['markdown_file']:
+            logger.info("Step 5: Analyzing with LLM...")
             try:
-                # GROBID client expects output directory, not specific file
-                tei_output = self.grobid_processor.process_pdf(pdf_path, output_dir)
+                analysis = self.paper_analyzer.analyze_paper(
+                    results['markdown_file'], 
+                    results['tei_file'],
+                    tei_tree=tei_tree.root if self.cache_extractions else tei_tree
+                )
                 
-                # Find the generated TEI file
-                if tei_output.is_file():
-                    tei_file = tei_output
-                else:
-                    # Look for TEI files in the output directory
-                    tei_files = list(output_dir.glob("*.tei.xml"))
-                    if tei_files:
-                        tei_file = tei_files[0]
-                    else:
-                        raise FileNotFoundError("No TEI file was generated")
+                analysis_file = output_dir / f"{base_name}-analysis.json"
+                self.paper_analyzer.save_analysis(analysis, analysis_file)
+                results['analysis_file'] = analysis_file
                 
-                results['tei_file'] = tei_file
-                logger.info(f"TEI XML saved to: {tei_file}")
+                # Print summary unless output is limited to warnings/errors
+                if logger.isEnabledFor(logging.INFO):
+                    self.paper_analyzer.print_analysis_summary(analysis)
+                logger.info(f"Analysis saved to: {analysis_file}")
             except Exception as e:
-                error_msg = f"GROBID processing failed: {e}"
+                error_msg = f"LLM analysis failed: {e}"
                 logger.error(error_msg)
                 results['errors'].append(error_msg)
-                return results
-            
-            # Step 2: Extract sections and save as markdown
-            logger.info("Step 2: Extracting sections...")
+        
+        results['success'] = True
+        logger.info(f"Successfully processed: {pdf_path.name}")
+    
+    def _extract_images(self,
+                        pdf_path: Path,
+                        tei_tree,
+                        output_dir: Path,
+                        results: dict,
+                        extract_figures: bool = True,
+                        extract_graphics: bool = True) -> None:
+        """Run steps 3-4 (figure/table and graphics cropping) in one pass over the PDF."""
+        base_name = pdf_path.stem
+        image_suffix = IMAGE_SUFFIXES[self.image_format]
+        figure_crops = []
+        graphic_crops = []
+        
+        # Step 3: Extract figures/tables
+        if extract_figures:
+            logger.info("Step 3: Extracting figures and tables...")
             try:
-                sections = self.tei_processor.extract_sections(tei_file)
-                markdown_file = output_dir / f"{base_name}-sections.md"
-                self.tei_processor.save_sections_as_markdown(sections, markdown_file)
-                results['markdown_file'] = markdown_file
-                logger.info(f"Markdown saved to: {markdown_file}")
-                logger.info(f"Extracted {len(sections)} sections")
+                figures = self.tei_processor.extract_figures_tables(tei_tree)
+                figure_crops = [
+                    (figure, output_dir / f"{base_name}-{figure.element_type}-{i+1}{image_suffix}")
+                    for i, figure in enumerate(figures)
+                ]
             except Exception as e:
-                error_msg = f"Section extraction failed: {e}"
+                error_msg = f"Figure extraction failed: {e}"
                 logger.error(error_msg)
                 results['errors'].append(error_msg)
-            
-            # Step 3: Extract and crop figures/tables
-            if extract_figures:
-                logger.info("Step 3: Extracting figures and tables...")
-                try:
-                    figures = self.tei_processor.extract_figures_tables(tei_file)
-                    
-                    for i, figure in enumerate(figures):
-                        try:
-                            figure_name = f"{base_name}-{figure.element_type}-{i+1}.png"
-                            figure_path = output_dir / figure_name
-                            
-                            self.tei_processor.crop_figure_from_pdf(
-                                figure, pdf_path, figure_path
-                            )
-                            results['figures_extracted'] += 1
-                            logger.debug(f"Extracted {figure.element_type}: {figure_path}")
-                        except Exception as e:
-                            logger.warning(f"Failed to extract {figure.element_type} {i+1}: {e}")
-                    
-                    logger.info(f"Extracted {results['figures_extracted']} figures/tables")
-                except Exception as e:
-                    error_msg = f"Figure extraction failed: {e}"
-                    logger.error(error_msg)
-                    results['errors'].append(error_msg)
-            
-            # Step 4: Extract and crop graphics
-            if extract_graphics:
-                logger.info("Step 4: Extracting graphics...")
-                try:
-                    graphics = self.tei_processor.extract_graphics(tei_file)
-                    
-                    for i, graphic in enumerate(graphics):
-                        try:
-                            graphic_name = f"{base_name}-graphic-{i+1}.png"
-                            graphic_path = output_dir / graphic_name
-                            
-                            self.tei_processor.crop_graphic_from_pdf(
-                                graphic, pdf_path, graphic_path
-                            )
-                            results['graphics_extracted'] += 1
-                            logger.debug(f"Extracted graphic: {graphic_path}")
-                        except Exception as e:
-                            logger.warning(f"Failed to extract graphic {i+1}: {e}")
-                    
-                    logger.info(f"Extracted {results['graphics_extracted']} graphics")
-                except Exception as e:
-                    error_msg = f"Graphics extraction failed: {e}"
-                    logger.error(error_msg)
-                    results['errors'].append(error_msg)
-            
-            # Step 5: Analyze with LLM if enabled
-            if self.analyze_with_llm and results['markdown_file']:
-                logger.info("Step 5: Analyzing with LLM...")
-                try:
-                    analysis = self.paper_analyzer.analyze_paper(
-                        results['markdown_file'], 
-                        results['tei_file']
-                    )
-                    
-                    analysis_file = output_dir / f"{base_name}-analysis.json"
-                    self.paper_analyzer.save_analysis(analysis, analysis_file)
-                    results['analysis_file'] = analysis_file
-                    
-                    # Print summary
-                    self.paper_analyzer.print_analysis_summary(analysis)
-                    logger.info(f"Analysis saved to: {analysis_file}")
-                except Exception as e:
-                    error_msg = f"LLM analysis failed: {e}"
-                    logger.error(error_msg)
-                    results['errors'].append(error_msg)
-            
-            results['success'] = True
-            logger.info(f"Successfully processed: {pdf_path.name}")
-            
+        
+        # Step 4: Extract graphics
+        if extract_graphics:
+            logger.info("Step 4: Extracting graphics...")
+            try:
+                graphics = self.tei_processor.extract_graphics(tei_tree)
+                graphic_crops = [
+                    (graphic, output_dir / f"{base_name}-graphic-{i+1}{image_suffix}")
+                    for i, graphic in enumerate(graphics)
+                ]
+            except Exception as e:
+                error_msg = f"Graphics extraction failed: {e}"
+                logger.error(error_msg)
+                results['errors'].append(error_msg)
+        
+        if not figure_crops and not graphic_crops:
+            return
+        
+        # Crop everything with a single open of the PDF
+        try:
+            errors = self.tei_processor.crop_regions(
+                pdf_path, figure_crops + graphic_crops, self.crop_workers
+            )
         except Exception as e:
-            error_msg = f"Unexpected error processing {pdf_path.name}: {e}"
+            error_msg = f"Cropping failed: {e}"
             logger.error(error_msg)
             results['errors'].append(error_msg)
+            return
         
-        return results
+        figure_errors = errors[:len(figure_crops)]
+        graphic_errors = errors[len(figure_crops):]
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        
+        for i, ((figure, figure_path), error) in enumerate(zip(figure_crops, figure_errors)):
+            if error is None:
+                results['figures_extracted'] += 1
+                if debug_enabled:
+                    logger.debug(f"Extracted {figure.element_type}: {figure_path}")
+            else:
+                logger.warning(f"Failed to extract {figure.element_type} {i+1}: {error}")
+        
+        for i, ((_, graphic_path), error) in enumerate(zip(graphic_crops, graphic_errors)):
+            if error is None:
+                results['graphics_extracted'] += 1
+                if debug_enabled:
+                    logger.debug(f"Extracted graphic: {graphic_path}")
+            else:
+                logger.warning(f"Failed to extract graphic {i+1}: {error}")
+        
+        if extract_figures:
+            logger.info(f"Extracted {results['figures_extracted']} figures/tables")
+        if extract_graphics:
+            logger.info(f"Extracted {results['graphics_extracted']} graphics")
+    
+    def _finish_conversion(self, future, conversion, extraction_pool, extraction_futures,
+                           extract_figures, extract_graphics):
+        """Extract content for a completed GROBID conversion from process_batch().
+        
+        Extraction runs on the calling thread, or is handed to
+        ``extraction_pool`` with its future recorded in ``extraction_futures``.
+        """
+        index, pdf_file, paper_output_dir, results = conversion
+        try:
+            tei_file = future.result()
+            if tei_file is None:
+                return
+            if extraction_pool is None:
+                self._extract_content(
+                    pdf_file,
+                    tei_file,
+                    paper_output_dir,
+                    results,
+                    extract_figures=extract_figures,
+                    extract_graphics=extract_graphics
+                )
+            else:
+                extraction_future = extraction_pool.submit(
+                    _extract_in_worker, pdf_file, tei_file, paper_output_dir, results,
+                    extract_figures, extract_graphics
+                )
+                extraction_futures[extraction_future] = (index, pdf_file)
+        except Exception as e:
+            error_msg = f"Unexpected error processing {pdf_file.name}: {e}"
+            logger.error(error_msg)
+            results['errors'].append(error_msg)
     
     def process_batch(self, 
-                     pdf_files: List[Path], 
+                     pdf_files: Iterable[Path], 
                      output_base_dir: Path,
                      extract_figures: bool = True,
-                     extract_graphics: bool = True) -> List[dict]:
+                     extract_graphics: bool = True,
+                     max_workers: int = 4,
+                     jobs: int = 1) -> List[dict]:
         """Process multiple PDF files in batch.
         
+        GROBID conversions are I/O-bound, so up to ``max_workers`` of them run
+        concurrently on a thread pool. At most ``max_workers * SUBMIT_BACKLOG``
+        files are queued ahead of the workers, so ``pdf_files`` is consumed
+        lazily as conversions finish. TEI extraction, cropping and analysis
+        start as each conversion completes, overlapping local work with the
+        remaining GROBID requests. With ``jobs > 1`` that CPU-bound work is
+        spread over a pool of worker processes; otherwise it runs on the
+        calling thread.
+        
         Args:
-            pdf_files: List of PDF file paths
+            pdf_files: PDF file paths; any iterable, read as worker slots free up
             output_base_dir: Base directory for all outputs
             extract_figures: Whether to extract figures/tables
             extract_graphics: Whether to extract graphics
+            max_workers: Maximum number of concurrent GROBID requests
+            jobs: Number of processes for TEI extraction, cropping and analysis
             
         Returns:
-            List of processing results for each file
+            List of processing results for each file, in input order
         """
-        logger.info(f"Starting batch processing of {len(pdf_files)} files")
-        
-        all_results = []
-        
-        for pdf_file in pdf_files:
-            try:
+        with ExitStack() as stack:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, max_workers)))
+            extraction_pool = None
+            if jobs > 1:
+                # Workers build their own extraction-only pipeline; they
+                # start on demand, so a short batch only pays for the
+                # processes it actually uses
+                extraction_pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=jobs,
+                    mp_context=pool_context(__name__),
+                    initializer=_init_extraction_worker,
+                    initargs=(self._extraction_settings(),)
+                ))
+            
+            # Only a bounded backlog of conversions is queued ahead of the
+            # GROBID workers, so pdf_files is read as slots free up
+            max_pending = max(1, max_workers) * GrobidProcessor.SUBMIT_BACKLOG
+            all_results = []
+            pending = {}
+            extraction_futures = {}
+            for index, pdf_file in enumerate(pdf_files):
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish_conversion(future, pending.pop(future), extraction_pool,
+                                                extraction_futures, extract_figures, extract_graphics)
                 # Create separate output directory for each paper
                 paper_output_dir = output_base_dir / pdf_file.stem
-                
-                results = self.process_single_paper(
-                    pdf_file, 
-                    paper_output_dir,
-                    extract_figures=extract_figures,
-                    extract_graphics=extract_graphics
-                )
+                results = self._new_results(pdf_file)
                 all_results.append(results)
-                
-            except Exception as e:
-                logger.error(f"Failed to process {pdf_file}: {e}")
-                all_results.append({
-                    'pdf_path': pdf_file,
-                    'success': False,
-                    'errors': [str(e)]
-                })
+                future = executor.submit(self._convert_pdf_to_tei, pdf_file, paper_output_dir, results)
+                pending[future] = (index, pdf_file, paper_output_dir, results)
+            
+            logger.info(f"Submitted all {len(all_results)} files for batch processing")
+            for future in as_completed(list(pending)):
+                self._finish_conversion(future, pending.pop(future), extraction_pool,
+                                        extraction_futures, extract_figures, extract_graphics)
+            
+            for future in as_completed(extraction_futures):
+                index, pdf_file = extraction_futures[future]
+                try:
+                    all_results[index] = future.result()
+                except Exception as e:
+                    error_msg = f"Unexpected error processing {pdf_file.name}: {e}"
+                    logger.error(error_msg)
+                    all_results[index]['errors'].append(error_msg)
         
         # Print batch summary
         successful = sum(1 for r in all_results if r['success'])
-        logger.info(f"Batch processing completed: {successful}/{len(pdf_files)} successful")
+        logger.info(f"Batch processing completed: {successful}/{len(all_results)} successful")
         
         return all_results
+
+
+# Per-process pipeline for process_batch() extraction workers
+_worker_pipeline: Optional[PaperProcessingPipeline] = None
+
+
+def _init_extraction_worker(settings: dict) -> None:
+    """Build the extraction-only pipeline once in each worker process."""
+    global _worker_pipeline
+    _worker_pipeline = PaperProcessingPipeline._for_extraction(**settings)
+
+
+def _extract_in_worker(pdf_path: Path,
+                       tei_file: Path,
+                       output_dir: Path,
+                       results: dict,
+                       extract_figures: bool,
+                       extract_graphics: bool) -> dict:
+    """Run steps 2-5 for one paper in a worker process and return its results."""
+    _worker_pipeline._extract_content(pdf_path, tei_file, output_dir, results,
+                                      extract_figures, extract_graphics)
+    return results
+
@@ -5,24 +5,113 @@ This module provides the AcademicPaperProcessor class which is a simpler interfa
 for the comprehensive pipeline, focused on PDF-to-content extraction.
 """
 
+import functools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional
 
-from .grobid import GrobidProcessor
-from .tei import TEIProcessor
+from .grobid import (GrobidProcessor, atomic_write, file_sha256, find_tei_output, tei_is_current,
+                     write_tei_hash)
+from .tei import IMAGE_SUFFIXES, TEIDocument, TEIProcessor, pool_context
+
+logger = logging.getLogger(__name__)
+
+
+class _CaptionCharFilter(dict):
+    """str.translate() table keeping alphanumerics, spaces and hyphens.
+    
+    Entries are computed with str.isalnum() on first use, so non-ASCII
+    letters are kept exactly as before while repeated characters are
+    looked up in C.
+    """
+    
+    def __missing__(self, codepoint: int) -> Optional[str]:
+        char = chr(codepoint)
+        value = char if char.isalnum() or char in ' -' else None
+        self[codepoint] = value
+        return value
+
+
+_CAPTION_CHAR_FILTER = _CaptionCharFilter()
+
+
+def _safe_caption(caption: str) -> str:
+    """Turn the start of a caption into a filename-safe fragment."""
+    return caption[:30].translate(_CAPTION_CHAR_FILTER).strip().replace(' ', '_')
+
+
+@functools.lru_cache(maxsize=4)
+def _get_grobid_processor(server_url: str, pool_size: int) -> GrobidProcessor:
+    """Return the GrobidProcessor shared by every processor using ``server_url``.
+    
+    Building a GrobidProcessor configures a GrobidClient (which probes the
+    server) and a pooled requests.Session, so processors created per PDF
+    reuse one instance instead. Its keep-alive session can be shared
+    between threads; the pool is sized once here and never resized, so
+    processors asking for a different size get their own instance.
+    """
+    return GrobidProcessor(server_url=server_url, pool_size=pool_size)
 
 
 class AcademicPaperProcessor:
     """Complete academic paper processing pipeline."""
     
-    def __init__(self, grobid_server_url="http://localhost:8070"):
+    # Suffix of the output-directory file recording what the TEI → content
+    # step was run on, so an unchanged paper is skipped on the next run
+    CONTENT_STAMP_SUFFIX = ".content.json"
+    
+    def __init__(self, grobid_server_url="http://localhost:8070", crop_workers: int = 1,
+                 force: bool = False, image_format: str = 'png', cache_extractions: bool = False,
+                 dpi: int = TEIProcessor.DEFAULT_DPI, grobid_connections: int = 32):
         """Initialize the processor.
         
         Args:
             grobid_server_url: URL of the GROBID server
+            crop_workers: Number of processes used to crop figures/graphics
+            force: Regenerate the TEI file, markdown and crops even when
+                up-to-date outputs from a previous run exist
+            image_format: Format of cropped figures, 'png' (lossless) or
+                'jpeg' (much cheaper to encode, for previews)
+            cache_extractions: Cache TEI sections/figures/graphics on disk so
+                re-runs over unchanged TEI files skip parsing
+            dpi: Resolution of cropped figures and graphics
+            grobid_connections: Size of the keep-alive connection pool to
+                GROBID; should cover process_batch()'s ``max_workers``
         """
-        self.grobid_processor = GrobidProcessor(server_url=grobid_server_url)
-        self.tei_processor = TEIProcessor()
+        if image_format not in IMAGE_SUFFIXES:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        self.grobid_connections = max(1, grobid_connections)
+        self.grobid_processor = _get_grobid_processor(grobid_server_url, self.grobid_connections)
+        self.tei_processor = TEIProcessor(cache_extractions=cache_extractions, dpi=dpi)
+        self.cache_extractions = cache_extractions
+        self.dpi = dpi
+        self.crop_workers = crop_workers
+        self.force = force
+        self.image_format = image_format
+    
+    @classmethod
+    def _for_content(cls, force: bool = False, image_format: str = 'png',
+                     cache_extractions: bool = False,
+                     dpi: int = TEIProcessor.DEFAULT_DPI) -> 'AcademicPaperProcessor':
+        """Build a processor that only runs the TEI → content step.
+        
+        Used by process_batch() worker processes, which receive TEI files
+        produced by the parent and never talk to GROBID.
+        """
+        processor = cls.__new__(cls)
+        processor.grobid_processor = None
+        processor.tei_processor = TEIProcessor(cache_extractions=cache_extractions, dpi=dpi)
+        processor.cache_extractions = cache_extractions
+        processor.dpi = dpi
+        # Papers are already spread over processes; don't nest crop pools
+        processor.crop_workers = 1
+        processor.force = force
+        processor.image_format = image_format
+        return processor
     
     def process_pdf_to_tei(self, pdf_path: Path, output_dir: Path) -> Optional[Path]:
         """Process PDF to TEI XML using GROBID.
@@ -34,11 +123,17 @@ class AcademicPaperProcessor:
         Returns:
             Path to the generated TEI file, or None if failed
         """
-        print(f"📄 Processing PDF: {pdf_path.name}")
+        logger.info(f"📄 Processing PDF: {pdf_path.name}")
+        
+        # Reuse the TEI from a previous run if the PDF content is unchanged
+        cached_tei = output_dir / f"{pdf_path.stem}.grobid.tei.xml"
+        if not self.force and tei_is_current(pdf_path, cached_tei):
+            logger.info(f"✅ TEI up to date, skipping GROBID: {cached_tei.name}")
+            return cached_tei
         
         # Check server status
         if not self.grobid_processor.check_server_status():
-            print("❌ Cannot connect to GROBID server")
+            logger.error("❌ Cannot connect to GROBID server")
             return None
         
         try:
@@ -57,105 +152,196 @@ class AcademicPaperProcessor:
             if tei_output.is_file():
                 tei_file = tei_output
             else:
-                tei_files = list(tei_output.glob("*.tei.xml"))
-                if tei_files:
-                    tei_file = tei_files[0]
-                else:
-                    print("❌ No TEI file generated")
+                tei_file = find_tei_output(tei_output, pdf_path.stem)
+                if tei_file is None:
+                    logger.error("❌ No TEI file generated")
                     return None
             
-            print(f"✅ TEI generated: {tei_file.name} ({tei_file.stat().st_size / 1024:.1f} KB)")
+            logger.info(f"✅ TEI generated: {tei_file.name} ({tei_file.stat().st_size / 1024:.1f} KB)")
+            if tei_file == cached_tei:
+                write_tei_hash(pdf_path, tei_file)
             return tei_file
                 
         except Exception as e:
-            print(f"❌ Error processing PDF: {e}")
+            logger.error(f"❌ Error processing PDF: {e}")
             return None
     
-    def process_tei_to_content(self, tei_file: Path, pdf_file: Optional[Path], output_dir: Path):
+    def process_tei_to_content(self, tei_file: Path, pdf_file: Optional[Path], output_dir: Path,
+                               tei_tree=None):
         """Process TEI XML to extract structured content.
         
+        Unless ``force`` is set, the step is skipped when the previous run
+        completed on the same TEI, PDF and crop settings and its outputs
+        still exist.
+        
         Args:
             tei_file: Path to the TEI XML file
             pdf_file: Path to the original PDF file (for cropping)
             output_dir: Directory to save extracted content
+            tei_tree: Tree already returned by TEIProcessor.parse() for
+                ``tei_file``; parsed here once if omitted
         """
-        print(f"🔍 Processing TEI: {tei_file.name}")
+        logger.info(f"🔍 Processing TEI: {tei_file.name}")
+        
+        pdf_available = bool(pdf_file) and pdf_file.exists()
+        stamp_file = output_dir / f"{tei_file.name}{self.CONTENT_STAMP_SUFFIX}"
+        inputs = self._content_inputs(tei_file, pdf_file if pdf_available else None)
+        if not self.force and self._content_is_current(stamp_file, inputs, output_dir):
+            logger.info(f"⏭️  Content up to date, skipping: {tei_file.name}")
+            return
+        
+        # Parse once and share the tree between all extraction steps.
+        # With the extraction cache on, parsing waits until a step misses it.
+        if tei_tree is None and self.cache_extractions:
+            tei_tree = TEIDocument(tei_file, self.tei_processor)
+        elif tei_tree is None:
+            try:
+                tei_tree = self.tei_processor.parse(tei_file)
+            except Exception as e:
+                logger.error(f"❌ Error parsing TEI: {e}")
+                return
         
         # Create output subdirectories
         figures_dir = output_dir / "figures"
         graphics_dir = output_dir / "graphics"
+        markdown_file = output_dir / f"{tei_file.stem.replace('.grobid', '')}_sections.md"
+        image_suffix = IMAGE_SUFFIXES[self.image_format]
+        crops = []
+        complete = True
         
         # Extract sections
-        print("\n📝 Extracting sections...")
+        logger.info("📝 Extracting sections...")
         try:
-            sections = self.tei_processor.extract_sections(tei_file)
-            print(f"Found {len(sections)} sections")
+            sections = self.tei_processor.extract_sections(tei_tree)
+            logger.info(f"Found {len(sections)} sections")
             
             # Save as markdown
-            markdown_file = output_dir / f"{tei_file.stem.replace('.grobid', '')}_sections.md"
             self.tei_processor.save_sections_as_markdown(sections, markdown_file)
-            print(f"✅ Sections saved: {markdown_file.name}")
+            logger.info(f"✅ Sections saved: {markdown_file.name}")
             
         except Exception as e:
-            print(f"❌ Error extracting sections: {e}")
+            logger.error(f"❌ Error extracting sections: {e}")
+            complete = False
         
         # Extract figures and tables
-        print("\n🖼️  Extracting figures and tables...")
+        logger.info("🖼️  Extracting figures and tables...")
         try:
-            figures_tables = self.tei_processor.extract_figures_tables(tei_file)
-            print(f"Found {len(figures_tables)} figures/tables")
+            figures_tables = self.tei_processor.extract_figures_tables(tei_tree)
+            logger.info(f"Found {len(figures_tables)} figures/tables")
             
-            if figures_tables and pdf_file and pdf_file.exists():
+            if figures_tables and pdf_available:
                 figures_dir.mkdir(exist_ok=True)
-                print("✂️  Cropping figures from PDF...")
                 
                 for i, fig_table in enumerate(figures_tables):
                     # Generate safe filename
-                    safe_caption = "".join(c for c in fig_table.caption[:30] 
-                                         if c.isalnum() or c in (' ', '-')).strip()
-                    safe_caption = safe_caption.replace(' ', '_')
-                    if not safe_caption:
-                        safe_caption = f"{fig_table.element_type}_{i+1}"
-                    
-                    output_file = figures_dir / f"{fig_table.element_type}_{i+1}_{safe_caption}.png"
+                    safe_caption = _safe_caption(fig_table.caption) or f"{fig_table.element_type}_{i+1}"
                     
-                    try:
-                        self.tei_processor.crop_figure_from_pdf(fig_table, pdf_file, output_file)
-                        print(f"  ✅ {output_file.name}")
-                    except Exception as e:
-                        print(f"  ❌ Failed to crop {fig_table.element_type} {i+1}: {e}")
+                    output_file = figures_dir / f"{fig_table.element_type}_{i+1}_{safe_caption}{image_suffix}"
+                    crops.append((fig_table, output_file, f"{fig_table.element_type} {i+1}"))
             
         except Exception as e:
-            print(f"❌ Error extracting figures/tables: {e}")
+            logger.error(f"❌ Error extracting figures/tables: {e}")
+            complete = False
         
         # Extract graphics
-        print("\n🎨 Extracting graphics...")
+        logger.info("🎨 Extracting graphics...")
         try:
-            graphics = self.tei_processor.extract_graphics(tei_file)
-            print(f"Found {len(graphics)} graphics")
+            graphics = self.tei_processor.extract_graphics(tei_tree)
+            logger.info(f"Found {len(graphics)} graphics")
             
-            if graphics and pdf_file and pdf_file.exists():
+            if graphics and pdf_available:
                 graphics_dir.mkdir(exist_ok=True)
-                print("✂️  Cropping graphics from PDF...")
                 
                 for i, graphic in enumerate(graphics):
                     # Generate safe filename
-                    safe_caption = "".join(c for c in graphic.parent_figure_caption[:30] 
-                                         if c.isalnum() or c in (' ', '-')).strip()
-                    safe_caption = safe_caption.replace(' ', '_')
-                    if not safe_caption:
-                        safe_caption = f"graphic_{i+1}"
+                    safe_caption = _safe_caption(graphic.parent_figure_caption) or f"graphic_{i+1}"
                     
-                    output_file = graphics_dir / f"graphic_{i+1}_{safe_caption}.png"
-                    
-                    try:
-                        self.tei_processor.crop_graphic_from_pdf(graphic, pdf_file, output_file)
-                        print(f"  ✅ {output_file.name}")
-                    except Exception as e:
-                        print(f"  ❌ Failed to crop graphic {i+1}: {e}")
+                    output_file = graphics_dir / f"graphic_{i+1}_{safe_caption}{image_suffix}"
+                    crops.append((graphic, output_file, f"graphic {i+1}"))
+            
+        except Exception as e:
+            logger.error(f"❌ Error extracting graphics: {e}")
+            complete = False
+        
+        if crops and not self._crop_all(pdf_file, crops):
+            complete = False
+        
+        # Only a fully successful run may be skipped next time
+        if complete and inputs is not None:
+            self._write_content_stamp(stamp_file, inputs, output_dir,
+                                      [markdown_file] + [output_file for _, output_file, _ in crops])
+    
+    def _content_inputs(self, tei_file: Path, pdf_file: Optional[Path]) -> Optional[dict]:
+        """Describe what the TEI → content step's outputs depend on.
+        
+        The TEI is identified by its digest and the PDF (whose pages are
+        cropped) by its size and modification time; crop settings are
+        included so a different dpi or image format is never served stale
+        images. Returns None if the TEI file cannot be read.
+        """
+        try:
+            inputs = {'tei': file_sha256(tei_file), 'pdf': None}
+            if pdf_file is not None:
+                pdf_stat = os.stat(pdf_file)
+                inputs['pdf'] = [pdf_stat.st_size, pdf_stat.st_mtime_ns]
+        except OSError:
+            return None
+        inputs['dpi'] = self.dpi
+        inputs['image_format'] = self.image_format
+        return inputs
+    
+    @staticmethod
+    def _content_is_current(stamp_file: Path, inputs: Optional[dict], output_dir: Path) -> bool:
+        """Return whether ``stamp_file`` records ``inputs`` and all its outputs still exist."""
+        if inputs is None:
+            return False
+        try:
+            stamp = json.loads(stamp_file.read_text(encoding='utf-8'))
+            return (stamp['inputs'] == inputs
+                    and all((output_dir / name).is_file() for name in stamp['outputs']))
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+    
+    @staticmethod
+    def _write_content_stamp(stamp_file: Path, inputs: dict, output_dir: Path, outputs) -> None:
+        """Record the inputs and output files of a completed TEI → content step."""
+        stamp = {
+            'inputs': inputs,
+            'outputs': [str(Path(output).relative_to(output_dir)) for output in outputs],
+        }
+        try:
+            with atomic_write(stamp_file) as f:
+                f.write(json.dumps(stamp).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not write content stamp {stamp_file}: {e}")
+    
+    def _crop_all(self, pdf_file: Path, crops) -> bool:
+        """Crop all figures/tables and graphics in a single pass over the PDF.
+        
+        Args:
+            pdf_file: Path to the original PDF file
+            crops: (figure or graphic, output file, label) triples
             
+        Returns:
+            True if every region was cropped
+        """
+        logger.info(f"✂️  Cropping {len(crops)} figures/graphics from PDF...")
+        try:
+            errors = self.tei_processor.crop_regions(
+                pdf_file, [(region, output_file) for region, output_file, _ in crops],
+                max_workers=self.crop_workers
+            )
         except Exception as e:
-            print(f"❌ Error extracting graphics: {e}")
+            logger.error(f"❌ Cannot crop from PDF: {e}")
+            return False
+        
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        for (_, output_file, label), error in zip(crops, errors):
+            if error is not None:
+                logger.warning(f"❌ Failed to crop {label}: {error}")
+            elif debug_enabled:
+                logger.debug(f"✅ {output_file.name}")
+        return all(error is None for error in errors)
     
     def process_complete_pipeline(self, pdf_path: Path, output_dir: Path):
         """Run the complete PDF → TEI → Content pipeline.
@@ -168,22 +354,100 @@ class AcademicPaperProcessor:
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        print("🚀 Starting complete academic paper processing pipeline")
-        print(f"📄 Input PDF: {pdf_path}")
-        print(f"📁 Output directory: {output_dir}")
-        print("=" * 60)
+        logger.info("🚀 Starting complete academic paper processing pipeline")
+        logger.info(f"📄 Input PDF: {pdf_path}")
+        logger.info(f"📁 Output directory: {output_dir}")
         
         # Step 1: PDF → TEI
         tei_file = self.process_pdf_to_tei(pdf_path, output_dir)
         if not tei_file:
-            print("❌ Pipeline failed at PDF → TEI step")
+            logger.error("❌ Pipeline failed at PDF → TEI step")
             return
         
         # Step 2: TEI → Content
         self.process_tei_to_content(tei_file, pdf_path, output_dir)
         
-        print("\n🎉 Pipeline complete!")
-        print(f"📁 All outputs saved to: {output_dir}")
+        logger.info("🎉 Pipeline complete!")
+        logger.info(f"📁 All outputs saved to: {output_dir}")
+    
+    def process_batch(self, pdf_paths: Iterable[Path], output_dir: Path,
+                      max_workers: int = 10, jobs: int = 1) -> List[Optional[Path]]:
+        """Run the complete pipeline over several PDFs.
+        
+        GROBID conversions are I/O-bound, so up to ``max_workers`` of them
+        are in flight at once, over the ``grobid_connections`` keep-alive
+        connections fixed at construction. Each paper's TEI → content step starts as soon
+        as its conversion completes, while the remaining requests are still
+        waiting on the server. With ``jobs > 1`` that CPU-bound step runs in
+        a pool of worker processes; otherwise it runs on the calling thread.
+        
+        Args:
+            pdf_paths: Paths to the PDF files
+            output_dir: Base directory; each paper gets a subdirectory named
+                after its PDF
+            max_workers: Maximum number of concurrent GROBID requests
+            jobs: Number of processes for TEI parsing and cropping
+            
+        Returns:
+            Path to each paper's TEI file (None if conversion failed), in
+            input order
+        """
+        pdf_paths = [Path(pdf_path) for pdf_path in pdf_paths]
+        output_dir = Path(output_dir)
+        max_workers = max(1, min(max_workers, len(pdf_paths)))
+        results = [None] * len(pdf_paths)
+        if not pdf_paths:
+            return results
+        
+        logger.info(f"🚀 Starting batch processing of {len(pdf_paths)} PDFs")
+        if max_workers > self.grobid_connections:
+            # The shared GrobidProcessor's pool is fixed when it is created
+            logger.warning(f"{max_workers} workers exceed the {self.grobid_connections} pooled GROBID "
+                           f"connections; create the processor with grobid_connections={max_workers}")
+        
+        with ExitStack() as stack:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+            content_pool = None
+            if jobs > 1:
+                content_pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=jobs,
+                    mp_context=pool_context(__name__),
+                    initializer=_init_content_worker,
+                    initargs=(self.force, self.image_format, self.cache_extractions, self.dpi)
+                ))
+            
+            futures = {}
+            for index, pdf_path in enumerate(pdf_paths):
+                paper_output_dir = output_dir / pdf_path.stem
+                paper_output_dir.mkdir(parents=True, exist_ok=True)
+                future = executor.submit(self.process_pdf_to_tei, pdf_path, paper_output_dir)
+                futures[future] = (index, pdf_path, paper_output_dir)
+            
+            content_futures = {}
+            for future in as_completed(futures):
+                index, pdf_path, paper_output_dir = futures[future]
+                tei_file = future.result()
+                if tei_file is None:
+                    logger.error(f"❌ Pipeline failed at PDF → TEI step: {pdf_path.name}")
+                    continue
+                results[index] = tei_file
+                if content_pool is None:
+                    self.process_tei_to_content(tei_file, pdf_path, paper_output_dir)
+                else:
+                    content_future = content_pool.submit(
+                        _content_in_worker, tei_file, pdf_path, paper_output_dir
+                    )
+                    content_futures[content_future] = pdf_path
+            
+            for future in as_completed(content_futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"❌ Error processing TEI for {content_futures[future].name}: {e}")
+        
+        succeeded = sum(tei_file is not None for tei_file in results)
+        logger.info(f"🎉 Batch complete: {succeeded}/{len(pdf_paths)} PDFs processed")
+        return results
     
     def process_tei_only(self, tei_path: Path, pdf_path: Optional[Path] = None, output_dir: Optional[Path] = None):
         """Process existing TEI file to extract content.
@@ -202,14 +466,28 @@ class AcademicPaperProcessor:
         
         pdf_file = Path(pdf_path) if pdf_path else None
         
-        print("🔍 Processing existing TEI file")
-        print(f"📄 TEI file: {tei_path}")
+        logger.info("🔍 Processing existing TEI file")
+        logger.info(f"📄 TEI file: {tei_path}")
         if pdf_file:
-            print(f"📖 PDF file: {pdf_file}")
-        print(f"📁 Output directory: {output_dir}")
-        print("=" * 60)
+            logger.info(f"📖 PDF file: {pdf_file}")
+        logger.info(f"📁 Output directory: {output_dir}")
         
         self.process_tei_to_content(tei_path, pdf_file, output_dir)
         
-        print("\n🎉 TEI processing complete!")
-        print(f"📁 All outputs saved to: {output_dir}")
+        logger.info("🎉 TEI processing complete!")
+        logger.info(f"📁 All outputs saved to: {output_dir}")
+
+
+# Per-process processor for process_batch() content workers
+_worker_processor: Optional[AcademicPaperProcessor] = None
+
+
+def _init_content_worker(force: bool, image_format: str, cache_extractions: bool, dpi: int) -> None:
+    """Build the content-only processor once in each worker process."""
+    global _worker_processor
+    _worker_processor = AcademicPaperProcessor._for_content(force, image_format, cache_extractions, dpi)
+
+
+def _content_in_worker(tei_file: Path, pdf_path: Path, output_dir: Path) -> None:
+    """Run the TEI → content step for one paper in a worker process."""
+    _worker_processor.process_tei_to_content(tei_file, pdf_path, output_dir)
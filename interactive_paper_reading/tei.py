@@ -8,14 +8,55 @@ This module provides functionality to:
 4. Crop figures/tables from PDF using coordinates
 """
 
+import functools
 import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple
-import xml.etree.ElementTree as ET
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# File extension of cropped images for each supported output format
+IMAGE_SUFFIXES = {'png': '.png', 'jpeg': '.jpg'}
+
+# Modules the forkserver imports once so pool workers start already warm;
+# the worker module of the first pool is added to these
+WORKER_PRELOAD = ["fitz"]
+
+_forkserver_preload_set = False
+
+
+def pool_context(worker_module: str):
+    """
+    Multiprocessing context for the package's worker pools.
+    
+    Workers are forked from a forkserver that has already imported PyMuPDF
+    and ``worker_module``, so they start quickly and never inherit the
+    parent's threads. The forkserver (and its preload list, which is
+    process-wide) is set up once per process; pools whose worker module
+    was not preloaded import it in each worker. Falls back to spawn where
+    forkserver is unavailable (Windows).
+    
+    Args:
+        worker_module: Name of the module defining the pool's worker functions
+    """
+    global _forkserver_preload_set
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    if not _forkserver_preload_set:
+        context.set_forkserver_preload(WORKER_PRELOAD + [worker_module])
+        _forkserver_preload_set = True
+    return context
+
 
 @dataclass
 class Section:
@@ -69,49 +110,190 @@ class Graphic:
         return (self.x, self.y, self.width, self.height)
 
 
+class TEIDocument:
+    """A TEI file whose tree is parsed on first access.
+    
+    Passed to the extract_* methods in place of a path, it lets results come
+    from the extraction cache without parsing, while cache misses share a
+    single parse of the file.
+    """
+    
+    def __init__(self, path: Path, processor: 'TEIProcessor'):
+        self.path = Path(path)
+        self._processor = processor
+        self._root = None
+    
+    @property
+    def root(self) -> etree._Element:
+        """Root element of the TEI document, parsed on first use."""
+        if self._root is None:
+            self._root = self._processor.parse(self.path)
+        return self._root
+
+
+TEISource = Union[Path, TEIDocument, etree._Element]
+
+
+def cached_extraction(method):
+    """
+    Memoize an extract_* method in a pickle file next to the TEI file.
+    
+    The cache is only used when the processor was created with
+    ``cache_extractions=True`` and the method is given a path or TEIDocument;
+    an entry is valid while the TEI file's mtime and size are unchanged.
+    """
+    suffix = f".{method.__name__}.pkl"
+    
+    @functools.wraps(method)
+    def wrapper(self, tei_file_path):
+        if not self.cache_extractions or isinstance(tei_file_path, (etree._Element, etree._ElementTree)):
+            return method(self, tei_file_path)
+        
+        path = tei_file_path.path if isinstance(tei_file_path, TEIDocument) else Path(tei_file_path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return method(self, tei_file_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cache_path = path.with_name(path.name + suffix)
+        
+        try:
+            cached_key, result = pickle.loads(cache_path.read_bytes())
+            if cached_key == key:
+                return result
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable extraction cache {cache_path}: {e}")
+        
+        result = method(self, tei_file_path)
+        try:
+            cache_path.write_bytes(pickle.dumps((key, result), protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache {cache_path}: {e}")
+        return result
+    
+    return wrapper
+
+
 class TEIProcessor:
     """Processes TEI XML files from GROBID to extract structured content."""
     
-    def __init__(self):
-        """Initialize the TEI processor."""
-        self.namespaces = {'tei': 'http://www.tei-c.org/ns/1.0'}
+    # Quality used when a crop's output path asks for JPEG
+    JPEG_QUALITY = 85
+    
+    # Resolution of cropped figures (2x the PDF's 72 points per inch)
+    DEFAULT_DPI = 144
     
-    def extract_sections(self, tei_file_path: Path) -> List[Section]:
+    namespaces = {'tei': 'http://www.tei-c.org/ns/1.0'}
+    
+    # Every XPath used during extraction, compiled once at import rather than
+    # for each processor (worker processes build their own)
+    _divs_xp = etree.XPath('.//tei:div', namespaces=namespaces)
+    _figures_xp = etree.XPath('.//tei:figure', namespaces=namespaces)
+    _tables_xp = etree.XPath('.//tei:table', namespaces=namespaces)
+    _head_xp = etree.XPath('./tei:head', namespaces=namespaces)
+    _figdesc_xp = etree.XPath('./tei:figDesc', namespaces=namespaces)
+    _graphics_xp = etree.XPath('./tei:graphic', namespaces=namespaces)
+    _div_tag = f"{{{namespaces['tei']}}}div"
+    _figure_tag = f"{{{namespaces['tei']}}}figure"
+    _table_tag = f"{{{namespaces['tei']}}}table"
+    
+    def __init__(self, cache_extractions: bool = False, dpi: int = DEFAULT_DPI):
         """
-        Extract all document sections from TEI XML file.
+        Initialize the TEI processor.
+        
+        Args:
+            cache_extractions: Pickle extract_* results next to each TEI file so
+                later runs over an unchanged file skip parsing
+            dpi: Resolution at which figures and graphics are cropped; pixel
+                count, and so render and encode time, grows with its square
+        """
+        self.cache_extractions = cache_extractions
+        self.dpi = dpi
+        
+        # Comments and processing instructions are dropped so element children
+        # and text match what ElementTree produced. huge_tree lifts libxml2's
+        # 10 MB text-node limit, which GROBID output for long papers can hit.
+        self._parser = etree.XMLParser(remove_comments=True, remove_pis=True, collect_ids=False,
+                                       huge_tree=True)
+    
+    def parse(self, tei_file_path: Path) -> etree._Element:
+        """
+        Parse a TEI XML file once so the tree can be shared across extractions.
         
         Args:
             tei_file_path: Path to the TEI XML file
             
         Returns:
-            List of Section objects ordered by document structure
+            Root element of the TEI document, accepted by all extract_* methods
             
         Raises:
             FileNotFoundError: If the TEI file doesn't exist
         """
         try:
-            with open(tei_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except FileNotFoundError:
-            raise FileNotFoundError(f"TEI file not found: {tei_file_path}")
+            return etree.parse(os.fspath(tei_file_path), self._parser).getroot()
+        except OSError:
+            if not os.path.exists(tei_file_path):
+                raise FileNotFoundError(f"TEI file not found: {tei_file_path}")
+            raise
+    
+    def _get_root(self, tei: TEISource) -> etree._Element:
+        """Return the root element for a TEI file path, TEIDocument or parsed tree."""
+        if isinstance(tei, etree._Element):
+            return tei
+        if isinstance(tei, etree._ElementTree):
+            return tei.getroot()
+        if isinstance(tei, TEIDocument):
+            return tei.root
+        return self.parse(tei)
+    
+    @cached_extraction
+    def extract_sections(self, tei_file_path: TEISource) -> List[Section]:
+        """
+        Extract all document sections from TEI XML file.
         
-        root = ET.fromstring(content)
+        Args:
+            tei_file_path: Path to the TEI XML file, a TEIDocument, or a tree
+                returned by parse()
+            
+        Returns:
+            List of Section objects ordered by document structure
+            
+        Raises:
+            FileNotFoundError: If the TEI file doesn't exist
+        """
+        if isinstance(tei_file_path, (str, os.PathLike)):
+            # Stream the file; only one top-level div is materialized at a time
+            sections = []
+            for order, div in self._iterparse(tei_file_path, self._div_tag):
+                section = self._extract_section_from_div(div)
+                if section:
+                    sections.append((order, section))
+            
+            # Nested divs close before their parents; restore document order
+            sections.sort(key=itemgetter(0))
+            return [section for _, section in sections]
+        
+        root = self._get_root(tei_file_path)
         sections = []
         
         # Find all div elements that contain sections
-        for div in root.findall('.//tei:div', self.namespaces):
+        for div in self._divs_xp(root):
             section = self._extract_section_from_div(div)
             if section:
                 sections.append(section)
         
         return sections
     
-    def extract_figures_tables(self, tei_file_path: Path) -> List[FigureTable]:
+    @cached_extraction
+    def extract_figures_tables(self, tei_file_path: TEISource) -> List[FigureTable]:
         """
         Extract all figures and tables with coordinates from TEI XML file.
         
         Args:
-            tei_file_path: Path to the TEI XML file
+            tei_file_path: Path to the TEI XML file, a TEIDocument, or a tree
+                returned by parse()
             
         Returns:
             List of FigureTable objects with coordinate information
@@ -119,23 +301,35 @@ class TEIProcessor:
         Raises:
             FileNotFoundError: If the TEI file doesn't exist
         """
-        try:
-            with open(tei_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except FileNotFoundError:
-            raise FileNotFoundError(f"TEI file not found: {tei_file_path}")
+        if isinstance(tei_file_path, (str, os.PathLike)):
+            # Stream the file; only figure/table subtrees are materialized
+            figures, tables = [], []
+            for order, element in self._iterparse(tei_file_path, self._figure_tag, self._table_tag):
+                if element.tag == self._figure_tag:
+                    fig_table = self._extract_figure_table_from_element(element, 'figure')
+                    if fig_table:
+                        figures.append((order, fig_table))
+                else:
+                    fig_table = self._extract_figure_table_from_element(element, 'table')
+                    if fig_table:
+                        tables.append((order, fig_table))
+            
+            # Nested elements close before their parents; restore document order
+            figures.sort(key=itemgetter(0))
+            tables.sort(key=itemgetter(0))
+            return [fig_table for _, fig_table in figures + tables]
         
-        root = ET.fromstring(content)
+        root = self._get_root(tei_file_path)
         figures_tables = []
         
         # Find all figure elements
-        for figure in root.findall('.//tei:figure', self.namespaces):
+        for figure in self._figures_xp(root):
             fig_table = self._extract_figure_table_from_element(figure, 'figure')
             if fig_table:
                 figures_tables.append(fig_table)
         
         # Find all table elements  
-        for table in root.findall('.//tei:table', self.namespaces):
+        for table in self._tables_xp(root):
             fig_table = self._extract_figure_table_from_element(table, 'table')
             if fig_table:
                 figures_tables.append(fig_table)
@@ -152,9 +346,33 @@ class TEIProcessor:
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for section in sections:
-                f.write(section.to_markdown())
+        # Sections are small; encode the whole document and write it at once
+        markdown = ''.join(section.to_markdown() for section in sections)
+        output_path.write_bytes(markdown.encode('utf-8'))
+    
+    def open_pdf(self, pdf_path: Path):
+        """
+        Open a PDF once so several regions can be cropped without reopening it.
+        
+        The returned PyMuPDF document can be used as a context manager and
+        passed to crop_figure_from_pdf/crop_graphic_from_pdf instead of a path.
+        
+        Args:
+            pdf_path: Path to the source PDF file
+            
+        Returns:
+            Open fitz.Document
+            
+        Raises:
+            ImportError: If PyMuPDF is not installed
+            FileNotFoundError: If the PDF file doesn't exist
+        """
+        fitz = self._import_fitz()
+        
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        return fitz.open(str(pdf_path))
     
     def crop_figure_from_pdf(
         self, 
@@ -167,7 +385,7 @@ class TEIProcessor:
         
         Args:
             figure: FigureTable object with coordinates
-            pdf_path: Path to the source PDF file
+            pdf_path: Path to the source PDF file, or a document from open_pdf()
             output_path: Path where to save the cropped image
         """
         self._crop_pdf_region(
@@ -177,12 +395,14 @@ class TEIProcessor:
             output_path=output_path
         )
     
-    def extract_graphics(self, tei_file_path: Path) -> List[Graphic]:
+    @cached_extraction
+    def extract_graphics(self, tei_file_path: TEISource) -> List[Graphic]:
         """
         Extract all graphic elements with coordinates from TEI XML file.
         
         Args:
-            tei_file_path: Path to the TEI XML file
+            tei_file_path: Path to the TEI XML file, a TEIDocument, or a tree
+                returned by parse()
             
         Returns:
             List of Graphic objects with coordinate information
@@ -190,36 +410,78 @@ class TEIProcessor:
         Raises:
             FileNotFoundError: If the TEI file doesn't exist
         """
+        if isinstance(tei_file_path, (str, os.PathLike)):
+            # Stream the file; only figure subtrees are materialized
+            ordered = [
+                (order, self._extract_figure_graphics(figure))
+                for order, figure in self._iterparse(tei_file_path, self._figure_tag)
+            ]
+            ordered.sort(key=itemgetter(0))
+            return [graphic for _, figure_graphics in ordered for graphic in figure_graphics]
+        
+        root = self._get_root(tei_file_path)
+        graphics = []
+        
+        # Find all figure elements and extract graphics from them
+        for figure in self._figures_xp(root):
+            graphics.extend(self._extract_figure_graphics(figure))
+        
+        return graphics
+    
+    def _extract_figure_graphics(self, figure: etree._Element) -> List[Graphic]:
+        """Extract the graphics of a figure element, captioned with the figure's caption."""
+        # Get figure caption first
+        head = self._first(self._head_xp, figure)
+        figdesc = self._first(self._figdesc_xp, figure)
+        
+        caption_parts = []
+        if head is not None:
+            caption_parts.append(self._get_element_text(head))
+        if figdesc is not None:
+            caption_parts.append(self._get_element_text(figdesc))
+        
+        figure_caption = ' '.join(caption_parts).strip()
+        
+        # Find graphics within this figure
+        graphics = []
+        for graphic in self._graphics_xp(figure):
+            graphic_obj = self._extract_graphic_from_element(graphic, figure_caption)
+            if graphic_obj:
+                graphics.append(graphic_obj)
+        return graphics
+    
+    def _iterparse(self, tei_file_path: Path, *tags: str) -> Iterator[Tuple[int, etree._Element]]:
+        """
+        Stream elements with the given tags from a TEI file.
+        
+        Each element is yielded once it is complete, together with its position
+        in document order. Once the outermost matched element has been
+        processed it is cleared and its preceding siblings are dropped, so
+        memory stays bounded by the largest section or figure rather than the
+        document.
+        """
         try:
-            with open(tei_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            events = etree.iterparse(os.fspath(tei_file_path), events=('start', 'end'), tag=tags,
+                                     remove_comments=True, remove_pis=True, huge_tree=True)
         except FileNotFoundError:
             raise FileNotFoundError(f"TEI file not found: {tei_file_path}")
         
-        root = ET.fromstring(content)
-        graphics = []
-        
-        # Find all figure elements and extract graphics from them
-        for figure in root.findall('.//tei:figure', self.namespaces):
-            # Get figure caption first
-            head = figure.find('./tei:head', self.namespaces)
-            figdesc = figure.find('./tei:figDesc', self.namespaces)
-            
-            caption_parts = []
-            if head is not None:
-                caption_parts.append(self._get_element_text(head))
-            if figdesc is not None:
-                caption_parts.append(self._get_element_text(figdesc))
+        open_elements = []
+        started = 0
+        for event, element in events:
+            if event == 'start':
+                open_elements.append(started)
+                started += 1
+                continue
             
-            figure_caption = ' '.join(caption_parts).strip()
+            yield open_elements.pop(), element
             
-            # Find graphics within this figure
-            for graphic in figure.findall('./tei:graphic', self.namespaces):
-                graphic_obj = self._extract_graphic_from_element(graphic, figure_caption)
-                if graphic_obj:
-                    graphics.append(graphic_obj)
-        
-        return graphics
+            # Elements inside a matched ancestor are still needed by it
+            if not open_elements:
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while element.getprevious() is not None:
+                    del parent[0]
 
     def crop_graphic_from_pdf(
         self, 
@@ -232,7 +494,7 @@ class TEIProcessor:
         
         Args:
             graphic: Graphic object with coordinates
-            pdf_path: Path to the source PDF file
+            pdf_path: Path to the source PDF file, or a document from open_pdf()
             output_path: Path where to save the cropped image
         """
         self._crop_pdf_region(
@@ -241,11 +503,72 @@ class TEIProcessor:
             coordinates=graphic.coordinates,
             output_path=output_path
         )
+    
+    def crop_regions(
+        self,
+        pdf_path: Path,
+        crops: List[Tuple[Union[FigureTable, Graphic], Path]],
+        max_workers: int = 1
+    ) -> List[Optional[str]]:
+        """
+        Crop several figures/tables/graphics from one PDF.
+        
+        Crops are grouped by page so each page is rasterized only once.
+        PyMuPDF documents must not be shared between threads, so with
+        ``max_workers > 1`` the pages are spread over a process pool in which
+        every worker opens its own copy of the PDF. Otherwise they are
+        rendered sequentially from a single open document.
+        
+        Args:
+            pdf_path: Path to the source PDF file, or a document from open_pdf()
+            crops: (figure or graphic, output path) pairs to crop
+            max_workers: Maximum number of worker processes
+            
+        Returns:
+            One entry per crop, in input order: None on success, otherwise
+            the error message
+        """
+        if not crops:
+            return []
+        
+        fitz = self._import_fitz()
+        
+        # Group crop indices by page, keeping pages in first-seen order
+        pages: Dict[int, List[int]] = {}
+        for index, (region, _) in enumerate(crops):
+            pages.setdefault(region.page, []).append(index)
+        jobs = [
+            (page, [(crops[i][0].coordinates, crops[i][1]) for i in indices])
+            for page, indices in pages.items()
+        ]
+        
+        if max_workers > 1 and len(jobs) > 1:
+            if isinstance(pdf_path, fitz.Document):
+                pdf_path = pdf_path.name
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(jobs)),
+                mp_context=pool_context(__name__),
+                initializer=_init_crop_worker,
+                initargs=(str(pdf_path), self.dpi)
+            ) as executor:
+                page_errors = list(executor.map(_crop_page_in_worker, jobs))
+        else:
+            with ExitStack() as stack:
+                doc = pdf_path
+                if not isinstance(pdf_path, fitz.Document):
+                    doc = stack.enter_context(self.open_pdf(Path(pdf_path)))
+                page_errors = [self._crop_page_regions(doc, page, regions) for page, regions in jobs]
+        
+        errors: List[Optional[str]] = [None] * len(crops)
+        for indices, job_errors in zip(pages.values(), page_errors):
+            for index, error in zip(indices, job_errors):
+                errors[index] = error
+        return errors
 
-    def _extract_section_from_div(self, div_element: ET.Element) -> Optional[Section]:
+    def _extract_section_from_div(self, div_element: etree._Element) -> Optional[Section]:
         """Extract section information from a div element."""
         # Find the head element for section title and number
-        head = div_element.find('./tei:head', self.namespaces)
+        head = self._first(self._head_xp, div_element)
         if head is None:
             return None
         
@@ -277,7 +600,7 @@ class TEIProcessor:
     
     def _extract_figure_table_from_element(
         self, 
-        element: ET.Element, 
+        element: etree._Element, 
         element_type: str
     ) -> Optional[FigureTable]:
         """Extract figure/table information from an element."""
@@ -296,8 +619,8 @@ class TEIProcessor:
             return None
         
         # Extract caption
-        head = element.find('./tei:head', self.namespaces)
-        figdesc = element.find('./tei:figDesc', self.namespaces)
+        head = self._first(self._head_xp, element)
+        figdesc = self._first(self._figdesc_xp, element)
         
         caption_parts = []
         if head is not None:
@@ -327,56 +650,52 @@ class TEIProcessor:
         if not coords_str:
             return None
         
-        # Split by semicolons to get all bounding boxes
-        boxes = coords_str.split(';')
-        valid_boxes = []
+        # Track the encompassing bounding box in a single pass over the boxes
         page = None
+        min_x = min_y = float('inf')
+        max_x = max_y = float('-inf')
         
-        for box_str in boxes:
+        for box_str in coords_str.split(';'):
+            parts = box_str.split(',', 5)
+            if len(parts) < 5:
+                continue
             try:
-                parts = box_str.split(',')
-                if len(parts) >= 5:
-                    box_page = int(parts[0])
-                    box_x = float(parts[1])
-                    box_y = float(parts[2])
-                    box_width = float(parts[3])
-                    box_height = float(parts[4])
-                    
-                    # All boxes should be on the same page
-                    if page is None:
-                        page = box_page
-                    elif page != box_page:
-                        continue  # Skip boxes on different pages
-                    
-                    # Calculate bounding box coordinates (x1, y1, x2, y2)
-                    x1 = box_x
-                    y1 = box_y
-                    x2 = box_x + box_width
-                    y2 = box_y + box_height
-                    
-                    valid_boxes.append((x1, y1, x2, y2))
-                    
-            except (ValueError, IndexError):
+                box_page = int(parts[0])
+                box_x = float(parts[1])
+                box_y = float(parts[2])
+                box_width = float(parts[3])
+                box_height = float(parts[4])
+            except ValueError:
                 continue
-        
-        if not valid_boxes or page is None:
+            
+            # All boxes should be on the same page
+            if page is None:
+                page = box_page
+            elif page != box_page:
+                continue  # Skip boxes on different pages
+            
+            if box_x < min_x:
+                min_x = box_x
+            if box_y < min_y:
+                min_y = box_y
+            if box_x + box_width > max_x:
+                max_x = box_x + box_width
+            if box_y + box_height > max_y:
+                max_y = box_y + box_height
+        
+        if page is None:
             return None
         
-        # Find the encompassing bounding box
-        min_x = min(box[0] for box in valid_boxes)
-        min_y = min(box[1] for box in valid_boxes)
-        max_x = max(box[2] for box in valid_boxes)
-        max_y = max(box[3] for box in valid_boxes)
-        
         # Convert back to (x, y, width, height) format
-        x = min_x
-        y = min_y
-        width = max_x - min_x
-        height = max_y - min_y
-        
-        return (page, x, y, width, height)
+        return (page, min_x, min_y, max_x - min_x, max_y - min_y)
+    
+    @staticmethod
+    def _first(xpath: etree.XPath, element: etree._Element) -> Optional[etree._Element]:
+        """Return the first match of a compiled XPath, or None."""
+        matches = xpath(element)
+        return matches[0] if matches else None
     
-    def _get_element_text(self, element: ET.Element) -> str:
+    def _get_element_text(self, element: etree._Element) -> str:
         """Extract all text content from an element, including nested elements."""
         if element.text:
             text = element.text
@@ -400,43 +719,116 @@ class TEIProcessor:
         """
         Crop a region from PDF page and save as image.
         
-        This method uses PyMuPDF (fitz) to extract the region.
+        This method uses PyMuPDF (fitz) to extract the region. ``pdf_path`` may
+        be a path, which is opened and closed here, or an already open document.
         """
-        try:
-            import fitz  # PyMuPDF
-        except ImportError:
-            raise ImportError(
-                "PyMuPDF is required for PDF cropping. Install with: pip install PyMuPDF"
-            )
+        fitz = self._import_fitz()
         
-        if not pdf_path.exists():
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-        
-        x, y, width, height = coordinates
+        if isinstance(pdf_path, fitz.Document):
+            self._render_region(fitz, pdf_path, page, coordinates, output_path)
+            return
         
         # Open PDF
-        doc = fitz.open(str(pdf_path))
+        doc = self.open_pdf(Path(pdf_path))
         
         try:
-            # Get the page (GROBID uses 1-based page numbers)
-            page_obj = doc[page - 1]
-            
-            # Create rectangle for cropping
-            # Note: fitz uses (x0, y0, x1, y1) format
-            rect = fitz.Rect(x, y, x + width, y + height)
-            
-            # Get the pixmap (image) of the cropped region
-            mat = fitz.Matrix(2.0, 2.0)  # 2x scaling for better quality
-            pix = page_obj.get_pixmap(matrix=mat, clip=rect)
-            
-            # Save as PNG
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            pix.save(str(output_path))
-            
+            self._render_region(fitz, doc, page, coordinates, output_path)
         finally:
             doc.close()
     
-    def _extract_graphic_from_element(self, element: ET.Element, figure_caption: str = "") -> Optional[Graphic]:
+    def _crop_page_regions(
+        self,
+        doc,
+        page: int,
+        regions: List[Tuple[Tuple[float, float, float, float], Path]]
+    ) -> List[Optional[str]]:
+        """
+        Crop several regions of one page of an open PDF document.
+        
+        The bounding box of all regions is rendered once and each region is
+        copied out of that pixmap, so the page content is only interpreted
+        once however many figures it holds.
+        
+        Returns:
+            One entry per region: None on success, otherwise the error message
+        """
+        if len(regions) == 1:
+            coordinates, output_path = regions[0]
+            try:
+                self._crop_pdf_region(doc, page, coordinates, output_path)
+            except Exception as e:
+                return [str(e)]
+            return [None]
+        
+        fitz = self._import_fitz()
+        mat = fitz.Matrix(self.dpi / 72, self.dpi / 72)
+        clips = [fitz.Rect(x, y, x + width, y + height) for (x, y, width, height), _ in regions]
+        
+        try:
+            bbox = fitz.Rect(clips[0])
+            for clip in clips[1:]:
+                bbox |= clip
+            page_pix = doc[page - 1].get_pixmap(matrix=mat, clip=bbox)
+        except Exception as e:
+            return [str(e)] * len(regions)
+        
+        errors: List[Optional[str]] = []
+        for clip, (_, output_path) in zip(clips, regions):
+            try:
+                irect = (clip * mat).round() & page_pix.irect
+                if irect.is_empty:
+                    raise ValueError(f"Region {tuple(clip)} lies outside page {page}")
+                pix = fitz.Pixmap(page_pix.colorspace, irect, page_pix.alpha)
+                pix.copy(page_pix, irect)
+                
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                pix.save(str(output_path), jpg_quality=self.JPEG_QUALITY)
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+    
+    def _render_region(
+        self,
+        fitz,
+        doc,
+        page: int,
+        coordinates: Tuple[float, float, float, float],
+        output_path: Path
+    ) -> None:
+        """Render a region of an open PDF document and save it as an image.
+        
+        The image format follows the output file extension (PNG or JPEG).
+        """
+        x, y, width, height = coordinates
+        
+        # Get the page (GROBID uses 1-based page numbers)
+        page_obj = doc[page - 1]
+        
+        # Create rectangle for cropping
+        # Note: fitz uses (x0, y0, x1, y1) format
+        rect = fitz.Rect(x, y, x + width, y + height)
+        
+        # Render only the cropped region, scaled from 72 points per inch
+        mat = fitz.Matrix(self.dpi / 72, self.dpi / 72)
+        pix = page_obj.get_pixmap(matrix=mat, clip=rect)
+        
+        # Save in the format named by the extension
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        pix.save(str(output_path), jpg_quality=self.JPEG_QUALITY)
+    
+    @staticmethod
+    def _import_fitz():
+        """Import PyMuPDF, which is only needed for PDF cropping."""
+        try:
+            import fitz  # PyMuPDF
+        except ImportError:
+            raise ImportError(
+                "PyMuPDF is required for PDF cropping. Install with: pip install PyMuPDF"
+            )
+        return fitz
+    
+    def _extract_graphic_from_element(self, element: etree._Element, figure_caption: str = "") -> Optional[Graphic]:
         """Extract graphic information from a graphic element."""
         coords_attr = element.get('coords')
         graphic_type = element.get('type', 'unknown')
@@ -467,3 +859,23 @@ class TEIProcessor:
             height=height,
             parent_figure_caption=parent_caption
         )
+
+
+# Per-process state for TEIProcessor.crop_regions() workers
+_worker_processor: Optional[TEIProcessor] = None
+_worker_document = None
+
+
+def _init_crop_worker(pdf_path: str, dpi: int) -> None:
+    """Open the PDF once in each crop worker process."""
+    global _worker_processor, _worker_document
+    _worker_processor = TEIProcessor(dpi=dpi)
+    _worker_document = _worker_processor.open_pdf(Path(pdf_path))
+
+
+def _crop_page_in_worker(
+    job: Tuple[int, List[Tuple[Tuple[float, float, float, float], Path]]]
+) -> List[Optional[str]]:
+    """Crop the regions of one page in a worker process."""
+    page, regions = job
+    return _worker_processor._crop_page_regions(_worker_document, page, regions)
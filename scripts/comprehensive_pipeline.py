@@ -16,22 +16,73 @@ Features:
 """
 
 import argparse
+import itertools
 import logging
 import sys
+from glob import iglob
 from pathlib import Path
+from typing import Iterable, Iterator, List
 
 # Add parent directory to Python path for package imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from interactive_paper_reading.pipeline import PaperProcessingPipeline
-
-# Configure logging
+# Configure logging; the format uses no thread/process fields, so skip
+# collecting them for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Accepted input extensions, compared against casefolded suffixes
+PDF_SUFFIXES = frozenset({".pdf"})
+GLOB_CHARS = frozenset("*?[")
+
+
+def discover_pdfs(patterns: Iterable[str]) -> Iterator[Path]:
+    """Lazily yield the PDF files named by paths or glob patterns."""
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.suffix.casefold() in PDF_SUFFIXES and path.is_file():
+            yield path
+        elif GLOB_CHARS.intersection(pattern):
+            # Handle glob patterns
+            for match in iglob(pattern):
+                path = Path(match)
+                if path.suffix.casefold() in PDF_SUFFIXES:
+                    yield path
+        else:
+            logger.warning(f"Skipping non-PDF file: {pattern}")
+
+
+def print_summary(results: List[dict], output_dir: Path) -> None:
+    """Print the final processing summary for a run."""
+    successful = sum(1 for r in results if r['success'])
+    failed = len(results) - successful
+
+    summary = [
+        "\n" + "="*80,
+        "📊 PROCESSING SUMMARY",
+        "="*80,
+        f"✅ Successful: {successful}",
+        f"❌ Failed: {failed}",
+    ]
+
+    if failed > 0:
+        summary.append("\n❌ FAILED FILES:")
+        summary.extend(
+            f"  - {result['pdf_path'].name}: {'; '.join(result['errors'])}"
+            for result in results if not result['success']
+        )
+
+    summary.append(f"\n📁 Output directory: {output_dir}")
+    summary.append("="*80)
+    # Emit the whole summary with one write
+    print("\n".join(summary))
+
 
 def main():
     """Main function for command-line usage."""
@@ -49,6 +100,9 @@ Examples:
   # Batch process directory
   python comprehensive_pipeline.py ./papers/*.pdf --output ./output --batch
   
+  # Batch process using 4 extraction processes
+  python comprehensive_pipeline.py ./papers/*.pdf --output ./output --batch --jobs 4
+  
   # Skip figure extraction
   python comprehensive_pipeline.py paper.pdf --output ./output --no-figures
   
@@ -66,12 +120,29 @@ Examples:
     parser.add_argument("--llm-endpoint", help="LLM API endpoint")
     parser.add_argument("--llm-model", help="LLM model name")
     parser.add_argument("--llm-token", help="LLM API token")
+    parser.add_argument("--llm-cache-dir", default="~/.cache/paper_analyzer",
+                        help="Directory caching LLM responses by model and prompt "
+                             "(default: ~/.cache/paper_analyzer)")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Always call the LLM instead of reusing cached responses")
     parser.add_argument("--no-figures", action="store_true", 
                         help="Skip figure/table extraction")
     parser.add_argument("--no-graphics", action="store_true", 
                         help="Skip graphics extraction")
     parser.add_argument("--batch", action="store_true", 
                         help="Process files in batch mode")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of processes for TEI extraction and cropping in batch mode")
+    parser.add_argument("--crop-workers", type=int, default=1,
+                        help="Number of processes used to crop figures from each paper")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-run GROBID even for PDFs whose TEI output is up to date")
+    parser.add_argument("--cache-extractions", action="store_true",
+                        help="Cache parsed TEI sections/figures on disk to speed up re-runs")
+    parser.add_argument("--image-format", choices=["png", "jpeg"], default="png",
+                        help="Format of cropped figures; jpeg is faster to encode (default: png)")
+    parser.add_argument("--dpi", type=int, default=144,
+                        help="Resolution of cropped figures; lower is faster (default: 144)")
     parser.add_argument("--verbose", "-v", action="store_true", 
                         help="Enable verbose logging")
     parser.add_argument("--quiet", "-q", action="store_true", 
@@ -85,6 +156,11 @@ Examples:
     elif args.quiet:
         logging.getLogger().setLevel(logging.ERROR)
     
+    # Imported after argument parsing so --help and usage errors don't pay
+    # for loading requests, lxml and grobid_client
+    from interactive_paper_reading.pipeline import PaperProcessingPipeline
+    
+    pipeline = None
     try:
         # Initialize pipeline
         pipeline = PaperProcessingPipeline(
@@ -92,66 +168,49 @@ Examples:
             analyze_with_llm=args.analyze,
             llm_endpoint=args.llm_endpoint,
             llm_model=args.llm_model,
-            llm_token=args.llm_token
+            llm_token=args.llm_token,
+            crop_workers=args.crop_workers,
+            force=args.force,
+            cache_extractions=args.cache_extractions,
+            image_format=args.image_format,
+            dpi=args.dpi,
+            llm_cache_dir=None if args.no_llm_cache else Path(args.llm_cache_dir).expanduser()
         )
         
-        # Validate input files
-        pdf_files = []
-        for pdf_pattern in args.pdf_files:
-            pdf_path = Path(pdf_pattern)
-            if pdf_path.is_file() and pdf_path.suffix.lower() == '.pdf':
-                pdf_files.append(pdf_path)
-            elif '*' in pdf_pattern:
-                # Handle glob patterns
-                from glob import glob
-                matching_files = [Path(f) for f in glob(pdf_pattern) 
-                                 if Path(f).suffix.lower() == '.pdf']
-                pdf_files.extend(matching_files)
-            else:
-                logger.warning(f"Skipping non-PDF file: {pdf_pattern}")
+        # Discover input files lazily; only peek far enough to pick the mode
+        pdf_files = discover_pdfs(args.pdf_files)
+        first_files = list(itertools.islice(pdf_files, 2))
         
-        if not pdf_files:
+        if not first_files:
             logger.error("No valid PDF files found")
             return 1
         
         output_dir = Path(args.output)
         
         # Process files
-        if args.batch or len(pdf_files) > 1:
+        if args.batch or len(first_files) > 1:
             results = pipeline.process_batch(
-                pdf_files,
+                itertools.chain(first_files, pdf_files),
                 output_dir,
                 extract_figures=not args.no_figures,
-                extract_graphics=not args.no_graphics
+                extract_graphics=not args.no_graphics,
+                jobs=args.jobs
             )
         else:
             # Single file processing
             result = pipeline.process_single_paper(
-                pdf_files[0],
+                first_files[0],
                 output_dir,
                 extract_figures=not args.no_figures,
                 extract_graphics=not args.no_graphics
             )
             results = [result]
         
-        # Print final summary
-        successful = sum(1 for r in results if r['success'])
-        failed = len(results) - successful
-        
-        print("\n" + "="*80)
-        print("📊 PROCESSING SUMMARY")
-        print("="*80)
-        print(f"✅ Successful: {successful}")
-        print(f"❌ Failed: {failed}")
-        
-        if failed > 0:
-            print("\n❌ FAILED FILES:")
-            for result in results:
-                if not result['success']:
-                    print(f"  - {result['pdf_path'].name}: {'; '.join(result['errors'])}")
+        failed = sum(1 for r in results if not r['success'])
         
-        print(f"\n📁 Output directory: {output_dir}")
-        print(f"{'='*80}")
+        # Failures are already logged as errors, so --quiet skips the summary
+        if not args.quiet:
+            print_summary(results, output_dir)
         
         return 0 if failed == 0 else 1
         
@@ -164,6 +223,9 @@ Examples:
             import traceback
             traceback.print_exc()
         return 1
+    finally:
+        if pipeline is not None:
+            pipeline.close()
 
 
 if __name__ == "__main__":
@@ -11,12 +11,28 @@ from unittest.mock import patch, MagicMock, mock_open
 import json
 import requests
 
-from interactive_paper_reading.grobid import GrobidProcessor
+from interactive_paper_reading.grobid import (
+    GrobidProcessor, _shared_grobid_client, atomic_write, file_sha256, tei_is_current,
+    write_tei_hash
+)
 
 
 class TestGrobidProcessor:
     """Test cases for GrobidProcessor."""
 
+    @pytest.fixture(autouse=True)
+    def clear_client_cache(self):
+        """Keep shared GrobidClient mocks from leaking between tests."""
+        _shared_grobid_client.cache_clear()
+        yield
+        _shared_grobid_client.cache_clear()
+
+    @pytest.fixture(autouse=True)
+    def plain_multipart_upload(self):
+        """Use requests' own multipart upload unless a test opts into streaming."""
+        with patch('interactive_paper_reading.grobid.MultipartEncoder', None):
+            yield
+
     @pytest.fixture
     def default_config(self):
         """Default configuration for GROBID processor."""
@@ -28,6 +44,12 @@ class TestGrobidProcessor:
             'coordinates': ['persName', 'figure', 'ref', 'biblStruct', 'formula', 's']
         }
 
+    @pytest.fixture
+    def mock_replace(self):
+        """Skip moving the temp TEI into place for tests that mock open()."""
+        with patch('interactive_paper_reading.grobid.os.replace') as mock_replace:
+            yield mock_replace
+
     @pytest.fixture
     def processor(self, default_config):
         """Create a GrobidProcessor instance for testing."""
@@ -49,6 +71,59 @@ class TestGrobidProcessor:
             processor = GrobidProcessor(config_path=str(config_file))
             assert processor.config_path == str(config_file)
 
+    def test_processor_initialization_loads_config_file(self, tmp_path):
+        """Test that settings from a config file are available to the direct HTTP path."""
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps({'grobid_server': 'http://remote:8070', 'timeout': 30}))
+        
+        with patch('interactive_paper_reading.grobid.GrobidClient'):
+            processor = GrobidProcessor(config_path=str(config_file))
+        
+        assert processor.config['grobid_server'] == 'http://remote:8070'
+        assert processor.config['timeout'] == 30
+        assert 'coordinates' in processor.config
+
+    def test_processor_initialization_configures_client_in_memory(self):
+        """Test that the default config is passed to GrobidClient without a temp file."""
+        with patch('interactive_paper_reading.grobid.GrobidClient') as mock_client:
+            with patch('builtins.open') as mock_file:
+                processor = GrobidProcessor(server_url='http://custom:8070')
+        
+        mock_file.assert_not_called()
+        assert processor.config_path is None
+        mock_client.assert_called_once_with(
+            grobid_server='http://custom:8070',
+            queue_size=processor.config['batch_size'],
+            coordinates=processor.config['coordinates'],
+            sleep_time=processor.config['sleep_time'],
+            timeout=processor.config['timeout']
+        )
+
+    def test_processor_initialization_with_batch_settings(self):
+        """Test that batch_size and sleep_time default low and can be overridden."""
+        with patch('interactive_paper_reading.grobid.GrobidClient') as mock_client:
+            processor = GrobidProcessor()
+            tuned = GrobidProcessor(batch_size=1000, sleep_time=10)
+        
+        assert processor.config['batch_size'] == 64
+        assert processor.config['sleep_time'] == 2
+        assert tuned.config['batch_size'] == 1000
+        assert mock_client.call_args_list[0].kwargs['queue_size'] == 64
+        assert mock_client.call_args.kwargs['queue_size'] == 1000
+        assert mock_client.call_args.kwargs['sleep_time'] == 10
+
+    def test_processors_share_client_per_configuration(self):
+        """Test that processors with the same settings reuse one GrobidClient."""
+        with patch('interactive_paper_reading.grobid.GrobidClient',
+                   side_effect=lambda **kwargs: MagicMock()) as mock_client:
+            first = GrobidProcessor(server_url='http://custom:8070')
+            second = GrobidProcessor(server_url='http://custom:8070')
+            other = GrobidProcessor(server_url='http://other:8070')
+        
+        assert first.client is second.client
+        assert other.client is not first.client
+        assert mock_client.call_count == 2
+
     def test_processor_initialization_no_params_raises_error(self):
         """Test that initialization without parameters still works (uses defaults)."""
         # The current implementation actually provides defaults, so this should work
@@ -66,7 +141,7 @@ class TestGrobidProcessor:
         mock_response = MagicMock()
         mock_response.status_code = 200
         
-        with patch('requests.get', return_value=mock_response):
+        with patch.object(processor.session, 'head', return_value=mock_response):
             assert processor.check_server_status() is True
 
     def test_check_server_status_failure(self, processor):
@@ -74,14 +149,22 @@ class TestGrobidProcessor:
         mock_response = MagicMock()
         mock_response.status_code = 500
         
-        with patch('requests.get', return_value=mock_response):
+        with patch.object(processor.session, 'head', return_value=mock_response):
             assert processor.check_server_status() is False
 
     def test_check_server_status_connection_error(self, processor):
         """Test server status check with connection error."""
-        with patch('requests.get', side_effect=requests.ConnectionError()):
+        with patch.object(processor.session, 'head', side_effect=requests.ConnectionError()):
             assert processor.check_server_status() is False
 
+    def test_check_server_status_falls_back_to_get(self, processor):
+        """Test that a server rejecting HEAD is probed with GET instead."""
+        with patch.object(processor.session, 'head', return_value=MagicMock(status_code=405)):
+            with patch.object(processor.session, 'get', return_value=MagicMock(status_code=200)) as mock_get:
+                assert processor.check_server_status() is True
+        
+        mock_get.assert_called_once()
+
     def test_process_pdf_file_not_found(self, processor):
         """Test process_pdf with non-existent file."""
         with pytest.raises(FileNotFoundError, match="PDF path does not exist"):
@@ -103,30 +186,48 @@ class TestGrobidProcessor:
             
         assert result == output_file
 
-    @patch('interactive_paper_reading.grobid.Path.exists')
-    def test_process_pdf_directory_not_implemented(self, mock_exists, processor):
-        """Test that directory processing raises NotImplementedError."""
-        # Mock path as directory
-        mock_path = MagicMock()
-        mock_path.exists.return_value = True
-        mock_path.is_file.return_value = False
-        mock_path.is_dir.return_value = True
-        
-        with patch('interactive_paper_reading.grobid.Path', return_value=mock_path):
-            with pytest.raises(NotImplementedError, match="Directory processing not yet implemented"):
-                processor.process_pdf('/test/directory')
-
-    def test_process_single_pdf_direct_success(self, processor):
+    def test_process_pdf_directory_processes_all_pdfs(self, processor, tmp_path):
+        """Test that directory processing submits every PDF and returns outputs in order."""
+        for name in ('b.pdf', 'a.pdf', 'notes.txt'):
+            (tmp_path / name).write_bytes(b'%PDF-1.4')
+        
+        def fake_process(pdf_file, output_dir, *options):
+            return output_dir / f"{pdf_file.stem}.grobid.tei.xml"
+        
+        with patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process) as mock_process:
+            result = processor.process_pdf(tmp_path, n_workers=2)
+        
+        output_dir = tmp_path / 'grobid_output'
+        assert output_dir.is_dir()
+        assert mock_process.call_count == 2
+        assert result == [output_dir / 'a.grobid.tei.xml', output_dir / 'b.grobid.tei.xml']
+
+    def test_process_pdf_directory_continues_after_failure(self, processor, tmp_path):
+        """Test that one failing PDF does not abort directory processing."""
+        for name in ('good.pdf', 'bad.pdf'):
+            (tmp_path / name).write_bytes(b'%PDF-1.4')
+        
+        def fake_process(pdf_file, output_dir, *options):
+            if pdf_file.stem == 'bad':
+                raise RuntimeError("GROBID server error: 500")
+            return output_dir / f"{pdf_file.stem}.grobid.tei.xml"
+        
+        with patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process):
+            result = processor.process_pdf(tmp_path, tmp_path / 'out')
+        
+        assert result == [tmp_path / 'out' / 'good.grobid.tei.xml']
+
+    def test_process_single_pdf_direct_success(self, processor, mock_replace):
         """Test successful direct HTTP processing of PDF."""
         # Mock successful HTTP response
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b'<TEI>test content</TEI>'
+        mock_response.iter_content.return_value = [b'<TEI>test ', b'content</TEI>']
         
         # Mock file operations
         mock_open_func = mock_open()
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
             with patch('builtins.open', mock_open_func):
                 with patch('pathlib.Path.is_dir', return_value=True):
                     result = processor._process_single_pdf_direct(
@@ -134,8 +235,13 @@ class TestGrobidProcessor:
                         Path('/output')
                     )
         
-        # Verify file was written
-        mock_open_func.assert_called()
+        # Verify the response was streamed to the file chunk by chunk
+        assert mock_post.call_args.kwargs['stream'] is True
+        mock_response.iter_content.assert_called_once_with(chunk_size=processor.stream_chunk_size)
+        handle = mock_open_func()
+        handle.write.assert_any_call(b'<TEI>test ')
+        handle.write.assert_any_call(b'content</TEI>')
+        mock_response.__exit__.assert_called_once()
         assert isinstance(result, Path)
         assert result.name == 'test.grobid.tei.xml'
 
@@ -144,19 +250,33 @@ class TestGrobidProcessor:
         # Mock error response
         mock_response = MagicMock()
         mock_response.status_code = 500
-        mock_response.text = 'Internal Server Error'
+        mock_response.iter_content.return_value = iter([b'Internal Server Error'])
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(processor.session, 'post', return_value=mock_response):
             with patch('builtins.open', mock_open()):
-                with pytest.raises(RuntimeError, match="GROBID server error: 500"):
+                with pytest.raises(RuntimeError, match="GROBID server error: 500 - Internal Server Error"):
                     processor._process_single_pdf_direct(
                         Path('/test.pdf'), 
                         Path('/output')
                     )
 
+    def test_process_single_pdf_direct_server_error_body_truncated(self, processor):
+        """Test that only the start of a large error body is read into the exception."""
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+        mock_response.iter_content.return_value = iter([b'x' * processor.ERROR_BODY_LIMIT, b'y' * 4096])
+        
+        with patch.object(processor.session, 'post', return_value=mock_response):
+            with patch('builtins.open', mock_open()):
+                with pytest.raises(RuntimeError) as exc_info:
+                    processor._process_single_pdf_direct(Path('/test.pdf'), Path('/output'))
+        
+        assert str(exc_info.value) == f"GROBID server error: 500 - {'x' * processor.ERROR_BODY_LIMIT}"
+        mock_response.iter_content.assert_called_once_with(chunk_size=processor.ERROR_BODY_LIMIT)
+
     def test_process_single_pdf_direct_request_timeout(self, processor):
         """Test direct HTTP processing with request timeout."""
-        with patch('requests.post', side_effect=requests.Timeout()):
+        with patch.object(processor.session, 'post', side_effect=requests.Timeout()):
             with patch('builtins.open', mock_open()):
                 with pytest.raises(requests.Timeout):
                     processor._process_single_pdf_direct(
@@ -164,13 +284,13 @@ class TestGrobidProcessor:
                         Path('/output')
                     )
 
-    def test_process_single_pdf_direct_coordinates_parameter(self, processor):
+    def test_process_single_pdf_direct_coordinates_parameter(self, processor, mock_replace):
         """Test that coordinates parameter is properly formatted."""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'<TEI>test content</TEI>'
         
-        with patch('requests.post', return_value=mock_response) as mock_post:
+        with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
             with patch('builtins.open', mock_open()):
                 with patch('pathlib.Path.is_dir', return_value=True):
                     processor._process_single_pdf_direct(
@@ -186,13 +306,13 @@ class TestGrobidProcessor:
         expected_coords = ','.join(processor.config['coordinates'])
         assert call_args.kwargs['data']['teiCoordinates'] == expected_coords
 
-    def test_process_single_pdf_direct_no_coordinates(self, processor):
+    def test_process_single_pdf_direct_no_coordinates(self, processor, mock_replace):
         """Test processing without coordinates."""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'<TEI>test content</TEI>'
         
-        with patch('requests.post', return_value=mock_response) as mock_post:
+        with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
             with patch('builtins.open', mock_open()):
                 with patch('pathlib.Path.is_dir', return_value=True):
                     processor._process_single_pdf_direct(
@@ -206,13 +326,13 @@ class TestGrobidProcessor:
         data = call_args.kwargs.get('data', {})
         assert 'teiCoordinates' not in data or data['teiCoordinates'] == ''
 
-    def test_process_single_pdf_direct_output_to_file(self, processor):
+    def test_process_single_pdf_direct_output_to_file(self, processor, mock_replace):
         """Test processing with specific output file path."""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'<TEI>test content</TEI>'
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(processor.session, 'post', return_value=mock_response):
             with patch('builtins.open', mock_open()) as mock_open_func:
                 with patch('pathlib.Path.is_dir', return_value=False):
                     result = processor._process_single_pdf_direct(
@@ -220,8 +340,10 @@ class TestGrobidProcessor:
                         Path('/output/custom.xml')
                     )
         
-        # Should use the specified output file path
-        mock_open_func.assert_called_with(Path('/output/custom.xml'), 'wb')
+        # Should write the specified output file path via a temp file
+        temp_file = mock_open_func.call_args.args[0]
+        assert temp_file.parent == Path('/output')
+        mock_replace.assert_called_once_with(temp_file, Path('/output/custom.xml'))
         assert result == Path('/output/custom.xml')
 
     def test_default_config_creation(self, processor):
@@ -279,13 +401,13 @@ class TestGrobidProcessor:
         )
         assert result == output_file
 
-    def test_process_single_pdf_direct_consolidation_parameters(self, processor):
+    def test_process_single_pdf_direct_consolidation_parameters(self, processor, mock_replace):
         """Test that consolidation parameters are properly set."""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'<TEI>test content</TEI>'
         
-        with patch('requests.post', return_value=mock_response) as mock_post:
+        with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
             with patch('builtins.open', mock_open()):
                 with patch('pathlib.Path.is_dir', return_value=True):
                     processor._process_single_pdf_direct(
@@ -304,3 +426,597 @@ class TestGrobidProcessor:
         assert data['consolidateCitations'] == '1'
         assert data['generateIDs'] == '1'
         assert data['segmentSentences'] == '1'
+
+    def test_session_reused_across_requests(self, processor):
+        """Test that all requests go through the same keep-alive session."""
+        mock_response = MagicMock()
+        mock_response.status_code = 503  # Failed probes are not cached
+        
+        with patch.object(processor.session, 'head', return_value=mock_response) as mock_head:
+            processor.check_server_status()
+            processor.check_server_status()
+        
+        assert mock_head.call_count == 2
+        assert processor.session.headers['Connection'] == 'keep-alive'
+        assert processor.session.get_adapter('http://localhost:8070') is \
+            processor.session.get_adapter('https://localhost:8070')
+
+    def test_directory_processing_keeps_shared_connection_pool(self, processor, tmp_path, caplog):
+        """Test that more directory workers than pooled connections leave the session untouched."""
+        for i in range(3):
+            (tmp_path / f'paper{i}.pdf').write_bytes(b'%PDF')
+        (tmp_path / 'notes.txt').write_text('not a pdf')
+        (tmp_path / 'folder.pdf').mkdir()
+        adapter = processor.session.get_adapter('http://localhost:8070')
+        
+        with patch.object(processor, '_process_single_pdf_direct',
+                          side_effect=lambda pdf, out, *options: out / f'{pdf.stem}.tei.xml'):
+            outputs = processor._process_directory_direct(tmp_path, tmp_path / 'out', 64)
+        
+        assert [p.name for p in outputs] == ['paper0.tei.xml', 'paper1.tei.xml', 'paper2.tei.xml']
+        assert processor.pool_size == 32
+        assert processor.session.get_adapter('http://localhost:8070') is adapter
+        assert "exceed the 32 pooled GROBID connections" in caplog.text
+
+    def test_directory_processing_bounds_queued_pdfs(self, processor, tmp_path):
+        """Test that the directory is read no further ahead of the workers than the backlog."""
+        for i in range(20):
+            (tmp_path / f'paper{i:02d}.pdf').write_bytes(b'%PDF')
+        
+        finished = []
+        ahead = []
+        read_pdfs = GrobidProcessor._iter_directory_pdfs
+        
+        def tracked_pdfs(pdf_dir):
+            for count, pdf in enumerate(read_pdfs(pdf_dir)):
+                ahead.append(count - len(finished))
+                yield pdf
+        
+        def fake_process(pdf, out, *options):
+            finished.append(pdf)
+            return out / f'{pdf.stem}.tei.xml'
+        
+        with patch.object(processor, '_iter_directory_pdfs', side_effect=tracked_pdfs), \
+             patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process):
+            outputs = processor._process_directory_direct(tmp_path, tmp_path / 'out', 2)
+        
+        assert [p.name for p in outputs] == [f'paper{i:02d}.tei.xml' for i in range(20)]
+        assert max(ahead) <= 2 * processor.SUBMIT_BACKLOG
+
+    def test_directory_processing_bounds_queued_pdfs_by_batch_size(self, tmp_path):
+        """Test that batch_size caps the PDFs queued or in flight in directory mode."""
+        for i in range(10):
+            (tmp_path / f'paper{i}.pdf').write_bytes(b'%PDF')
+        with patch('interactive_paper_reading.grobid.GrobidClient'):
+            processor = GrobidProcessor(batch_size=3)
+        
+        finished = []
+        ahead = []
+        read_pdfs = GrobidProcessor._iter_directory_pdfs
+        
+        def tracked_pdfs(pdf_dir):
+            for count, pdf in enumerate(read_pdfs(pdf_dir)):
+                ahead.append(count - len(finished))
+                yield pdf
+        
+        def fake_process(pdf, out, *options):
+            finished.append(pdf)
+            return out / f'{pdf.stem}.tei.xml'
+        
+        with patch.object(processor, '_iter_directory_pdfs', side_effect=tracked_pdfs), \
+             patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process):
+            outputs = processor._process_directory_direct(tmp_path, tmp_path / 'out', 8)
+        
+        assert len(outputs) == 10
+        assert max(ahead) <= 3
+
+    def test_directory_processing_reuses_tei_of_duplicate_pdfs(self, processor, tmp_path):
+        """Test that PDFs with already-converted content are not sent to GROBID again."""
+        pdf_dir = tmp_path / 'pdfs'
+        pdf_dir.mkdir()
+        (pdf_dir / 'paper.pdf').write_bytes(b'%PDF-1.4 paper')
+        out_dir = tmp_path / 'out'
+        
+        def fake_process(pdf, out, *options):
+            output_file = out / f'{pdf.stem}.grobid.tei.xml'
+            output_file.write_text(f'<TEI>{pdf.stem}</TEI>')
+            return output_file
+        
+        with patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process) as mock_process:
+            processor.process_pdf(pdf_dir, out_dir, deduplicate=True)
+            (pdf_dir / 'copy.pdf').write_bytes(b'%PDF-1.4 paper')
+            outputs = processor.process_pdf(pdf_dir, out_dir, deduplicate=True)
+        
+        assert mock_process.call_count == 1
+        assert outputs == [out_dir / 'copy.grobid.tei.xml', out_dir / 'paper.grobid.tei.xml']
+        assert outputs[0].read_text() == '<TEI>paper</TEI>'
+        manifest = json.loads((out_dir / GrobidProcessor.MANIFEST_NAME).read_text())
+        assert list(manifest['teiCoordinates=' + '%2C'.join(processor.config['coordinates'])].values()) == \
+            ['paper.grobid.tei.xml']
+
+    def test_directory_processing_deduplicates_per_option_set(self, processor, tmp_path):
+        """Test that changed options or deduplicate=False convert the PDF again."""
+        (tmp_path / 'paper.pdf').write_bytes(b'%PDF-1.4')
+        out_dir = tmp_path / 'out'
+        
+        def fake_process(pdf, out, *options):
+            output_file = out / f'{pdf.stem}.grobid.tei.xml'
+            output_file.write_text('<TEI/>')
+            return output_file
+        
+        with patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process) as mock_process:
+            processor.process_pdf(tmp_path, out_dir, deduplicate=True)
+            processor.process_pdf(tmp_path, out_dir, consolidate_header=True, deduplicate=True)
+            processor.process_pdf(tmp_path, out_dir)
+            processor.process_pdf(tmp_path, out_dir, deduplicate=True)
+        
+        assert mock_process.call_count == 3
+
+    def test_directory_processing_does_not_deduplicate_by_default(self, processor, tmp_path):
+        """Test that no manifest is written unless deduplication is requested."""
+        (tmp_path / 'paper.pdf').write_bytes(b'%PDF-1.4')
+        out_dir = tmp_path / 'out'
+        
+        with patch.object(processor, '_process_single_pdf_direct',
+                          side_effect=lambda pdf, out, *options: out / f'{pdf.stem}.grobid.tei.xml') as mock_process:
+            processor.process_pdf(tmp_path, out_dir)
+            processor.process_pdf(tmp_path, out_dir)
+        
+        assert mock_process.call_count == 2
+        assert not (out_dir / GrobidProcessor.MANIFEST_NAME).exists()
+
+    def test_directory_processing_forgets_rewritten_tei(self, processor, tmp_path):
+        """Test that a TEI rewritten from new content is not reused for the old content."""
+        pdf_dir = tmp_path / 'pdfs'
+        pdf_dir.mkdir()
+        out_dir = tmp_path / 'out'
+        
+        def fake_process(pdf, out, *options):
+            output_file = out / f'{pdf.stem}.grobid.tei.xml'
+            output_file.write_bytes(b'<TEI>' + pdf.read_bytes() + b'</TEI>')
+            return output_file
+        
+        with patch.object(processor, '_process_single_pdf_direct', side_effect=fake_process) as mock_process:
+            (pdf_dir / 'paper.pdf').write_bytes(b'old')
+            processor.process_pdf(pdf_dir, out_dir, deduplicate=True)
+            (pdf_dir / 'paper.pdf').write_bytes(b'new')
+            processor.process_pdf(pdf_dir, out_dir, deduplicate=True)
+            # A duplicate of the old content must not get the rewritten TEI
+            (pdf_dir / 'paper.pdf').unlink()
+            (pdf_dir / 'copy.pdf').write_bytes(b'old')
+            outputs = processor.process_pdf(pdf_dir, out_dir, deduplicate=True)
+        
+        assert mock_process.call_count == 3
+        assert outputs[0].read_bytes() == b'<TEI>old</TEI>'
+        manifest = json.loads((out_dir / GrobidProcessor.MANIFEST_NAME).read_text())
+        assert sorted(next(iter(manifest.values())).values()) == ['copy.grobid.tei.xml', 'paper.grobid.tei.xml']
+
+    def test_context_manager_closes_session(self):
+        """Test that leaving the context manager closes the HTTP session."""
+        with patch('interactive_paper_reading.grobid.GrobidClient'):
+            with patch('requests.Session.close') as mock_close:
+                with GrobidProcessor():
+                    mock_close.assert_not_called()
+        
+        mock_close.assert_called_once()
+
+    def test_session_pool_and_chunk_size(self):
+        """Test that the connection pool and stream chunk size are configurable."""
+        with patch('interactive_paper_reading.grobid.GrobidClient'):
+            processor = GrobidProcessor(pool_size=4, stream_chunk_size=1 << 20)
+        
+        adapter = processor.session.get_adapter('http://localhost:8070')
+        assert adapter._pool_maxsize == 4
+        assert adapter._pool_connections == 4
+        assert processor.stream_chunk_size == 1 << 20
+
+    def test_process_single_pdf_direct_streams_with_multipart_encoder(self, processor, mock_replace):
+        """Test that the PDF upload is streamed when requests-toolbelt is available."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b'<TEI>test content</TEI>'
+        mock_encoder_cls = MagicMock()
+        mock_encoder_cls.return_value.content_type = 'multipart/form-data; boundary=abc'
+        
+        with patch('interactive_paper_reading.grobid.MultipartEncoder', mock_encoder_cls):
+            with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
+                with patch('builtins.open', mock_open()):
+                    with patch('pathlib.Path.is_dir', return_value=True):
+                        processor._process_single_pdf_direct(
+                            Path('/test.pdf'),
+                            Path('/output'),
+                            consolidate_header=True
+                        )
+        
+        fields = mock_encoder_cls.call_args.kwargs['fields']
+        assert fields['consolidateHeader'] == '1'
+        assert fields['input'][0] == 'test.pdf'
+        assert fields['input'][2] == 'application/pdf'
+        assert mock_post.call_args.kwargs['data'] is mock_encoder_cls.return_value
+        assert mock_post.call_args.kwargs['headers'] == {
+            'Content-Type': 'multipart/form-data; boundary=abc'
+        }
+        assert mock_post.call_args.kwargs['timeout'] == (
+            GrobidProcessor.CONNECT_TIMEOUT, processor.config['timeout']
+        )
+
+    def test_check_server_status_cached_within_ttl(self, processor):
+        """Test that a successful status check is reused until the TTL expires."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        
+        with patch.object(processor.session, 'head', return_value=mock_response) as mock_head:
+            with patch('interactive_paper_reading.grobid.time.monotonic', side_effect=[100.0, 110.0, 131.0]):
+                assert processor.check_server_status() is True
+                assert processor.check_server_status() is True
+                assert mock_head.call_count == 1
+                
+                # TTL expired: probe the server again
+                assert processor.check_server_status() is True
+                assert mock_head.call_count == 2
+        
+        assert mock_head.call_args.kwargs['timeout'] == GrobidProcessor.ALIVE_TIMEOUT
+
+    def test_check_server_status_force_bypasses_cache(self, processor):
+        """Test that force=True probes the server despite a cached success."""
+        with patch.object(processor.session, 'head', return_value=MagicMock(status_code=200)) as mock_head:
+            assert processor.check_server_status() is True
+            assert processor.check_server_status() is True
+            assert processor.check_server_status(force=True) is True
+        
+        assert mock_head.call_count == 2
+
+    def test_check_server_status_failure_not_cached(self, processor):
+        """Test that a failed status check is retried on the next call."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        
+        with patch.object(processor.session, 'head',
+                          side_effect=[requests.ConnectionError(), mock_response]) as mock_head:
+            assert processor.check_server_status() is False
+            assert processor.check_server_status() is True
+        
+        assert mock_head.call_count == 2
+
+    def test_request_failure_invalidates_status_cache(self, processor, tmp_path):
+        """Test that a failed conversion forces the next status check to probe the server."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        
+        with patch.object(processor.session, 'head', return_value=MagicMock(status_code=200)) as mock_head:
+            assert processor.check_server_status() is True
+            with patch.object(processor.session, 'post', side_effect=requests.ConnectionError("refused")):
+                with pytest.raises(requests.ConnectionError):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+            assert processor.check_server_status() is True
+        
+        assert mock_head.call_count == 2
+
+    def test_circuit_opens_after_consecutive_failures(self, processor, tmp_path):
+        """Test that requests fail fast once the server has failed repeatedly."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        
+        with patch.object(processor.session, 'post',
+                          side_effect=requests.ConnectionError("refused")) as mock_post:
+            for _ in range(processor.CIRCUIT_FAIL_MAX):
+                with pytest.raises(requests.ConnectionError):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+            
+            with pytest.raises(RuntimeError, match="circuit open"):
+                processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert mock_post.call_count == processor.CIRCUIT_FAIL_MAX
+
+    def test_circuit_ignores_pdf_errors(self, processor, tmp_path):
+        """Test that errors about the PDF itself do not open the circuit."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+        
+        with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
+            for _ in range(processor.CIRCUIT_FAIL_MAX + 1):
+                with pytest.raises(RuntimeError, match="GROBID server error: 500"):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert mock_post.call_count == processor.CIRCUIT_FAIL_MAX + 1
+
+    def test_circuit_probes_server_after_cooldown(self, processor, tmp_path):
+        """Test that the circuit closes again once the server answers the probe."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        error_response = MagicMock()
+        error_response.status_code = 502
+        ok_response = MagicMock()
+        ok_response.status_code = 200
+        ok_response.iter_content.return_value = [b'<TEI/>']
+        
+        with patch('interactive_paper_reading.grobid.time.monotonic', return_value=100.0) as mock_time:
+            with patch.object(processor.session, 'post', return_value=error_response):
+                for _ in range(processor.CIRCUIT_FAIL_MAX):
+                    with pytest.raises(RuntimeError, match="502"):
+                        processor._process_single_pdf_direct(pdf_path, tmp_path)
+            
+            # Cooldown elapsed, but the server still does not answer the probe
+            mock_time.return_value = 100.0 + processor.CIRCUIT_RESET_TIMEOUT
+            with patch.object(processor, 'check_server_status', return_value=False):
+                with pytest.raises(RuntimeError, match="still unreachable"):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+            
+            # The failed probe restarts the cooldown
+            with pytest.raises(RuntimeError, match="request not sent"):
+                processor._process_single_pdf_direct(pdf_path, tmp_path)
+            
+            mock_time.return_value = 100.0 + 2 * processor.CIRCUIT_RESET_TIMEOUT
+            with patch.object(processor, 'check_server_status', return_value=True):
+                with patch.object(processor.session, 'post', return_value=ok_response):
+                    result = processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert result == tmp_path / 'test.grobid.tei.xml'
+        assert result.read_bytes() == b'<TEI/>'
+        assert processor._consecutive_failures == 0
+
+    def test_interrupted_download_keeps_previous_tei(self, processor, tmp_path):
+        """Test that a conversion failing mid-stream never truncates the existing TEI."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        tei_file = tmp_path / 'test.grobid.tei.xml'
+        tei_file.write_bytes(b'<TEI>previous</TEI>')
+        
+        def broken_stream(chunk_size):
+            yield b'<TEI>part'
+            raise requests.ConnectionError("connection reset")
+        
+        response = MagicMock()
+        response.status_code = 200
+        response.iter_content.side_effect = broken_stream
+        
+        with patch.object(processor.session, 'post', return_value=response):
+            with pytest.raises(requests.ConnectionError):
+                processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert tei_file.read_bytes() == b'<TEI>previous</TEI>'
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['test.grobid.tei.xml', 'test.pdf']
+
+    def test_overloaded_server_is_retried_with_backoff(self, processor, tmp_path):
+        """Test that a 503 is retried after Retry-After and the PDF still succeeds."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        busy_response = MagicMock()
+        busy_response.status_code = 503
+        busy_response.headers = {'Retry-After': '3'}
+        ok_response = MagicMock()
+        ok_response.status_code = 200
+        ok_response.iter_content.return_value = [b'<TEI/>']
+        
+        with patch.object(processor.session, 'post', side_effect=[busy_response, ok_response]) as mock_post:
+            with patch('interactive_paper_reading.grobid.time.sleep') as mock_sleep:
+                result = processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert result.read_bytes() == b'<TEI/>'
+        assert mock_post.call_count == 2
+        mock_sleep.assert_called_once_with(3.0)
+        busy_response.close.assert_called_once()
+        assert processor._consecutive_failures == 0
+
+    def test_persistent_overload_counts_as_one_failure(self, processor, tmp_path):
+        """Test that persistent 504s use up the retries and count once towards the circuit."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        busy_response = MagicMock()
+        busy_response.status_code = 504
+        busy_response.headers = {}
+        
+        with patch.object(processor.session, 'post', return_value=busy_response) as mock_post:
+            with patch('interactive_paper_reading.grobid.time.sleep') as mock_sleep:
+                with pytest.raises(RuntimeError, match="504"):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert mock_post.call_count == processor.RETRY_ATTEMPTS
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert len(delays) == processor.RETRY_ATTEMPTS - 1
+        assert all(0 < d <= processor.RETRY_BACKOFF_MAX for d in delays)
+        assert processor._consecutive_failures == 1
+        assert processor._circuit_opened_at is None
+
+    def test_retry_backoff_starts_at_sleep_time(self, tmp_path):
+        """Test that the sleep_time setting drives the backoff of the direct HTTP path."""
+        with patch('interactive_paper_reading.grobid.GrobidClient'):
+            processor = GrobidProcessor(sleep_time=5)
+        
+        with patch('interactive_paper_reading.grobid.random.uniform', return_value=0.0):
+            delays = [processor._retry_delay(attempt) for attempt in (1, 2, 3)]
+        
+        assert delays == [5.0, 8.0, 8.0]
+        assert processor._retry_delay(1, retry_after='3') == 3.0
+        
+        with patch('interactive_paper_reading.grobid.GrobidClient'):
+            patient = GrobidProcessor(sleep_time=10)
+        with patch('interactive_paper_reading.grobid.random.uniform', return_value=0.0):
+            assert patient._retry_delay(1) == 10.0
+
+    def test_retries_stop_when_circuit_opens(self, processor, tmp_path):
+        """Test that retrying stops once other requests have opened the circuit."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        busy_response = MagicMock()
+        busy_response.status_code = 503
+        busy_response.headers = {}
+        
+        def open_circuit(delay):
+            processor._circuit_opened_at = 1.0
+        
+        with patch.object(processor.session, 'post', return_value=busy_response) as mock_post:
+            with patch('interactive_paper_reading.grobid.time.sleep', side_effect=open_circuit):
+                with pytest.raises(RuntimeError, match="503"):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        assert mock_post.call_count == 2
+
+    def test_concurrent_transient_overload_does_not_open_circuit(self, processor, tmp_path):
+        """Test that workers hitting 503s that later clear all succeed without opening the circuit."""
+        import threading
+        
+        pdf_dir = tmp_path / 'pdfs'
+        pdf_dir.mkdir()
+        for i in range(6):
+            (pdf_dir / f'paper{i}.pdf').write_bytes(f'%PDF-1.4 {i}'.encode())
+        attempts = {}
+        lock = threading.Lock()
+        
+        def fake_post(url, files=None, **kwargs):
+            name = files['input'][0]
+            with lock:
+                attempts[name] = attempts.get(name, 0) + 1
+                count = attempts[name]
+            response = MagicMock()
+            response.headers = {}
+            # Every PDF is rejected twice before the server catches up
+            response.status_code = 503 if count <= 2 else 200
+            response.iter_content.return_value = [f'<TEI>{name}</TEI>'.encode()]
+            return response
+        
+        with patch.object(processor.session, 'post', side_effect=fake_post):
+            with patch('interactive_paper_reading.grobid.time.sleep'):
+                outputs = processor.process_pdf(pdf_dir, tmp_path / 'out', n_workers=6)
+        
+        assert [p.name for p in outputs] == [f'paper{i}.grobid.tei.xml' for i in range(6)]
+        assert all(count == 3 for count in attempts.values())
+        assert processor._circuit_opened_at is None
+        assert processor._consecutive_failures == 0
+
+    def test_client_errors_are_not_retried(self, processor, tmp_path):
+        """Test that a bad-PDF response is reported without retrying."""
+        pdf_path = tmp_path / 'test.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+        mock_response.iter_content.return_value = iter([b'bad PDF'])
+        
+        with patch.object(processor.session, 'post', return_value=mock_response) as mock_post:
+            with patch('interactive_paper_reading.grobid.time.sleep') as mock_sleep:
+                with pytest.raises(RuntimeError, match="500"):
+                    processor._process_single_pdf_direct(pdf_path, tmp_path)
+        
+        mock_post.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_request_data_reused_for_same_options(self, processor):
+        """Test that form fields are built once per option combination."""
+        first = processor._request_data(True, True, False, False, False)
+        second = processor._request_data(True, True, False, False, False)
+        other = processor._request_data(False, False, False, True, False)
+        
+        assert first is second
+        assert first == {
+            'teiCoordinates': ','.join(processor.config['coordinates']),
+            'consolidateHeader': '1'
+        }
+        assert other == {'generateIDs': '1'}
+
+
+class TestFileSha256:
+    """Test cases for file_sha256."""
+
+    def test_matches_hashlib_across_chunks(self, tmp_path):
+        """Test that chunked hashing gives the digest of the whole content."""
+        import hashlib
+        
+        path = tmp_path / 'paper.pdf'
+        content = b'%PDF-1.4 ' * 1000
+        path.write_bytes(content)
+        
+        assert file_sha256(path, chunk_size=7) == hashlib.sha256(content).hexdigest()
+        
+        empty = tmp_path / 'empty.pdf'
+        empty.write_bytes(b'')
+        assert file_sha256(empty) == hashlib.sha256(b'').hexdigest()
+
+    def test_does_not_need_file_digest(self, tmp_path):
+        """Test that hashing works on Pythons without hashlib.file_digest."""
+        import hashlib
+        
+        path = tmp_path / 'paper.pdf'
+        path.write_bytes(b'%PDF-1.4')
+        
+        with patch.object(hashlib, 'file_digest', create=True, side_effect=AttributeError):
+            assert file_sha256(path) == hashlib.sha256(b'%PDF-1.4').hexdigest()
+
+    def test_missing_file_raises(self, tmp_path):
+        """Test that unreadable files raise OSError."""
+        with pytest.raises(OSError):
+            file_sha256(tmp_path / 'missing.pdf')
+
+
+class TestTeiHash:
+    """Test cases for the TEI hash sidecar helpers."""
+
+    def test_tei_is_current_after_write(self, tmp_path):
+        """Test that a TEI is current until the PDF content changes."""
+        pdf_path = tmp_path / 'paper.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4 old')
+        tei_file = tmp_path / 'paper.grobid.tei.xml'
+        
+        assert tei_is_current(pdf_path, tei_file) is False
+        tei_file.write_text('<TEI/>')
+        assert tei_is_current(pdf_path, tei_file) is False
+        
+        write_tei_hash(pdf_path, tei_file)
+        assert (tmp_path / 'paper.grobid.tei.xml.hash').read_text() == file_sha256(pdf_path)
+        assert tei_is_current(pdf_path, tei_file) is True
+        
+        pdf_path.write_bytes(b'%PDF-1.4 new')
+        assert tei_is_current(pdf_path, tei_file) is False
+
+    def test_missing_pdf_is_not_current(self, tmp_path):
+        """Test that unreadable PDFs never match and are not recorded."""
+        tei_file = tmp_path / 'paper.grobid.tei.xml'
+        tei_file.write_text('<TEI/>')
+        
+        write_tei_hash(tmp_path / 'missing.pdf', tei_file)
+        
+        assert not (tmp_path / 'paper.grobid.tei.xml.hash').exists()
+        assert tei_is_current(tmp_path / 'missing.pdf', tei_file) is False
+
+    def test_write_tei_hash_replaces_sidecar_atomically(self, tmp_path):
+        """Test that the sidecar is rewritten through a temp file."""
+        pdf_path = tmp_path / 'paper.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4')
+        tei_file = tmp_path / 'paper.grobid.tei.xml'
+        tei_file.write_text('<TEI/>')
+        (tmp_path / 'paper.grobid.tei.xml.hash').write_text('stale')
+        
+        write_tei_hash(pdf_path, tei_file)
+        
+        assert tei_is_current(pdf_path, tei_file) is True
+        assert not list(tmp_path.glob('.*.tmp'))
+
+
+class TestAtomicWrite:
+    """Test cases for atomic_write."""
+
+    def test_replaces_file_on_success(self, tmp_path):
+        """Test that the target only changes once the write completes."""
+        target = tmp_path / 'out.xml'
+        target.write_bytes(b'old')
+        
+        with atomic_write(target) as f:
+            f.write(b'new')
+            assert target.read_bytes() == b'old'
+        
+        assert target.read_bytes() == b'new'
+        assert [p.name for p in tmp_path.iterdir()] == ['out.xml']
+
+    def test_failure_keeps_target_and_removes_temp_file(self, tmp_path):
+        """Test that a failed write leaves the previous file and no temp file behind."""
+        target = tmp_path / 'out.xml'
+        target.write_bytes(b'old')
+        
+        with pytest.raises(RuntimeError):
+            with atomic_write(target) as f:
+                f.write(b'partial')
+                raise RuntimeError("interrupted")
+        
+        assert target.read_bytes() == b'old'
+        assert [p.name for p in tmp_path.iterdir()] == ['out.xml']
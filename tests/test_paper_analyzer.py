@@ -4,10 +4,11 @@ Tests for paper analyzer functionality.
 This module contains tests for analyzing academic papers using LLM.
 """
 
+import json
+import logging
 import pytest
 from pathlib import Path
 from unittest.mock import patch, mock_open, MagicMock
-import xml.etree.ElementTree as ET
 import requests
 
 from interactive_paper_reading.analyzer import PaperAnalyzer, Reference, PaperAnalysis
@@ -134,10 +135,12 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         assert analyzer.model == 'gpt-3.5-turbo'
         assert analyzer.token == 'custom-token'
 
-    def test_extract_references_from_tei_success(self, analyzer, sample_tei_xml):
+    def test_extract_references_from_tei_success(self, analyzer, sample_tei_xml, tmp_path):
         """Test successful reference extraction from TEI XML."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            references = analyzer.extract_references_from_tei(Path('test.xml'))
+        tei_file = tmp_path / 'test.xml'
+        tei_file.write_text(sample_tei_xml, encoding='utf-8')
+        
+        references = analyzer.extract_references_from_tei(tei_file)
 
         assert len(references) == 2
         
@@ -158,23 +161,87 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         assert ref2.year == '2021'
         assert ref2.venue == 'Conference Proceedings'
 
-    def test_extract_references_from_tei_malformed_xml(self, analyzer):
+    def test_extract_references_from_parsed_tree(self, analyzer, sample_tei_xml):
+        """Test that a tree parsed by TEIProcessor is used without re-reading the file."""
+        from lxml import etree
+        tree = etree.fromstring(sample_tei_xml.encode('utf-8'))
+        
+        with patch('lxml.etree.iterparse') as mock_iterparse:
+            references = analyzer.extract_references_from_tei(tree)
+        
+        mock_iterparse.assert_not_called()
+        assert [ref.id for ref in references] == ['ref1', 'ref2']
+        assert references[0].authors == ['John Smith']
+        assert references[1].venue == 'Conference Proceedings'
+
+    def test_extract_references_from_tei_malformed_xml(self, analyzer, tmp_path):
         """Test reference extraction with malformed XML."""
-        malformed_xml = "<?xml version='1.0'?><invalid>"
+        tei_file = tmp_path / 'test.xml'
+        tei_file.write_text("<?xml version='1.0'?><invalid>")
         
-        with patch('builtins.open', mock_open(read_data=malformed_xml)):
-            with patch('xml.etree.ElementTree.parse', side_effect=ET.ParseError):
-                references = analyzer.extract_references_from_tei(Path('test.xml'))
+        references = analyzer.extract_references_from_tei(tei_file)
 
         assert references == []
 
-    def test_extract_references_from_tei_file_not_found(self, analyzer):
+    def test_extract_references_from_tei_file_not_found(self, analyzer, tmp_path):
         """Test reference extraction when TEI file doesn't exist."""
-        with patch('xml.etree.ElementTree.parse', side_effect=FileNotFoundError):
-            references = analyzer.extract_references_from_tei(Path('nonexistent.xml'))
+        references = analyzer.extract_references_from_tei(tmp_path / 'nonexistent.xml')
 
         assert references == []
 
+    @pytest.mark.parametrize("from_tree", [False, True])
+    def test_extract_references_from_tei_cited_in_content(self, analyzer, sample_tei_xml, tmp_path, from_tree):
+        """Test that only references cited in the given content are kept, in citation order."""
+        from lxml import etree
+        tei_xml = sample_tei_xml.replace('<back>', '''<body><div>
+            <p>Detection <ref type="bibr" target="#ref2">[2]</ref> improves on
+               <ref type="bibr" target="#ref1">[1]</ref>, see figure <ref type="figure" target="#fig_0">1</ref>.</p>
+            <p>Superscript <ref type="bibr" target="#ref1">1</ref></p>
+        </div></body><back>''')
+        tei_file = tmp_path / 'test.xml'
+        tei_file.write_text(tei_xml, encoding='utf-8')
+        source = etree.fromstring(tei_xml.encode('utf-8')) if from_tree else tei_file
+        
+        only_second = analyzer.extract_references_from_tei(source, cited_in="As shown in [2], 1 model.")
+        both = analyzer.extract_references_from_tei(source, cited_in="Methods [2] and baselines [1].")
+        uncited = analyzer.extract_references_from_tei(source, cited_in="No markers here.")
+        
+        assert [ref.id for ref in only_second] == ['ref2']
+        assert [ref.id for ref in both] == ['ref2', 'ref1']
+        assert [ref.id for ref in uncited] == ['ref1', 'ref2']
+
+    def test_extract_references_from_tei_child_paths(self, analyzer, tmp_path):
+        """Test that book authors under monogr are read and nested biblStructs are skipped."""
+        tei_file = tmp_path / 'book.xml'
+        tei_file.write_text('''<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><back><listBibl>
+            <biblStruct>
+                <monogr>
+                    <title level="m">A Book</title>
+                    <author><persName><surname>Knuth</surname></persName></author>
+                    <imprint><date type="published" when="1968-01-01"/></imprint>
+                </monogr>
+                <relatedItem><biblStruct><monogr><title level="m">Series</title></monogr></biblStruct></relatedItem>
+            </biblStruct>
+        </listBibl></back></text></TEI>''')
+        
+        references = analyzer.extract_references_from_tei(tei_file)
+        
+        assert len(references) == 1
+        assert references[0].id == 'ref_0'
+        assert references[0].authors == ['Knuth']
+        assert references[0].year == '1968'
+        assert references[0].venue == 'A Book'
+
+    def test_extract_references_from_markdown_pairs_first_author_mention(self, analyzer):
+        """Test that a citation takes the first author named with it, wherever it appears."""
+        content = "As shown [2] and [10], see also [2]. Later, Carion et al. [2] and Smith [2] and Doe [10]."
+        
+        references = analyzer.extract_references_from_markdown(content)
+        
+        assert [ref.id for ref in references] == ['ref_2', 'ref_10']
+        assert references[0].authors == ['Carion et al.']
+        assert references[1].authors == ['Doe']
+
     def test_extract_references_from_markdown_success(self, analyzer, sample_markdown):
         """Test successful reference extraction from markdown."""
         references = analyzer.extract_references_from_markdown(sample_markdown)
@@ -201,14 +268,65 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         }
         mock_response.raise_for_status.return_value = None
 
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(analyzer.session, 'post', return_value=mock_response):
             result = analyzer.call_llm("Test prompt")
 
         assert mock_llm_response in result
 
+    def test_call_llm_caches_responses_per_model(self, tmp_path):
+        """Test that a repeated prompt is answered from the cache for the same model only."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'choices': [{'message': {'content': 'cached reply'}}]}
+        analyzer = PaperAnalyzer(openai_token='test-token', openai_model='gpt-4', cache_dir=tmp_path)
+        other_model = PaperAnalyzer(openai_token='test-token', openai_model='gpt-4o', cache_dir=tmp_path)
+        
+        with patch('requests.Session.post', return_value=mock_response) as mock_post:
+            first = analyzer.call_llm("Test prompt")
+            second = analyzer.call_llm("Test prompt")
+            other_model.call_llm("Test prompt")
+        
+        assert first == second == 'cached reply'
+        assert mock_post.call_count == 2
+        assert len(list(tmp_path.glob('*.txt'))) == 2
+
+    def test_call_llm_reuses_session(self, analyzer):
+        """Test that LLM calls share one authenticated keep-alive session."""
+        adapter = analyzer.session.get_adapter('https://api.openai.com')
+        
+        assert analyzer.session.headers['Authorization'] == 'Bearer test-token'
+        assert adapter._pool_maxsize == PaperAnalyzer.POOL_MAXSIZE
+        assert 429 in adapter.max_retries.status_forcelist
+        assert 'POST' in adapter.max_retries.allowed_methods
+        assert adapter.max_retries.read == 0
+        
+        with patch.object(analyzer.session, 'close') as mock_close:
+            with analyzer:
+                pass
+        mock_close.assert_called_once()
+
+    def test_call_llm_streams_completion(self):
+        """Test that a streamed completion is assembled from its SSE deltas."""
+        analyzer = PaperAnalyzer(openai_token='test-token', stream=True)
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            b'',
+            b': keep-alive',
+            b'data: {"choices": [{"delta": {"content": "{\\"paper_title\\": "}}]}',
+            b'data: {"choices": [{"delta": {"content": "\\"T\\"}"}}]}',
+            b'data: [DONE]',
+        ]
+        
+        with patch.object(analyzer.session, 'post', return_value=mock_response) as mock_post:
+            result = analyzer.call_llm("Test prompt")
+        
+        assert result == '{"paper_title": "T"}'
+        assert mock_post.call_args.kwargs['json']['stream'] is True
+        assert mock_post.call_args.kwargs['stream'] is True
+
     def test_call_llm_request_error(self, analyzer):
         """Test LLM API call with request error."""
-        with patch('requests.post', side_effect=requests.RequestException("Network error")):
+        with patch.object(analyzer.session, 'post', side_effect=requests.RequestException("Network error")):
             with pytest.raises(RuntimeError, match="LLM API call failed"):
                 analyzer.call_llm("Test prompt")
 
@@ -218,7 +336,7 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         mock_response.json.return_value = {'invalid': 'format'}
         mock_response.raise_for_status.return_value = None
 
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(analyzer.session, 'post', return_value=mock_response):
             with pytest.raises(RuntimeError, match="Unexpected API response format"):
                 analyzer.call_llm("Test prompt")
 
@@ -253,6 +371,50 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         assert "Paper content here" in prompt
         assert "No structured references were available" in prompt
 
+    def test_create_analysis_prompt_truncates_by_characters_without_tiktoken(self, analyzer):
+        """Test that content is cut at PROMPT_CONTENT_CHARS when tiktoken is missing."""
+        import interactive_paper_reading.analyzer as analyzer_module
+        content = "a" * PaperAnalyzer.PROMPT_CONTENT_CHARS + "TAIL"
+        
+        with patch.object(analyzer_module, 'tiktoken', None):
+            prompt = analyzer.create_analysis_prompt(content, [], "Title")
+        
+        assert "a" * PaperAnalyzer.PROMPT_CONTENT_CHARS in prompt
+        assert "TAIL" not in prompt
+
+    def test_create_analysis_prompt_truncates_by_tokens(self, analyzer):
+        """Test that content is cut at max_content_tokens with the model's encoding."""
+        import interactive_paper_reading.analyzer as analyzer_module
+        fake_tiktoken = MagicMock()
+        encoding = fake_tiktoken.encoding_for_model.return_value
+        encoding.encode.side_effect = lambda text, disallowed_special: text.split()
+        encoding.decode.side_effect = " ".join
+        analyzer.max_content_tokens = 3
+        
+        with patch.object(analyzer_module, 'tiktoken', fake_tiktoken):
+            short_prompt = analyzer.create_analysis_prompt("one two", [], "Title")
+            prompt = analyzer.create_analysis_prompt("one two three four five", [], "Title")
+        
+        fake_tiktoken.encoding_for_model.assert_called_once_with(analyzer.model)
+        assert "one two  #" in short_prompt
+        assert "one two three  #" in prompt
+        assert "four" not in prompt
+
+    @pytest.mark.parametrize("response", [
+        '{"paper_title": "T", "key_contributions": ["a {b}"]}',
+        '```json\n{"paper_title": "T", "key_contributions": ["a {b}"]}\n```',
+        'Here is the analysis:\n{"paper_title": "T", "key_contributions": ["a {b}"]}\nHope this helps {:}',
+    ])
+    def test_parse_llm_response_formats(self, analyzer, response):
+        """Test that the JSON object is found in bare, fenced and prose-wrapped replies."""
+        assert analyzer._parse_llm_response(response) == {"paper_title": "T", "key_contributions": ["a {b}"]}
+
+    @pytest.mark.parametrize("response", ["No JSON here", "Broken {\"paper_title\": } reply"])
+    def test_parse_llm_response_invalid(self, analyzer, response):
+        """Test that replies without a valid JSON object raise ValueError."""
+        with pytest.raises(ValueError):
+            analyzer._parse_llm_response(response)
+
     @patch('interactive_paper_reading.analyzer.PaperAnalyzer.call_llm')
     def test_analyze_paper_success(self, mock_call_llm, analyzer, sample_markdown, mock_llm_response):
         """Test successful paper analysis."""
@@ -284,11 +446,47 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         assert isinstance(analysis, PaperAnalysis)
         mock_extract.assert_called_once()
 
-    def test_analyze_paper_file_not_found(self, analyzer):
+    @patch('interactive_paper_reading.analyzer.PaperAnalyzer.call_llm')
+    def test_analyze_paper_reads_prefix_for_prompt(self, mock_call_llm, analyzer, tmp_path, mock_llm_response):
+        """Test that only the start of a long paper is read unless references need the rest."""
+        mock_call_llm.return_value = mock_llm_response
+        markdown_file = tmp_path / 'long.md'
+        markdown_file.write_text("# Long Paper\n" + "x" * PaperAnalyzer.CONTENT_READ_CHARS
+                                 + "\nSmith et al. [7] showed this.\n", encoding='utf-8')
+        
+        with patch.object(analyzer, 'create_analysis_prompt', return_value='prompt') as mock_prompt, \
+             patch.object(analyzer, '_truncate_content', side_effect=lambda content: content):
+            with patch.object(analyzer, 'extract_references_from_tei',
+                              return_value=[Reference("ref1", "Test", ["Author"])]):
+                analyzer.analyze_paper(markdown_file, tmp_path / 'long.xml', tei_tree=object())
+            content, references, title = mock_prompt.call_args.args
+            assert len(content) == PaperAnalyzer.CONTENT_READ_CHARS
+            assert title == 'Long Paper'
+            
+            # Without TEI references the whole file is scanned for citations
+            analyzer.analyze_paper(markdown_file)
+            references = mock_prompt.call_args.args[1]
+        
+        assert [(ref.id, ref.authors) for ref in references] == [('ref_7', ['Smith et al.'])]
+
+    def test_analyze_paper_file_not_found(self, analyzer, tmp_path):
         """Test paper analysis with non-existent markdown file."""
-        with patch.object(Path, 'exists', return_value=False):
-            with pytest.raises(FileNotFoundError, match="Markdown file not found"):
-                analyzer.analyze_paper(Path('nonexistent.md'))
+        with pytest.raises(FileNotFoundError, match="Markdown file not found"):
+            analyzer.analyze_paper(tmp_path / 'nonexistent.md')
+
+    @patch('interactive_paper_reading.analyzer.PaperAnalyzer.call_llm')
+    def test_analyze_paper_missing_tei_falls_back_to_markdown(self, mock_call_llm, analyzer, tmp_path,
+                                                              mock_llm_response, caplog):
+        """Test that a missing TEI file quietly falls back to markdown references."""
+        mock_call_llm.return_value = mock_llm_response
+        markdown_file = tmp_path / 'paper.md'
+        markdown_file.write_text("# Paper\nAs Carion et al. [1] showed.", encoding='utf-8')
+        
+        with patch.object(analyzer, 'create_analysis_prompt', return_value='prompt') as mock_prompt:
+            analyzer.analyze_paper(markdown_file, tmp_path / 'missing.xml')
+        
+        assert [ref.id for ref in mock_prompt.call_args.args[1]] == ['ref_1']
+        assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
 
     @patch('interactive_paper_reading.analyzer.PaperAnalyzer.call_llm')
     def test_analyze_paper_invalid_json_response(self, mock_call_llm, analyzer, sample_markdown):
@@ -304,7 +502,36 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         assert "Invalid JSON response" in analysis.heritage_analysis
         assert analysis.relevant_papers == []
 
-    def test_save_analysis(self, analyzer):
+    def test_analyzer_import_does_not_load_grobid_client(self):
+        """Test that the package's exports are imported lazily."""
+        import subprocess
+        import sys
+        code = ("import sys, interactive_paper_reading.analyzer as a, interactive_paper_reading as p; "
+                "assert 'grobid_client' not in sys.modules; "
+                "assert p.PaperAnalyzer is a.PaperAnalyzer")
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=Path(__file__).resolve().parents[1])
+
+    def test_analyzers_share_tei_processor(self, analyzer):
+        """Test that analyzers reuse one TEIProcessor instead of building their own."""
+        other = PaperAnalyzer(openai_token='other-token')
+        
+        assert other.tei_processor is analyzer.tei_processor
+
+    def test_analyze_papers_keeps_input_order(self, analyzer):
+        """Test that concurrent analysis returns results in order, with None for failures."""
+        def fake_analyze(markdown_file, tei_file):
+            if markdown_file.stem == 'bad':
+                raise RuntimeError("Analysis failed: boom")
+            return PaperAnalysis(markdown_file.stem, [], '', [], [], '')
+        
+        items = [(Path('a.md'), None), (Path('bad.md'), Path('bad.xml')), (Path('c.md'), None)]
+        with patch.object(analyzer, 'analyze_paper', side_effect=fake_analyze) as mock_analyze:
+            results = analyzer.analyze_papers(items, max_workers=3)
+        
+        assert mock_analyze.call_count == 3
+        assert [r.paper_title if r else None for r in results] == ['a', None, 'c']
+
+    def test_save_analysis(self, analyzer, tmp_path):
         """Test saving analysis to file."""
         analysis = PaperAnalysis(
             paper_title="Test Paper",
@@ -315,10 +542,34 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
             methodology_insights="Test insights"
         )
 
-        with patch('builtins.open', mock_open()) as mock_file:
-            analyzer.save_analysis(analysis, Path('output.json'))
+        output_file = tmp_path / 'output.json'
+        analyzer.save_analysis(analysis, output_file)
 
-        mock_file.assert_called_once_with(Path('output.json'), 'w', encoding='utf-8')
+        saved = json.loads(output_file.read_text(encoding='utf-8'))
+        assert saved['paper_title'] == "Test Paper"
+        assert saved['key_contributions'] == ["Contribution 1"]
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_save_analysis_matches_stdlib_json(self, analyzer, tmp_path, use_orjson):
+        """Test that analysis JSON is identical with and without orjson."""
+        import interactive_paper_reading.analyzer as analyzer_module
+        if use_orjson:
+            pytest.importorskip('orjson')
+        analysis = PaperAnalysis(
+            paper_title="Résumé: Ünïcode",
+            relevant_papers=[{"reference": "Ref", "reasoning": "Because"}],
+            heritage_analysis="Heritage",
+            key_contributions=[],
+            research_gaps=["Gap 1"],
+            methodology_insights="Insights"
+        )
+        output_file = tmp_path / 'output.json'
+
+        with patch.object(analyzer_module, 'orjson', analyzer_module.orjson if use_orjson else None):
+            analyzer.save_analysis(analysis, output_file)
+
+        expected = json.dumps(json.loads(output_file.read_bytes()), indent=2, ensure_ascii=False)
+        assert output_file.read_text(encoding='utf-8') == expected
 
     def test_print_analysis_summary(self, analyzer, capsys):
         """Test printing analysis summary."""
@@ -345,6 +596,18 @@ The work by Smith et al. [2] demonstrates the effectiveness of this approach.
         assert "KEY CONTRIBUTIONS:" in captured.out
         assert "RESEARCH GAPS ADDRESSED:" in captured.out
         assert "METHODOLOGY INSIGHTS:" in captured.out
+        assert captured.out.index("Contribution 1") < captured.out.index("Contribution 2")
+        assert captured.out.endswith("Test methodology insights\n\n" + "=" * 80 + "\n")
+
+    def test_print_analysis_summary_single_write(self, analyzer):
+        """Test that the summary is printed with a single call."""
+        analysis = PaperAnalysis("Test Paper", [], "Heritage", ["C"], [], "Methods")
+        
+        with patch('builtins.print') as mock_print:
+            analyzer.print_analysis_summary(analysis)
+        
+        mock_print.assert_called_once()
+        assert "1. C" in mock_print.call_args.args[0]
 
 
 class TestReference:
@@ -9,6 +9,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
+from interactive_paper_reading.grobid import GrobidProcessor
 from interactive_paper_reading.pipeline import PaperProcessingPipeline
 
 
@@ -147,6 +148,70 @@ class TestPaperProcessingPipeline:
         
         assert result['success'] is True
 
+    def test_context_manager_closes_grobid_session(self, basic_pipeline):
+        """Test that leaving the context manager closes the GROBID processor."""
+        with basic_pipeline as pipeline:
+            pipeline.grobid_processor.close.assert_not_called()
+        
+        basic_pipeline.grobid_processor.close.assert_called_once()
+
+    def test_tei_cache_skips_grobid_for_unchanged_pdf(self, basic_pipeline, tmp_path):
+        """Test that GROBID is skipped when the TEI was built from the same PDF content."""
+        pdf_file = tmp_path / 'paper.pdf'
+        pdf_file.write_bytes(b'%PDF-1.4 content')
+        output_dir = tmp_path / 'output'
+        
+        def fake_grobid(pdf_path, out_dir):
+            tei_file = out_dir / 'paper.grobid.tei.xml'
+            tei_file.write_text('<TEI/>')
+            return tei_file
+        
+        basic_pipeline.grobid_processor.process_pdf.side_effect = fake_grobid
+        
+        first = basic_pipeline._convert_pdf_to_tei(pdf_file, output_dir, basic_pipeline._new_results(pdf_file))
+        second = basic_pipeline._convert_pdf_to_tei(pdf_file, output_dir, basic_pipeline._new_results(pdf_file))
+        
+        assert first == second == output_dir / 'paper.grobid.tei.xml'
+        assert (output_dir / 'paper.grobid.tei.xml.hash').is_file()
+        basic_pipeline.grobid_processor.process_pdf.assert_called_once()
+
+    def test_tei_cache_reruns_grobid_when_pdf_changes_or_forced(self, basic_pipeline, tmp_path):
+        """Test that a changed PDF or force=True bypasses the TEI cache."""
+        pdf_file = tmp_path / 'paper.pdf'
+        pdf_file.write_bytes(b'%PDF-1.4 original')
+        output_dir = tmp_path / 'output'
+        output_dir.mkdir()
+        tei_file = output_dir / 'paper.grobid.tei.xml'
+        tei_file.write_text('<TEI/>')
+        basic_pipeline.grobid_processor.process_pdf.return_value = tei_file
+        
+        basic_pipeline._convert_pdf_to_tei(pdf_file, output_dir, basic_pipeline._new_results(pdf_file))
+        pdf_file.write_bytes(b'%PDF-1.4 revised')
+        basic_pipeline._convert_pdf_to_tei(pdf_file, output_dir, basic_pipeline._new_results(pdf_file))
+        basic_pipeline.force = True
+        basic_pipeline._convert_pdf_to_tei(pdf_file, output_dir, basic_pipeline._new_results(pdf_file))
+        
+        assert basic_pipeline.grobid_processor.process_pdf.call_count == 3
+
+    def test_image_format_sets_crop_extension(self, tmp_path):
+        """Test that image_format='jpeg' names crops .jpg and unknown formats are rejected."""
+        with patch('interactive_paper_reading.pipeline.GrobidProcessor'):
+            with patch('interactive_paper_reading.pipeline.TEIProcessor'):
+                pipeline = PaperProcessingPipeline(image_format='jpeg')
+                with pytest.raises(ValueError):
+                    PaperProcessingPipeline(image_format='gif')
+        
+        figure = MagicMock(element_type='figure')
+        pipeline.tei_processor.extract_figures_tables.return_value = [figure]
+        pipeline.tei_processor.extract_graphics.return_value = [MagicMock()]
+        pipeline.tei_processor.crop_regions.return_value = [None, None]
+        
+        pipeline._extract_images(Path('/paper.pdf'), MagicMock(), tmp_path, pipeline._new_results(Path('/paper.pdf')))
+        
+        crops = pipeline.tei_processor.crop_regions.call_args.args[1]
+        assert [path.name for _, path in crops] == ['paper-figure-1.jpg', 'paper-graphic-1.jpg']
+        assert pipeline._extraction_settings()['image_format'] == 'jpeg'
+
     def test_process_batch_empty_list(self, basic_pipeline, tmp_path):
         """Test batch processing with empty file list."""
         results = basic_pipeline.process_batch([], tmp_path / 'output')
@@ -188,3 +253,230 @@ class TestPaperProcessingPipeline:
             results = basic_pipeline.process_batch(pdf_files, tmp_path / 'output')
         
         assert len(results) == 2
+
+    def test_process_batch_preserves_input_order(self, basic_pipeline, tmp_path):
+        """Test that concurrent batch processing returns results in input order."""
+        basic_pipeline.grobid_processor.process_pdf.side_effect = \
+            lambda pdf_path, output_dir: tmp_path / f'{pdf_path.stem}.tei.xml'
+        basic_pipeline.tei_processor.extract_sections.return_value = []
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = []
+        basic_pipeline.tei_processor.extract_graphics.return_value = []
+        
+        pdf_files = [Path(f'/paper{i}.pdf') for i in range(5)]
+        
+        with patch('interactive_paper_reading.pipeline.Path.is_file', return_value=True):
+            results = basic_pipeline.process_batch(pdf_files, tmp_path / 'output', max_workers=3)
+        
+        assert [r['pdf_path'] for r in results] == pdf_files
+        assert [r['tei_file'].name for r in results] == [f'paper{i}.tei.xml' for i in range(5)]
+        assert all(r['success'] for r in results)
+
+    def test_process_batch_accepts_generator(self, basic_pipeline, tmp_path):
+        """Test that batch processing consumes a lazily discovered file stream."""
+        basic_pipeline.grobid_processor.process_pdf.return_value = tmp_path / 'test.tei.xml'
+        basic_pipeline.tei_processor.extract_sections.return_value = []
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = []
+        basic_pipeline.tei_processor.extract_graphics.return_value = []
+        
+        pdf_files = (Path(f'/paper{i}.pdf') for i in range(3))
+        
+        with patch('interactive_paper_reading.pipeline.Path.is_file', return_value=True):
+            results = basic_pipeline.process_batch(pdf_files, tmp_path / 'output')
+        
+        assert [r['pdf_path'].name for r in results] == ['paper0.pdf', 'paper1.pdf', 'paper2.pdf']
+
+    def test_process_batch_bounds_queued_files(self, basic_pipeline, tmp_path):
+        """Test that the file stream is read no further ahead of the workers than the backlog."""
+        finished = []
+        ahead = []
+        
+        def fake_convert(pdf_path, output_dir):
+            finished.append(pdf_path)
+            return None
+        
+        def tracked_files():
+            for i in range(20):
+                ahead.append(i - len(finished))
+                yield Path(f'/paper{i:02d}.pdf')
+        
+        basic_pipeline.grobid_processor.process_pdf.side_effect = fake_convert
+        
+        results = basic_pipeline.process_batch(tracked_files(), tmp_path / 'output', max_workers=2)
+        
+        assert [r['pdf_path'].name for r in results] == [f'paper{i:02d}.pdf' for i in range(20)]
+        assert max(ahead) <= 2 * GrobidProcessor.SUBMIT_BACKLOG
+
+    def test_process_batch_extracts_content_on_calling_thread(self, basic_pipeline, tmp_path):
+        """Test that TEI extraction runs on the calling thread, not the GROBID pool."""
+        import threading
+        
+        extraction_threads = []
+        basic_pipeline.grobid_processor.process_pdf.return_value = tmp_path / 'test.tei.xml'
+        basic_pipeline.tei_processor.extract_sections.side_effect = \
+            lambda tei_file: extraction_threads.append(threading.current_thread()) or []
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = []
+        basic_pipeline.tei_processor.extract_graphics.return_value = []
+        
+        with patch('interactive_paper_reading.pipeline.Path.is_file', return_value=True):
+            basic_pipeline.process_batch([Path('/a.pdf'), Path('/b.pdf')], tmp_path / 'output')
+        
+        assert extraction_threads == [threading.current_thread()] * 2
+
+    def test_process_batch_extracts_in_worker_processes(self, basic_pipeline, tmp_path):
+        """Test that jobs > 1 runs TEI extraction in worker processes."""
+        tei_xml = (
+            '<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><body>'
+            '<div><head n="1">Introduction</head><p>Worker text.</p></div>'
+            '</body></text></TEI>'
+        )
+        pdf_files = [tmp_path / 'first.pdf', tmp_path / 'second.pdf']
+        
+        def fake_process_pdf(pdf_path, output_dir):
+            tei_file = output_dir / f'{pdf_path.stem}.grobid.tei.xml'
+            tei_file.write_text(tei_xml, encoding='utf-8')
+            return tei_file
+        
+        basic_pipeline.grobid_processor.process_pdf.side_effect = fake_process_pdf
+        
+        results = basic_pipeline.process_batch(
+            pdf_files, tmp_path / 'output',
+            extract_figures=False, extract_graphics=False, jobs=2
+        )
+        
+        assert [r['pdf_path'] for r in results] == pdf_files
+        assert all(r['success'] for r in results)
+        # The parent's mocked TEI processor is never used for extraction
+        basic_pipeline.tei_processor.parse.assert_not_called()
+        markdown = (tmp_path / 'output' / 'first' / 'first-sections.md').read_text(encoding='utf-8')
+        assert 'Worker text.' in markdown
+
+    def test_extraction_pipeline_has_no_grobid_client(self):
+        """Test that worker pipelines are built without a GROBID client."""
+        with patch('interactive_paper_reading.pipeline.GrobidProcessor') as mock_grobid:
+            pipeline = PaperProcessingPipeline._for_extraction(analyze_with_llm=False, crop_workers=1)
+        
+        mock_grobid.assert_not_called()
+        assert pipeline.grobid_processor is None
+        assert pipeline.crop_workers == 1
+        assert pipeline.analyze_with_llm is False
+
+    def test_process_single_paper_parses_tei_once(self, basic_pipeline, tmp_path):
+        """Test that the TEI file is parsed once and shared by all extraction steps."""
+        tei_path = tmp_path / 'test.tei.xml'
+        tei_path.touch()
+        basic_pipeline.grobid_processor.process_pdf.return_value = tei_path
+        tei_tree = basic_pipeline.tei_processor.parse.return_value
+        basic_pipeline.tei_processor.extract_sections.return_value = []
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = []
+        basic_pipeline.tei_processor.extract_graphics.return_value = []
+        
+        result = basic_pipeline.process_single_paper(Path('/test.pdf'), tmp_path / 'output')
+        
+        assert result['success'] is True
+        basic_pipeline.tei_processor.parse.assert_called_once_with(tei_path)
+        basic_pipeline.tei_processor.extract_sections.assert_called_once_with(tei_tree)
+        basic_pipeline.tei_processor.extract_figures_tables.assert_called_once_with(tei_tree)
+        basic_pipeline.tei_processor.extract_graphics.assert_called_once_with(tei_tree)
+
+    def test_process_single_paper_defers_parsing_with_extraction_cache(self, basic_pipeline, tmp_path):
+        """Test that with the extraction cache on, steps get a lazily parsed TEIDocument."""
+        from interactive_paper_reading.tei import TEIDocument
+        
+        tei_path = tmp_path / 'test.tei.xml'
+        tei_path.touch()
+        basic_pipeline.cache_extractions = True
+        basic_pipeline.grobid_processor.process_pdf.return_value = tei_path
+        basic_pipeline.tei_processor.extract_sections.return_value = []
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = []
+        basic_pipeline.tei_processor.extract_graphics.return_value = []
+        
+        result = basic_pipeline.process_single_paper(Path('/test.pdf'), tmp_path / 'output')
+        
+        assert result['success'] is True
+        basic_pipeline.tei_processor.parse.assert_not_called()
+        document = basic_pipeline.tei_processor.extract_sections.call_args.args[0]
+        assert isinstance(document, TEIDocument)
+        assert document.path == tei_path
+        basic_pipeline.tei_processor.extract_graphics.assert_called_once_with(document)
+
+    def test_process_single_paper_shares_tree_with_analyzer(self, pipeline_with_llm, tmp_path):
+        """Test that the LLM analyzer reuses the parsed TEI tree."""
+        tei_path = tmp_path / 'test.tei.xml'
+        tei_path.touch()
+        pipeline_with_llm.grobid_processor.process_pdf.return_value = tei_path
+        tei_tree = pipeline_with_llm.tei_processor.parse.return_value
+        pipeline_with_llm.tei_processor.extract_sections.return_value = []
+        
+        result = pipeline_with_llm.process_single_paper(
+            Path('/test.pdf'), tmp_path / 'output',
+            extract_figures=False, extract_graphics=False
+        )
+        
+        assert result['success'] is True
+        pipeline_with_llm.tei_processor.parse.assert_called_once_with(tei_path)
+        pipeline_with_llm.paper_analyzer.analyze_paper.assert_called_once_with(
+            tmp_path / 'output' / 'test-sections.md', tei_path, tei_tree=tei_tree
+        )
+
+    def test_process_single_paper_tei_parse_failure(self, basic_pipeline, tmp_path):
+        """Test that an unparsable TEI file is reported as a failure."""
+        tei_path = tmp_path / 'test.tei.xml'
+        tei_path.touch()
+        basic_pipeline.grobid_processor.process_pdf.return_value = tei_path
+        basic_pipeline.tei_processor.parse.side_effect = ValueError("not well-formed")
+        
+        result = basic_pipeline.process_single_paper(Path('/test.pdf'), tmp_path / 'output')
+        
+        assert result['success'] is False
+        assert any('TEI parsing failed' in error for error in result['errors'])
+        basic_pipeline.tei_processor.extract_sections.assert_not_called()
+
+    def test_process_single_paper_crops_in_one_pass(self, basic_pipeline, tmp_path):
+        """Test that figures and graphics are cropped with a single crop_regions() call."""
+        tei_path = tmp_path / 'test.tei.xml'
+        tei_path.touch()
+        basic_pipeline.grobid_processor.process_pdf.return_value = tei_path
+        basic_pipeline.tei_processor.extract_sections.return_value = []
+        figures = [MagicMock(element_type='figure'), MagicMock(element_type='table')]
+        graphics = [MagicMock()]
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = figures
+        basic_pipeline.tei_processor.extract_graphics.return_value = graphics
+        basic_pipeline.tei_processor.crop_regions.return_value = [None, None, None]
+        
+        result = basic_pipeline.process_single_paper(Path('/test.pdf'), tmp_path / 'output')
+        
+        assert result['success'] is True
+        assert result['figures_extracted'] == 2
+        assert result['graphics_extracted'] == 1
+        output_dir = tmp_path / 'output'
+        basic_pipeline.tei_processor.crop_regions.assert_called_once_with(
+            Path('/test.pdf'),
+            [
+                (figures[0], output_dir / 'test-figure-1.png'),
+                (figures[1], output_dir / 'test-table-2.png'),
+                (graphics[0], output_dir / 'test-graphic-1.png'),
+            ],
+            1
+        )
+
+    def test_process_single_paper_counts_successful_crops(self, basic_pipeline, tmp_path):
+        """Test that only crops without an error are counted as extracted."""
+        tei_path = tmp_path / 'test.tei.xml'
+        tei_path.touch()
+        basic_pipeline.crop_workers = 3
+        basic_pipeline.grobid_processor.process_pdf.return_value = tei_path
+        basic_pipeline.tei_processor.extract_sections.return_value = []
+        figures = [MagicMock(element_type='figure'), MagicMock(element_type='table')]
+        basic_pipeline.tei_processor.extract_figures_tables.return_value = figures
+        basic_pipeline.tei_processor.extract_graphics.return_value = []
+        basic_pipeline.tei_processor.crop_regions.return_value = [None, "bad page"]
+        
+        result = basic_pipeline.process_single_paper(Path('/test.pdf'), tmp_path / 'output')
+        
+        assert result['figures_extracted'] == 1
+        figure_call = basic_pipeline.tei_processor.crop_regions.call_args_list[0]
+        assert figure_call.args[1] == [
+            (figures[0], tmp_path / 'output' / 'test-figure-1.png'),
+            (figures[1], tmp_path / 'output' / 'test-table-2.png'),
+        ]
+        assert figure_call.args[2] == 3
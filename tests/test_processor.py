@@ -7,14 +7,21 @@ that provides a streamlined API for paper processing.
 
 import pytest
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
-from interactive_paper_reading.processor import AcademicPaperProcessor
+from interactive_paper_reading.processor import AcademicPaperProcessor, _get_grobid_processor, _safe_caption
 
 
 class TestAcademicPaperProcessor:
     """Test cases for AcademicPaperProcessor."""
 
+    @pytest.fixture(autouse=True)
+    def clear_processor_cache(self):
+        """Keep cached GrobidProcessor mocks from leaking between tests."""
+        _get_grobid_processor.cache_clear()
+        yield
+        _get_grobid_processor.cache_clear()
+
     @pytest.fixture
     def processor(self):
         """Create an AcademicPaperProcessor instance for testing."""
@@ -32,7 +39,40 @@ class TestAcademicPaperProcessor:
         with patch('interactive_paper_reading.processor.GrobidProcessor') as mock_grobid:
             with patch('interactive_paper_reading.processor.TEIProcessor'):
                 AcademicPaperProcessor(grobid_server_url='http://custom:8070')
-                mock_grobid.assert_called_once_with(server_url='http://custom:8070')
+                mock_grobid.assert_called_once_with(server_url='http://custom:8070', pool_size=32)
+
+    def test_processors_share_grobid_processor(self):
+        """Test that processors for the same server reuse one GrobidProcessor."""
+        with patch('interactive_paper_reading.processor.GrobidProcessor',
+                   side_effect=lambda **kwargs: MagicMock()) as mock_grobid:
+            with patch('interactive_paper_reading.processor.TEIProcessor'):
+                first = AcademicPaperProcessor(grobid_server_url='http://custom:8070')
+                second = AcademicPaperProcessor(grobid_server_url='http://custom:8070')
+                other = AcademicPaperProcessor(grobid_server_url='http://other:8070')
+        
+        assert first.grobid_processor is second.grobid_processor
+        assert other.grobid_processor is not first.grobid_processor
+        assert mock_grobid.call_count == 2
+
+    def test_processors_with_larger_pool_get_own_grobid_processor(self):
+        """Test that a different pool size never resizes a shared GrobidProcessor."""
+        with patch('interactive_paper_reading.processor.GrobidProcessor',
+                   side_effect=lambda **kwargs: MagicMock()) as mock_grobid:
+            with patch('interactive_paper_reading.processor.TEIProcessor'):
+                shared = AcademicPaperProcessor(grobid_server_url='http://custom:8070')
+                larger = AcademicPaperProcessor(grobid_server_url='http://custom:8070', grobid_connections=64)
+        
+        assert larger.grobid_processor is not shared.grobid_processor
+        assert mock_grobid.call_args.kwargs == {'server_url': 'http://custom:8070', 'pool_size': 64}
+
+    def test_processor_import_does_not_load_pipeline(self):
+        """Test that the processor does not pull in the pipeline and LLM analyzer."""
+        import subprocess
+        import sys
+        code = ("import sys, interactive_paper_reading.processor; "
+                "assert 'interactive_paper_reading.pipeline' not in sys.modules; "
+                "assert 'interactive_paper_reading.analyzer' not in sys.modules")
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=Path(__file__).resolve().parents[1])
 
     def test_process_pdf_to_tei_server_down(self, processor):
         """Test PDF to TEI processing when server is down."""
@@ -58,36 +98,39 @@ class TestAcademicPaperProcessor:
         
         assert result == tei_file
 
-    def test_process_pdf_to_tei_success_directory_output(self, processor):
+    def test_process_pdf_to_tei_success_directory_output(self, processor, tmp_path):
         """Test successful PDF to TEI processing with directory output."""
         processor.grobid_processor.check_server_status.return_value = True
         
-        # Mock GROBID processor to return a directory
-        output_dir = Path('/output')
-        processor.grobid_processor.process_pdf.return_value = output_dir
+        # Mock GROBID processor to return a directory containing a TEI file
+        processor.grobid_processor.process_pdf.return_value = tmp_path
+        tei_file = tmp_path / 'other.tei.xml'
+        tei_file.write_text('<TEI/>')
         
-        # Mock directory with TEI files
-        tei_file = Path('/output/test.tei.xml')
-        with patch('pathlib.Path.is_file', return_value=False):
-            with patch('pathlib.Path.glob', return_value=[tei_file]):
-                with patch('pathlib.Path.stat') as mock_stat:
-                    mock_stat.return_value.st_size = 1024
-                    
-                    result = processor.process_pdf_to_tei(Path('/test.pdf'), Path('/output'))
+        result = processor.process_pdf_to_tei(Path('/test.pdf'), tmp_path)
         
         assert result == tei_file
 
-    def test_process_pdf_to_tei_no_output_generated(self, processor):
+    def test_process_pdf_to_tei_prefers_expected_tei_name(self, processor, tmp_path):
+        """Test that the TEI file named after the PDF is used when present."""
+        processor.grobid_processor.check_server_status.return_value = True
+        processor.grobid_processor.process_pdf.return_value = tmp_path
+        (tmp_path / 'other.tei.xml').write_text('<TEI/>')
+        expected = tmp_path / 'test.grobid.tei.xml'
+        expected.write_text('<TEI/>')
+        
+        result = processor.process_pdf_to_tei(Path('/test.pdf'), tmp_path)
+        
+        assert result == expected
+
+    def test_process_pdf_to_tei_no_output_generated(self, processor, tmp_path):
         """Test PDF to TEI processing when no output is generated."""
         processor.grobid_processor.check_server_status.return_value = True
         
         # Mock GROBID processor to return a directory with no TEI files
-        output_dir = Path('/output')
-        processor.grobid_processor.process_pdf.return_value = output_dir
+        processor.grobid_processor.process_pdf.return_value = tmp_path
         
-        with patch('pathlib.Path.is_file', return_value=False):
-            with patch('pathlib.Path.glob', return_value=[]):
-                result = processor.process_pdf_to_tei(Path('/test.pdf'), Path('/output'))
+        result = processor.process_pdf_to_tei(Path('/test.pdf'), tmp_path)
         
         assert result is None
 
@@ -100,6 +143,93 @@ class TestAcademicPaperProcessor:
         
         assert result is None
 
+    def test_process_pdf_to_tei_reuses_up_to_date_tei(self, processor, tmp_path):
+        """Test that a TEI generated from the same PDF content skips GROBID."""
+        pdf_path = tmp_path / 'paper.pdf'
+        pdf_path.write_bytes(b'%PDF-1.4 content')
+        tei_file = tmp_path / 'paper.grobid.tei.xml'
+        processor.grobid_processor.check_server_status.return_value = True
+        
+        def convert(pdf_path, output_path, **kwargs):
+            tei_file.write_text('<TEI/>', encoding='utf-8')
+            return tei_file
+        
+        processor.grobid_processor.process_pdf.side_effect = convert
+        
+        assert processor.process_pdf_to_tei(pdf_path, tmp_path) == tei_file
+        assert processor.process_pdf_to_tei(pdf_path, tmp_path) == tei_file
+        assert processor.grobid_processor.process_pdf.call_count == 1
+        
+        # A changed PDF or force=True runs GROBID again
+        pdf_path.write_bytes(b'%PDF-1.4 changed')
+        processor.process_pdf_to_tei(pdf_path, tmp_path)
+        processor.force = True
+        processor.process_pdf_to_tei(pdf_path, tmp_path)
+        assert processor.grobid_processor.process_pdf.call_count == 3
+
+    def test_process_tei_to_content_skips_unchanged_content(self, processor, tmp_path):
+        """Test that markdown and crops are only regenerated when their inputs change."""
+        tei_file = tmp_path / 'paper.grobid.tei.xml'
+        tei_file.write_text('<TEI/>', encoding='utf-8')
+        pdf_file = tmp_path / 'paper.pdf'
+        pdf_file.write_bytes(b'%PDF-1.4')
+        
+        figure = MagicMock(caption='Done', element_type='figure')
+        processor.tei_processor.extract_sections.return_value = []
+        processor.tei_processor.save_sections_as_markdown.side_effect = \
+            lambda sections, path: path.write_text('# Paper')
+        processor.tei_processor.extract_figures_tables.return_value = [figure]
+        processor.tei_processor.extract_graphics.return_value = []
+        
+        def crop(pdf, regions, max_workers):
+            for _, output_file in regions:
+                output_file.write_bytes(b'image')
+            return [None] * len(regions)
+        
+        processor.tei_processor.crop_regions.side_effect = crop
+        
+        def runs():
+            processor.process_tei_to_content(tei_file, pdf_file, tmp_path)
+            return processor.tei_processor.crop_regions.call_count
+        
+        assert runs() == 1
+        assert (tmp_path / 'paper.grobid.tei.xml.content.json').is_file()
+        # Nothing changed: markdown and crops are both skipped
+        assert runs() == 1
+        assert processor.tei_processor.save_sections_as_markdown.call_count == 1
+        
+        # A different crop setting, a missing output, a changed TEI or
+        # force=True each run the step again
+        processor.dpi = 72
+        assert runs() == 2
+        assert runs() == 2
+        (tmp_path / 'figures' / 'figure_1_Done.png').unlink()
+        assert runs() == 3
+        tei_file.write_text('<TEI>changed</TEI>', encoding='utf-8')
+        assert runs() == 4
+        processor.force = True
+        assert runs() == 5
+
+    def test_process_tei_to_content_failed_crop_is_retried(self, processor, tmp_path):
+        """Test that a partly failed run is not recorded as up to date."""
+        tei_file = tmp_path / 'paper.grobid.tei.xml'
+        tei_file.write_text('<TEI/>', encoding='utf-8')
+        pdf_file = tmp_path / 'paper.pdf'
+        pdf_file.write_bytes(b'%PDF-1.4')
+        
+        processor.tei_processor.extract_sections.return_value = []
+        processor.tei_processor.extract_figures_tables.return_value = [
+            MagicMock(caption='Fig', element_type='figure')
+        ]
+        processor.tei_processor.extract_graphics.return_value = []
+        processor.tei_processor.crop_regions.return_value = [RuntimeError("bad clip")]
+        
+        processor.process_tei_to_content(tei_file, pdf_file, tmp_path)
+        processor.process_tei_to_content(tei_file, pdf_file, tmp_path)
+        
+        assert processor.tei_processor.crop_regions.call_count == 2
+        assert not (tmp_path / 'paper.grobid.tei.xml.content.json').exists()
+
     def test_process_tei_to_content_sections_only(self, processor):
         """Test TEI to content processing with sections only."""
         tei_file = Path('/test.tei.xml')
@@ -114,7 +244,9 @@ class TestAcademicPaperProcessor:
             processor.process_tei_to_content(tei_file, None, Path('/output'))
         
         # Verify sections were processed
-        processor.tei_processor.extract_sections.assert_called_once_with(tei_file)
+        processor.tei_processor.parse.assert_called_once_with(tei_file)
+        tei_tree = processor.tei_processor.parse.return_value
+        processor.tei_processor.extract_sections.assert_called_once_with(tei_tree)
         processor.tei_processor.save_sections_as_markdown.assert_called_once()
 
     def test_process_tei_to_content_with_figures(self, processor):
@@ -137,8 +269,131 @@ class TestAcademicPaperProcessor:
                 processor.process_tei_to_content(tei_file, pdf_file, Path('/output'))
         
         # Verify figures were processed
-        processor.tei_processor.extract_figures_tables.assert_called_once_with(tei_file)
-        processor.tei_processor.crop_figure_from_pdf.assert_called_once()
+        tei_tree = processor.tei_processor.parse.return_value
+        processor.tei_processor.extract_figures_tables.assert_called_once_with(tei_tree)
+        processor.tei_processor.crop_regions.assert_called_once()
+        pdf_arg, crops = processor.tei_processor.crop_regions.call_args.args
+        assert pdf_arg == pdf_file
+        assert [output.name for _, output in crops] == ['figure_1_Test_figure.png']
+
+    def test_process_tei_to_content_logs_crop_results(self, processor, caplog):
+        """Test that crop results are logged, with per-figure success at DEBUG."""
+        processor.tei_processor.extract_sections.return_value = []
+        processor.tei_processor.extract_figures_tables.return_value = [
+            MagicMock(caption='Good figure', element_type='figure'),
+            MagicMock(caption='Bad figure', element_type='figure'),
+        ]
+        processor.tei_processor.extract_graphics.return_value = []
+        processor.tei_processor.crop_regions.return_value = [None, "bad page"]
+        
+        with caplog.at_level('INFO', logger='interactive_paper_reading.processor'):
+            with patch('pathlib.Path.mkdir'):
+                with patch('pathlib.Path.exists', return_value=True):
+                    processor.process_tei_to_content(Path('/test.tei.xml'), Path('/test.pdf'), Path('/output'))
+        
+        messages = [(record.levelname, record.getMessage()) for record in caplog.records]
+        assert ('INFO', 'Found 2 figures/tables') in messages
+        assert ('WARNING', '❌ Failed to crop figure 2: bad page') in messages
+        assert not any('figure_1_Good_figure.png' in message for _, message in messages)
+
+    def test_process_tei_to_content_crops_in_one_pass(self, processor):
+        """Test that figures and graphics are cropped with a single crop_regions() call."""
+        processor.tei_processor.extract_sections.return_value = []
+        figure = MagicMock(caption='Results', element_type='table')
+        graphic = MagicMock(parent_figure_caption='')
+        processor.tei_processor.extract_figures_tables.return_value = [figure]
+        processor.tei_processor.extract_graphics.return_value = [graphic]
+        processor.tei_processor.crop_regions.return_value = [None, None]
+        
+        with patch('pathlib.Path.mkdir'):
+            with patch('pathlib.Path.exists', return_value=True):
+                processor.process_tei_to_content(Path('/test.tei.xml'), Path('/test.pdf'), Path('/output'))
+        
+        processor.tei_processor.crop_regions.assert_called_once_with(
+            Path('/test.pdf'),
+            [
+                (figure, Path('/output/figures/table_1_Results.png')),
+                (graphic, Path('/output/graphics/graphic_1_graphic_1.png')),
+            ],
+            max_workers=1
+        )
+
+    def test_process_tei_to_content_uses_crop_workers(self, processor):
+        """Test that crop_workers is passed on to crop_regions()."""
+        processor.crop_workers = 4
+        processor.tei_processor.extract_sections.return_value = []
+        processor.tei_processor.extract_figures_tables.return_value = [MagicMock(caption='A', element_type='figure')]
+        processor.tei_processor.extract_graphics.return_value = []
+        processor.tei_processor.crop_regions.return_value = [None]
+        
+        with patch('pathlib.Path.mkdir'):
+            with patch('pathlib.Path.exists', return_value=True):
+                processor.process_tei_to_content(Path('/test.tei.xml'), Path('/test.pdf'), Path('/output'))
+        
+        assert processor.tei_processor.crop_regions.call_args.kwargs['max_workers'] == 4
+
+    def test_process_tei_to_content_jpeg_output(self, processor):
+        """Test that image_format='jpeg' names crops with a .jpg extension."""
+        processor.image_format = 'jpeg'
+        processor.tei_processor.extract_sections.return_value = []
+        figure = MagicMock(caption='Results', element_type='figure')
+        processor.tei_processor.extract_figures_tables.return_value = [figure]
+        processor.tei_processor.extract_graphics.return_value = [MagicMock(parent_figure_caption='')]
+        processor.tei_processor.crop_regions.return_value = [None, None]
+        
+        with patch('pathlib.Path.mkdir'):
+            with patch('pathlib.Path.exists', return_value=True):
+                processor.process_tei_to_content(Path('/test.tei.xml'), Path('/test.pdf'), Path('/output'))
+        
+        crops = processor.tei_processor.crop_regions.call_args.args[1]
+        assert [path.name for _, path in crops] == ['figure_1_Results.jpg', 'graphic_1_graphic_1.jpg']
+
+    def test_processor_rejects_unknown_image_format(self):
+        """Test that unsupported image formats are rejected up front."""
+        with pytest.raises(ValueError, match="Unsupported image format"):
+            AcademicPaperProcessor(image_format='webp')
+
+    def test_process_tei_to_content_uses_given_tree(self, processor):
+        """Test that a pre-parsed TEI tree is used instead of re-reading the file."""
+        tei_file = Path('/test.tei.xml')
+        tei_tree = object()
+        processor.tei_processor.extract_sections.return_value = []
+        processor.tei_processor.extract_figures_tables.return_value = []
+        processor.tei_processor.extract_graphics.return_value = []
+        
+        with patch('pathlib.Path.mkdir'):
+            processor.process_tei_to_content(tei_file, None, Path('/output'), tei_tree=tei_tree)
+        
+        processor.tei_processor.parse.assert_not_called()
+        processor.tei_processor.extract_sections.assert_called_once_with(tei_tree)
+        processor.tei_processor.extract_figures_tables.assert_called_once_with(tei_tree)
+        processor.tei_processor.extract_graphics.assert_called_once_with(tei_tree)
+
+    def test_process_tei_to_content_defers_parsing_with_extraction_cache(self, processor, tmp_path):
+        """Test that with the extraction cache on, steps get a lazily parsed TEIDocument."""
+        from interactive_paper_reading.tei import TEIDocument
+        
+        tei_path = tmp_path / 'test.tei.xml'
+        processor.cache_extractions = True
+        processor.tei_processor.extract_sections.return_value = []
+        processor.tei_processor.extract_figures_tables.return_value = []
+        processor.tei_processor.extract_graphics.return_value = []
+        
+        processor.process_tei_to_content(tei_path, None, tmp_path)
+        
+        processor.tei_processor.parse.assert_not_called()
+        document = processor.tei_processor.extract_sections.call_args.args[0]
+        assert isinstance(document, TEIDocument)
+        assert document.path == tei_path
+        processor.tei_processor.extract_graphics.assert_called_once_with(document)
+
+    def test_process_tei_to_content_parse_error(self, processor):
+        """Test that an unparsable TEI file stops content extraction."""
+        processor.tei_processor.parse.side_effect = Exception("not well-formed")
+        
+        processor.process_tei_to_content(Path('/test.tei.xml'), None, Path('/output'))
+        
+        processor.tei_processor.extract_sections.assert_not_called()
 
     def test_process_tei_to_content_sections_extraction_error(self, processor):
         """Test TEI to content processing with sections extraction error."""
@@ -177,6 +432,99 @@ class TestAcademicPaperProcessor:
         # TEI content processing should not be called
         mock_tei_content.assert_not_called()
 
+    def test_process_batch_runs_each_paper(self, processor, tmp_path):
+        """Test batch processing converts PDFs concurrently and keeps input order."""
+        pdfs = [tmp_path / 'a.pdf', tmp_path / 'b.pdf', tmp_path / 'c.pdf']
+        
+        def convert(pdf_path, output_dir):
+            if pdf_path.stem == 'b':
+                return None
+            return output_dir / f'{pdf_path.stem}.grobid.tei.xml'
+        
+        with patch.object(processor, 'process_pdf_to_tei', side_effect=convert) as mock_pdf_to_tei:
+            with patch.object(processor, 'process_tei_to_content') as mock_tei_to_content:
+                results = processor.process_batch(pdfs, tmp_path / 'out', max_workers=2)
+        
+        assert results == [
+            tmp_path / 'out' / 'a' / 'a.grobid.tei.xml',
+            None,
+            tmp_path / 'out' / 'c' / 'c.grobid.tei.xml',
+        ]
+        assert mock_pdf_to_tei.call_count == 3
+        assert (tmp_path / 'out' / 'b').is_dir()
+        # Content extraction only runs for successful conversions
+        assert sorted(call.args[1].stem for call in mock_tei_to_content.call_args_list) == ['a', 'c']
+        for call in mock_tei_to_content.call_args_list:
+            tei_file, pdf_file, output_dir = call.args
+            assert output_dir == tmp_path / 'out' / pdf_file.stem
+
+    def test_process_batch_warns_when_workers_exceed_pool(self, processor, tmp_path, caplog):
+        """Test that more workers than pooled GROBID connections is reported, not resized."""
+        processor.grobid_connections = 2
+        pdfs = [tmp_path / f'paper{i}.pdf' for i in range(4)]
+        
+        with patch.object(processor, 'process_pdf_to_tei', return_value=None):
+            processor.process_batch(pdfs, tmp_path / 'out', max_workers=4)
+        
+        assert "4 workers exceed the 2 pooled GROBID connections" in caplog.text
+
+    def test_process_batch_empty(self, processor, tmp_path):
+        """Test batch processing with no PDFs does nothing."""
+        with patch.object(processor, 'process_pdf_to_tei') as mock_pdf_to_tei:
+            assert processor.process_batch([], tmp_path) == []
+        mock_pdf_to_tei.assert_not_called()
+
+    def test_process_batch_extracts_in_worker_processes(self, processor, tmp_path):
+        """Test that jobs > 1 runs the TEI → content step in worker processes."""
+        tei_xml = (
+            '<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><body>'
+            '<div><head n="1">Introduction</head><p>Worker text.</p></div>'
+            '</body></text></TEI>'
+        )
+        
+        def convert(pdf_path, output_dir):
+            tei_file = output_dir / f'{pdf_path.stem}.grobid.tei.xml'
+            tei_file.write_text(tei_xml, encoding='utf-8')
+            return tei_file
+        
+        with patch.object(processor, 'process_pdf_to_tei', side_effect=convert):
+            results = processor.process_batch(
+                [tmp_path / 'first.pdf', tmp_path / 'second.pdf'], tmp_path / 'out', jobs=2
+            )
+        
+        assert [tei_file.name for tei_file in results] == ['first.grobid.tei.xml', 'second.grobid.tei.xml']
+        # The parent's mocked TEI processor is never used for extraction
+        processor.tei_processor.parse.assert_not_called()
+        markdown = (tmp_path / 'out' / 'first' / 'first.tei_sections.md').read_text(encoding='utf-8')
+        assert 'Worker text.' in markdown
+
+    def test_content_processor_has_no_grobid_client(self):
+        """Test that worker processors are built without a GROBID client."""
+        with patch('interactive_paper_reading.processor.GrobidProcessor') as mock_grobid:
+            processor = AcademicPaperProcessor._for_content()
+        
+        mock_grobid.assert_not_called()
+        assert processor.grobid_processor is None
+        assert processor.tei_processor is not None
+        assert processor.crop_workers == 1
+        assert processor.image_format == 'png'
+        assert processor.cache_extractions is False
+
+    def test_processor_crop_dpi(self):
+        """Test that dpi is passed to the TEI processor and to batch content workers."""
+        from interactive_paper_reading import processor as processor_module
+        
+        with patch('interactive_paper_reading.processor.GrobidProcessor'):
+            with patch('interactive_paper_reading.processor.TEIProcessor') as mock_tei:
+                AcademicPaperProcessor(dpi=72)
+        assert mock_tei.call_args.kwargs['dpi'] == 72
+        
+        processor_module._init_content_worker(False, 'png', False, 72)
+        try:
+            assert processor_module._worker_processor.tei_processor.dpi == 72
+        finally:
+            processor_module._worker_processor = None
+
     def test_process_tei_only_default_output_dir(self, processor):
         """Test processing TEI file only with default output directory."""
         tei_file = Path('/some/path/test.tei.xml')
@@ -213,3 +561,22 @@ class TestAcademicPaperProcessor:
         mock_process.assert_called_once_with(
             tei_file, pdf_file, tei_file.parent
         )
+
+
+class TestSafeCaption:
+    """Test cases for caption-to-filename sanitization."""
+
+    @pytest.mark.parametrize("caption", [
+        "Figure 1: Results on ImageNet (top-1 accuracy)",
+        "  Überblick – die Architektur des Modells  ",
+        "Table 2. α/β sweep",
+        "!!!",
+        "",
+    ])
+    def test_matches_character_filter(self, caption):
+        """Test that the translate table keeps the same characters as isalnum()."""
+        expected = "".join(c for c in caption[:30]
+                           if c.isalnum() or c in (' ', '-')).strip().replace(' ', '_')
+        
+        assert _safe_caption(caption) == expected
+
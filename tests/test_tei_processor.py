@@ -7,9 +7,9 @@ This module contains tests for extracting sections and figures from GROBID TEI X
 import pytest
 from pathlib import Path
 from unittest.mock import patch, mock_open, MagicMock
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 
-from interactive_paper_reading.tei import TEIProcessor, Section, FigureTable, Graphic
+from interactive_paper_reading.tei import TEIProcessor, TEIDocument, Section, FigureTable, Graphic
 
 
 class TestTEIProcessor:
@@ -98,24 +98,33 @@ class TestTEIProcessor:
         """Create a TEI processor instance for testing."""
         return TEIProcessor()
 
+    @pytest.fixture
+    def write_tei(self, tmp_path):
+        """Write TEI XML content to a temporary file and return its path."""
+        def write(content: str) -> Path:
+            tei_path = tmp_path / 'test.tei.xml'
+            tei_path.write_text(content, encoding='utf-8')
+            return tei_path
+        return write
+
     def test_processor_initialization(self, processor):
         """Test that TEIProcessor initializes correctly."""
         assert processor is not None
         assert hasattr(processor, 'extract_sections')
         assert hasattr(processor, 'extract_figures_tables')
 
-    def test_extract_sections_returns_list(self, processor, sample_tei_xml):
+    def test_extract_sections_returns_list(self, processor, sample_tei_xml, write_tei):
         """Test that extract_sections returns a list of Section objects."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            sections = processor.extract_sections(Path('test.xml'))
+        tei_path = write_tei(sample_tei_xml)
+        sections = processor.extract_sections(tei_path)
             
         assert isinstance(sections, list)
         assert len(sections) >= 2  # At least Introduction and Related Work
 
-    def test_section_structure(self, processor, sample_tei_xml):
+    def test_section_structure(self, processor, sample_tei_xml, write_tei):
         """Test that sections have correct structure."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            sections = processor.extract_sections(Path('test.xml'))
+        tei_path = write_tei(sample_tei_xml)
+        sections = processor.extract_sections(tei_path)
             
         # Check first section
         intro_section = sections[0]
@@ -123,18 +132,18 @@ class TestTEIProcessor:
         assert intro_section.title == "Introduction"
         assert "introduction section" in intro_section.content.lower()
 
-    def test_extract_figures_tables_returns_list(self, processor, sample_tei_xml):
+    def test_extract_figures_tables_returns_list(self, processor, sample_tei_xml, write_tei):
         """Test that extract_figures_tables returns a list of FigureTable objects."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            figures = processor.extract_figures_tables(Path('test.xml'))
+        tei_path = write_tei(sample_tei_xml)
+        figures = processor.extract_figures_tables(tei_path)
             
         assert isinstance(figures, list)
         assert len(figures) >= 1
 
-    def test_figure_coordinates_parsing(self, processor, sample_tei_xml):
+    def test_figure_coordinates_parsing(self, processor, sample_tei_xml, write_tei):
         """Test that figure coordinates are parsed correctly."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            figures = processor.extract_figures_tables(Path('test.xml'))
+        tei_path = write_tei(sample_tei_xml)
+        figures = processor.extract_figures_tables(tei_path)
             
         figure = figures[0]
         assert figure.page == 1
@@ -143,17 +152,17 @@ class TestTEIProcessor:
         assert figure.width == 300.0
         assert figure.height == 150.0
 
-    def test_save_sections_as_markdown_creates_file(self, processor):
+    def test_save_sections_as_markdown_creates_file(self, processor, tmp_path):
         """Test that save_sections_as_markdown creates a markdown file."""
         sections = [
             Section("1", "Introduction", "This is the introduction."),
-            Section("2", "Methods", "This describes the methods.")
+            Section("2", "Méthodes", "This describes the methods.")
         ]
+        output_path = tmp_path / 'out' / 'output.md'
         
-        with patch('builtins.open', mock_open()) as mock_file:
-            processor.save_sections_as_markdown(sections, Path('output.md'))
-            
-        mock_file.assert_called_once_with(Path('output.md'), 'w', encoding='utf-8')
+        processor.save_sections_as_markdown(sections, output_path)
+        
+        assert output_path.read_text(encoding='utf-8') == ''.join(s.to_markdown() for s in sections)
 
     def test_crop_figure_from_pdf_calls_correct_method(self, processor):
         """Test that crop_figure_from_pdf calls the correct cropping method."""
@@ -176,24 +185,126 @@ class TestTEIProcessor:
             
         mock_crop.assert_called_once()
 
+    def test_parse_once_shared_across_extractions(self, processor, sample_tei_xml, write_tei):
+        """Test that a tree from parse() gives the same results as a file path."""
+        tei_path = write_tei(sample_tei_xml)
+        with patch.object(processor, 'parse', wraps=processor.parse) as mock_parse:
+            tree = processor.parse(tei_path)
+            sections = processor.extract_sections(tree)
+            figures = processor.extract_figures_tables(tree)
+            graphics = processor.extract_graphics(tree)
+        
+        mock_parse.assert_called_once_with(tei_path)
+        assert [s.number for s in sections] == ['1', '2', '2.1']
+        assert len(figures) == 1
+        assert len(graphics) == 1
+
+        assert processor.extract_sections(tei_path) == sections
+
+    def test_streamed_extraction_matches_parsed_tree(self, processor, write_tei):
+        """Test that streaming figures/graphics from a path keeps document order for nested figures."""
+        tei_path = write_tei('''<?xml version="1.0"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><body>
+    <figure coords="1,10,10,20,20"><head>Figure 1</head>
+        <graphic coords="1,1,1,2,2" type="bitmap"/>
+        <figure coords="2,5,5,5,5"><head>Inner</head><graphic coords="2,1,1,1,1"/></figure>
+    </figure>
+    <figure type="table" coords="3,1,1,1,1"><head>Table 1</head><table coords="3,0,0,1,1"/></figure>
+</body></text></TEI>''')
+        tree = processor.parse(tei_path)
+        
+        figures = processor.extract_figures_tables(tei_path)
+        graphics = processor.extract_graphics(tei_path)
+        
+        assert figures == processor.extract_figures_tables(tree)
+        assert graphics == processor.extract_graphics(tree)
+        assert [f.caption for f in figures] == ['Figure 1', 'Inner', 'Table 1', '']
+        assert [g.parent_figure_caption for g in graphics] == ['Figure 1', 'Inner']
+
+    def test_streamed_sections_match_parsed_tree(self, processor, write_tei):
+        """Test that streaming sections from a path keeps document order for nested divs."""
+        tei_path = write_tei('''<?xml version="1.0"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><body>
+    <div><head n="1">Outer</head><p>Outer text.</p>
+        <div><head n="1.1">Inner</head><p>Inner text.</p></div>
+    </div>
+    <div><head n="2">Second</head><p>Second text.</p></div>
+</body></text></TEI>''')
+        
+        sections = processor.extract_sections(tei_path)
+        
+        assert sections == processor.extract_sections(processor.parse(tei_path))
+        assert [s.number for s in sections] == ['1', '1.1', '2']
+        assert sections[0].content == 'Outer text.'
+
+    def test_xpaths_compiled_once(self, processor):
+        """Test that processors share the XPaths compiled at import."""
+        other = TEIProcessor()
+        
+        assert other._divs_xp is processor._divs_xp
+        assert other._head_xp is processor._head_xp
+
+    def test_parse_huge_text_node(self, processor, write_tei):
+        """Test that text nodes beyond libxml2's default 10 MB limit still parse."""
+        tei_path = write_tei(
+            '<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><body>'
+            '<div><head n="1">Long</head><p>' + 'x' * 11_000_000 + '</p></div>'
+            '<figure coords="1,1,1,2,2"><head>Figure 1</head></figure>'
+            '</body></text></TEI>'
+        )
+        
+        sections = processor.extract_sections(tei_path)
+        
+        assert len(sections[0].content) >= 11_000_000
+        assert [f.caption for f in processor.extract_figures_tables(tei_path)] == ['Figure 1']
+
+    def test_cached_extractions_skip_parsing(self, sample_tei_xml, write_tei):
+        """Test that cached extract_* results are reused until the TEI file changes."""
+        import os
+        
+        processor = TEIProcessor(cache_extractions=True)
+        tei_path = write_tei(sample_tei_xml)
+        first = (processor.extract_sections(TEIDocument(tei_path, processor)),
+                 processor.extract_figures_tables(tei_path),
+                 processor.extract_graphics(tei_path))
+        
+        with patch.object(processor, 'parse', wraps=processor.parse) as mock_parse:
+            document = TEIDocument(tei_path, processor)
+            second = (processor.extract_sections(document),
+                      processor.extract_figures_tables(document),
+                      processor.extract_graphics(document))
+            mock_parse.assert_not_called()
+            
+            # Touching the file invalidates every cached result; they share one parse
+            stat = tei_path.stat()
+            os.utime(tei_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            document = TEIDocument(tei_path, processor)
+            third = (processor.extract_sections(document),
+                     processor.extract_figures_tables(document),
+                     processor.extract_graphics(document))
+            mock_parse.assert_called_once_with(tei_path)
+        
+        assert first == second == third
+        assert tei_path.with_name('test.tei.xml.extract_sections.pkl').is_file()
+
     def test_file_not_found_raises_exception(self, processor):
         """Test that FileNotFoundError is raised for non-existent files."""
         with pytest.raises(FileNotFoundError):
             processor.extract_sections(Path('non_existent.xml'))
 
-    def test_extract_graphics_returns_list(self, processor, sample_tei_xml):
+    def test_extract_graphics_returns_list(self, processor, sample_tei_xml, write_tei):
         """Test that extract_graphics returns a list of Graphic objects."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            graphics = processor.extract_graphics(Path('test.xml'))
+        tei_path = write_tei(sample_tei_xml)
+        graphics = processor.extract_graphics(tei_path)
             
         assert isinstance(graphics, list)
         if graphics:
             assert isinstance(graphics[0], Graphic)
 
-    def test_graphic_structure(self, processor, sample_tei_xml):
+    def test_graphic_structure(self, processor, sample_tei_xml, write_tei):
         """Test the structure and properties of extracted graphics."""
-        with patch('builtins.open', mock_open(read_data=sample_tei_xml)):
-            graphics = processor.extract_graphics(Path('test.xml'))
+        tei_path = write_tei(sample_tei_xml)
+        graphics = processor.extract_graphics(tei_path)
             
         if graphics:
             graphic = graphics[0]
@@ -241,10 +352,10 @@ class TestTEIProcessor:
 
     # NEW TESTS TO IMPROVE COVERAGE
     
-    def test_empty_sections_handling(self, processor, empty_sections_xml):
+    def test_empty_sections_handling(self, processor, empty_sections_xml, write_tei):
         """Test handling of empty or malformed sections."""
-        with patch('builtins.open', mock_open(read_data=empty_sections_xml)):
-            sections = processor.extract_sections(Path('test.xml'))
+        tei_path = write_tei(empty_sections_xml)
+        sections = processor.extract_sections(tei_path)
             
         # Should handle empty sections gracefully
         assert isinstance(sections, list)
@@ -272,10 +383,10 @@ class TestTEIProcessor:
         result = processor._extract_section_from_div(div_number_only)
         assert result is None
 
-    def test_multi_segment_coordinate_parsing(self, processor, multi_segment_coords_xml):
+    def test_multi_segment_coordinate_parsing(self, processor, multi_segment_coords_xml, write_tei):
         """Test parsing of multi-segment coordinates."""
-        with patch('builtins.open', mock_open(read_data=multi_segment_coords_xml)):
-            figures = processor.extract_figures_tables(Path('test.xml'))
+        tei_path = write_tei(multi_segment_coords_xml)
+        figures = processor.extract_figures_tables(tei_path)
             
         # Should have at least one figure with combined coordinates
         assert len(figures) >= 1
@@ -312,6 +423,14 @@ class TestTEIProcessor:
         assert result is not None
         assert result[0] == 1  # Should only use page 1
 
+    def test_parse_coordinates_encompassing_box(self, processor):
+        """Test that boxes on the first page are merged and malformed boxes skipped."""
+        result = processor._parse_coordinates(
+            "x,1,2,3,4;1,100,200,50,25,extra;1,90,210,20,30;2,0,0,999,999;1,5,5"
+        )
+        
+        assert result == (1, 90.0, 200.0, 60.0, 40.0)
+
     def test_extract_figure_table_no_coordinates(self, processor):
         """Test figure/table extraction when coordinates are missing."""
         element = ET.Element('figure')
@@ -392,6 +511,156 @@ class TestTEIProcessor:
         mock_page.get_pixmap.assert_called_once()
         mock_pix.save.assert_called_once()
 
+    def test_crop_pdf_region_reuses_open_document(self, processor):
+        """Test that cropping from an already-open document does not reopen the PDF."""
+        fitz = pytest.importorskip('fitz')
+        mock_doc = MagicMock(spec=fitz.Document)
+        mock_page = MagicMock()
+        mock_doc.__getitem__.return_value = mock_page
+        
+        with patch('fitz.open') as mock_open:
+            with patch.object(Path, 'mkdir'):
+                processor._crop_pdf_region(mock_doc, 2, (10, 20, 30, 40), Path("output.png"))
+        
+        mock_open.assert_not_called()
+        mock_doc.__getitem__.assert_called_once_with(1)
+        mock_doc.close.assert_not_called()
+        mock_page.get_pixmap.return_value.save.assert_called_once_with(
+            "output.png", jpg_quality=TEIProcessor.JPEG_QUALITY)
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_crop_regions(self, processor, tmp_path, max_workers):
+        """Test cropping several regions sequentially and with worker processes."""
+        fitz = pytest.importorskip('fitz')
+        pdf_path = tmp_path / "paper.pdf"
+        doc = fitz.open()
+        doc.new_page(width=200, height=200)
+        doc.new_page(width=200, height=200)
+        doc.save(str(pdf_path))
+        doc.close()
+        
+        crops = [
+            (FigureTable("figure", "", 1, 10, 10, 50, 40), tmp_path / "fig1.png"),
+            (Graphic("bitmap", 2, 20, 20, 60, 30), tmp_path / "graphic1.png"),
+            (FigureTable("table", "", 5, 10, 10, 50, 40), tmp_path / "missing.png"),
+        ]
+        
+        errors = processor.crop_regions(pdf_path, crops, max_workers=max_workers)
+        
+        assert errors[:2] == [None, None]
+        assert errors[2] is not None
+        assert (tmp_path / "fig1.png").exists()
+        assert (tmp_path / "graphic1.png").exists()
+        assert not (tmp_path / "missing.png").exists()
+    
+    def test_pool_context_prefers_forkserver(self):
+        """Test that worker pools use a preloaded forkserver where it is available."""
+        import multiprocessing
+        from interactive_paper_reading.tei import pool_context
+        
+        context = pool_context('interactive_paper_reading.tei')
+        
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            assert context.get_start_method() == 'forkserver'
+        else:
+            assert context.get_start_method() == 'spawn'
+
+    def test_pool_context_sets_forkserver_preload_once(self):
+        """Test that only PyMuPDF and the first pool's worker module are preloaded, once."""
+        import multiprocessing
+        from interactive_paper_reading import tei
+        
+        if 'forkserver' not in multiprocessing.get_all_start_methods():
+            pytest.skip("forkserver is not available")
+        
+        with patch.object(tei, '_forkserver_preload_set', False), \
+             patch('multiprocessing.context.ForkServerContext.set_forkserver_preload') as mock_preload:
+            tei.pool_context('interactive_paper_reading.processor')
+            tei.pool_context('interactive_paper_reading.pipeline')
+        
+        mock_preload.assert_called_once_with(['fitz', 'interactive_paper_reading.processor'])
+
+    def test_crop_regions_jpeg_output(self, processor, tmp_path):
+        """Test that a .jpg output path is encoded as JPEG."""
+        fitz = pytest.importorskip('fitz')
+        pdf_path = tmp_path / "paper.pdf"
+        doc = fitz.open()
+        doc.new_page(width=200, height=200)
+        doc.save(str(pdf_path))
+        doc.close()
+        
+        crops = [
+            (FigureTable("figure", "", 1, 10, 10, 50, 40), tmp_path / "fig1.jpg"),
+            (FigureTable("figure", "", 1, 80, 80, 50, 40), tmp_path / "fig2.jpg"),
+            (FigureTable("figure", "", 1, 10, 100, 50, 40), tmp_path / "fig3.png"),
+        ]
+        
+        assert processor.crop_regions(pdf_path, crops) == [None, None, None]
+        assert (tmp_path / "fig1.jpg").read_bytes()[:3] == b'\xff\xd8\xff'
+        assert (tmp_path / "fig2.jpg").read_bytes()[:3] == b'\xff\xd8\xff'
+        assert (tmp_path / "fig3.png").read_bytes()[:4] == b'\x89PNG'
+    
+    def test_crop_regions_renders_shared_page_once(self, processor, tmp_path):
+        """Test that crops on the same page are cut from a single page render."""
+        fitz = pytest.importorskip('fitz')
+        pdf_path = tmp_path / "paper.pdf"
+        doc = fitz.open()
+        page = doc.new_page(width=300, height=300)
+        page.insert_text((20, 50), "Figure 1: results", fontsize=14)
+        page.draw_rect(fitz.Rect(100, 100, 250, 200), color=(1, 0, 0), fill=(0, 0, 1))
+        doc.save(str(pdf_path))
+        doc.close()
+        
+        regions = [
+            FigureTable("figure", "", 1, 10.3, 30.7, 140.0, 30.0),
+            FigureTable("figure", "", 1, 90.5, 95.2, 170.0, 115.0),
+        ]
+        crops = [(region, tmp_path / f"shared{i}.png") for i, region in enumerate(regions)]
+        
+        with processor.open_pdf(pdf_path) as pdf:
+            with patch.object(fitz.Page, 'get_pixmap', autospec=True,
+                              side_effect=fitz.Page.get_pixmap) as mock_get_pixmap:
+                errors = processor.crop_regions(pdf, crops)
+            assert errors == [None, None]
+            assert mock_get_pixmap.call_count == 1
+            
+            for i, region in enumerate(regions):
+                processor._crop_pdf_region(pdf, 1, region.coordinates, tmp_path / f"single{i}.png")
+        
+        for i in range(len(regions)):
+            shared = fitz.Pixmap(str(tmp_path / f"shared{i}.png"))
+            single = fitz.Pixmap(str(tmp_path / f"single{i}.png"))
+            assert (shared.width, shared.height) == (single.width, single.height)
+            assert shared.samples == single.samples
+    
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_crop_regions_dpi(self, tmp_path, max_workers):
+        """Test that crops are rendered at the processor's resolution."""
+        fitz = pytest.importorskip('fitz')
+        pdf_path = tmp_path / "paper.pdf"
+        doc = fitz.open()
+        doc.new_page(width=200, height=200)
+        doc.new_page(width=200, height=200)
+        doc.save(str(pdf_path))
+        doc.close()
+        
+        crops = [
+            (FigureTable("figure", "", 1, 10, 10, 50, 40), tmp_path / "fig1.png"),
+            (FigureTable("figure", "", 1, 100, 100, 50, 40), tmp_path / "fig2.png"),
+            (Graphic("bitmap", 2, 20, 20, 60, 30), tmp_path / "graphic1.png"),
+        ]
+        
+        assert TEIProcessor(dpi=72).crop_regions(pdf_path, crops, max_workers=max_workers) == [None] * 3
+        
+        sizes = [(fitz.Pixmap(str(path)).width, fitz.Pixmap(str(path)).height) for _, path in crops]
+        assert sizes == [(50, 40), (50, 40), (60, 30)]
+
+    def test_crop_regions_empty(self, processor):
+        """Test that no PDF is opened when there is nothing to crop."""
+        with patch.object(processor, 'open_pdf') as mock_open_pdf:
+            assert processor.crop_regions(Path("test.pdf"), [], max_workers=4) == []
+        mock_open_pdf.assert_not_called()
+
     def test_get_element_text_nested_elements(self, processor):
         """Test _get_element_text with nested elements and tail text."""
         # Create complex nested structure